@@ -4,62 +4,135 @@ https://dfetch.rtfd.org
 """
 
 import argparse
+import contextlib
+import importlib
 import sys
-from collections.abc import Sequence
+from collections.abc import Iterable, Iterator, Sequence
 
 from rich.console import Console
 
-import dfetch.commands.add
-import dfetch.commands.check
-import dfetch.commands.diff
-import dfetch.commands.environment
-import dfetch.commands.format_patch
-import dfetch.commands.freeze
-import dfetch.commands.import_
-import dfetch.commands.init
-import dfetch.commands.remove
-import dfetch.commands.report
-import dfetch.commands.update
-import dfetch.commands.update_patch
-import dfetch.commands.validate
 import dfetch.log
+import dfetch.util.cache
 import dfetch.util.cmdline
+from dfetch.commands.command import Command
 from dfetch.log import DLogger
+from dfetch.util import trace
+
+# Every command with the class implementing it, a command is only imported
+# when it is used, so starting dfetch doesn't import what other commands need.
+COMMANDS: dict[str, str] = {
+    "add": "dfetch.commands.add.Add",
+    "check": "dfetch.commands.check.Check",
+    "diff": "dfetch.commands.diff.Diff",
+    "environment": "dfetch.commands.environment.Environment",
+    "format-patch": "dfetch.commands.format_patch.FormatPatch",
+    "freeze": "dfetch.commands.freeze.Freeze",
+    "import": "dfetch.commands.import_.Import",
+    "init": "dfetch.commands.init.Init",
+    "remove": "dfetch.commands.remove.Remove",
+    "report": "dfetch.commands.report.Report",
+    "update": "dfetch.commands.update.Update",
+    "update-patch": "dfetch.commands.update_patch.UpdatePatch",
+    "validate": "dfetch.commands.validate.Validate",
+}
 
 
 class DfetchFatalException(Exception):
     """Exception thrown when dfetch did not run successfully."""
 
 
-def create_parser() -> argparse.ArgumentParser:
-    """Create the main argument parser."""
+def create_parser(commands: Iterable[str] | None = None) -> argparse.ArgumentParser:
+    """Create the main argument parser.
+
+    Args:
+        commands: Names of the commands to add, all commands by default.
+    """
     parser = argparse.ArgumentParser(
         formatter_class=argparse.RawTextHelpFormatter, epilog=__doc__
     )
+    _add_global_options(parser)
+    parser.set_defaults(func=_help)
+    subparsers = parser.add_subparsers(help="commands", dest="command")
+
+    for name in COMMANDS if commands is None else commands:
+        _load_command(name).create_menu(subparsers)
+
+    return parser
+
+
+def _add_global_options(parser: argparse.ArgumentParser) -> None:
+    """Add the options that are given before the command."""
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Increase verbosity"
     )
     parser.add_argument(
         "--no-color", action="store_true", help="Disable colored output"
     )
-    parser.set_defaults(func=_help)
-    subparsers = parser.add_subparsers(help="commands")
-
-    dfetch.commands.add.Add.create_menu(subparsers)
-    dfetch.commands.check.Check.create_menu(subparsers)
-    dfetch.commands.diff.Diff.create_menu(subparsers)
-    dfetch.commands.environment.Environment.create_menu(subparsers)
-    dfetch.commands.format_patch.FormatPatch.create_menu(subparsers)
-    dfetch.commands.freeze.Freeze.create_menu(subparsers)
-    dfetch.commands.import_.Import.create_menu(subparsers)
-    dfetch.commands.init.Init.create_menu(subparsers)
-    dfetch.commands.remove.Remove.create_menu(subparsers)
-    dfetch.commands.report.Report.create_menu(subparsers)
-    dfetch.commands.update.Update.create_menu(subparsers)
-    dfetch.commands.update_patch.UpdatePatch.create_menu(subparsers)
-    dfetch.commands.validate.Validate.create_menu(subparsers)
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help=(
+            "Ask remotes again instead of using information cached by earlier runs.\n"
+            "The cache lives in $DFETCH_CACHE_DIR, entries expire after\n"
+            "$DFETCH_CACHE_TTL seconds (default 300, 0 disables the cache)."
+        ),
+    )
+    parser.add_argument(
+        "--manifest",
+        metavar="FILE",
+        help=(
+            "Use the manifest FILE instead of looking for a dfetch.yaml in the\n"
+            "current directory, its parents and (closest first) its subdirectories.\n"
+            "$DFETCH_MANIFEST_SEARCH_DEPTH limits how deep subdirectories are searched."
+        ),
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help=(
+            "Record where the time of the run goes and write it to FILE\n"
+            "as a Chrome trace, to open in https://ui.perfetto.dev."
+        ),
+    )
 
-    return parser
+
+def _load_command(name: str) -> type[Command]:
+    """Import the class implementing the command *name*."""
+    module_name, class_name = COMMANDS[name].rsplit(".", 1)
+    command: type[Command] = getattr(importlib.import_module(module_name), class_name)
+    return command
+
+
+def _selected_commands(argv: Sequence[str]) -> list[str] | None:
+    """Get the command chosen in *argv*, or None if all commands are needed.
+
+    All commands are needed when no (valid) command is chosen, to show them
+    in the help or in the error.
+    """
+    global_options = argparse.ArgumentParser(add_help=False)
+    _add_global_options(global_options)
+    _, remaining = global_options.parse_known_args(argv)
+    name = next((arg for arg in remaining if not arg.startswith("-")), None)
+    return [name] if name in COMMANDS else None
+
+
+@contextlib.contextmanager
+def _manifest_option(path: str | None) -> Iterator[None]:
+    """Use the manifest at *path* during the run, if given."""
+    if not path:
+        yield
+        return
+
+    # Only imported when needed, so commands without a manifest start faster
+    from dfetch.manifest.parse import (  # pylint: disable=import-outside-toplevel
+        set_manifest_path,
+    )
+
+    set_manifest_path(path)
+    try:
+        yield
+    finally:
+        set_manifest_path(None)
 
 
 def _help(_: argparse.Namespace) -> None:
@@ -70,7 +143,7 @@ def _help(_: argparse.Namespace) -> None:
 
 def run(argv: Sequence[str], console: Console | None = None) -> None:
     """Start dfetch."""
-    args = create_parser().parse_args(argv)
+    args = create_parser(_selected_commands(argv)).parse_args(argv)
 
     console = console or dfetch.log.make_console(no_color=args.no_color)
     logger: DLogger = dfetch.log.setup_root(__name__, console=console)
@@ -80,8 +153,19 @@ def run(argv: Sequence[str], console: Console | None = None) -> None:
     if args.verbose:
         dfetch.log.increase_verbosity()
 
+    # Remotes are only asked once per run, but a new run must see their changes
+    dfetch.util.cache.clear_run_caches()
+    dfetch.util.cache.set_refresh(args.refresh)
+
+    if args.trace:
+        trace.start()
+
     try:
-        args.func(args)
+        with (
+            _manifest_option(args.manifest),
+            trace.span(f"dfetch {args.command or ''}".strip(), "command"),
+        ):
+            args.func(args)
     except (RuntimeError, TypeError) as exc:
         for msg in exc.args:
             logger.error(msg, stack_info=False)
@@ -89,6 +173,10 @@ def run(argv: Sequence[str], console: Console | None = None) -> None:
     except dfetch.util.cmdline.SubprocessCommandError as exc:
         logger.error(exc.message)
         raise DfetchFatalException from exc
+    finally:
+        if args.trace:
+            trace.stop(args.trace)
+            logger.info(f"Trace written to {args.trace}")
 
 
 def main() -> None:
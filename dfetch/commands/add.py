@@ -270,6 +270,8 @@ def _finalize_add(
             projects=[project_entry.name],
             force=False,
             no_recommendations=False,
+            shallow_submodules=False,
+            jobs=1,
         )
         Update()(update_args)
 
@@ -29,6 +29,18 @@ you can prevent *Dfetch* from checking sub-manifests with ``--no-recommendations
 
 .. scenario-include:: ../features/checked-project-has-dependencies.feature
 
+Checking in parallel
+~~~~~~~~~~~~~~~~~~~~
+
+Most of the time of a check is spent waiting for the remotes to answer.
+Use ``--jobs`` (``-j``) to check several projects at the same time.
+The output and the generated reports list the projects in manifest order,
+so they are the same as when checking the projects one after another.
+
+.. code-block:: console
+
+    $ dfetch check --jobs 8 --sarif sarif.json
+
 """
 
 import argparse
@@ -36,14 +48,19 @@ import os
 
 import dfetch.commands.command
 import dfetch.project
-from dfetch.commands.common import check_sub_manifests
+from dfetch.commands.common import (
+    SubManifestIndex,
+    add_jobs_argument,
+    run_for_projects,
+)
 from dfetch.log import get_logger
 from dfetch.manifest.manifest import Manifest
+from dfetch.manifest.project import ProjectEntry
 from dfetch.project import create_super_project
 from dfetch.reporting.check.code_climate_reporter import CodeClimateReporter
+from dfetch.reporting.check.deferred_reporter import DeferredCheckReporter
 from dfetch.reporting.check.jenkins_reporter import JenkinsReporter
 from dfetch.reporting.check.reporter import CheckReporter
-from dfetch.reporting.check.sarif_reporter import SarifReporter
 from dfetch.reporting.check.stdout_reporter import CheckStdoutReporter
 from dfetch.util.github_version_check import newer_version_available
 from dfetch.util.util import in_directory
@@ -96,6 +113,7 @@ class Check(dfetch.commands.command.Command):
             type=str,
             help="Write a Code Climate JSON report to <outfile> (GitLab pipelines).",
         )
+        add_jobs_argument(parser)
 
     def __call__(self, args: argparse.Namespace) -> None:
         """Perform the check."""
@@ -105,36 +123,50 @@ class Check(dfetch.commands.command.Command):
             if newer:
                 logger.print_newer_version_notice(newer)
         superproject = create_super_project()
-        reporters = self._get_reporters(args, superproject.manifest)
+        stdout_reporter = CheckStdoutReporter(superproject.manifest)
+        file_reporters = self._get_file_reporters(args, superproject.manifest)
+        deferred: dict[str, list[DeferredCheckReporter]] = {}
+        submanifests = SubManifestIndex(superproject.manifest)
+
+        def _check(project: ProjectEntry) -> None:
+            deferred[project.name] = [DeferredCheckReporter(r) for r in file_reporters]
+            dfetch.project.create_sub_project(project).check_for_update(
+                [stdout_reporter, *deferred[project.name]],
+                files_to_ignore=superproject.ignored_files(project.destination),
+            )
+            if not args.no_recommendations:
+                submanifests.recommend(project)
+
+        def _report(project: ProjectEntry) -> None:
+            for reporter in deferred.pop(project.name, []):
+                reporter.report()
 
         with in_directory(superproject.root_directory):
-            had_errors: bool = False
-            for project in superproject.manifest.selected_projects(args.projects):
-                try:
-                    dfetch.project.create_sub_project(project).check_for_update(
-                        reporters,
-                        files_to_ignore=superproject.ignored_files(project.destination),
-                    )
-                    if not args.no_recommendations and os.path.isdir(
-                        project.destination
-                    ):
-                        with in_directory(project.destination):
-                            check_sub_manifests(superproject.manifest, project)
-                except RuntimeError as exc:
-                    logger.print_error_line(project.name, str(exc))
-                    had_errors = True
-
-            for reporter in reporters:
+            projects = superproject.manifest.selected_projects(args.projects)
+            dfetch.project.prefetch_remotes(projects, archives=True)
+            if not args.no_recommendations:
+                submanifests.index(projects, jobs=args.jobs)
+            had_errors = run_for_projects(
+                projects,
+                _check,
+                jobs=args.jobs,
+                finish=_report,
+            )
+
+            for reporter in [stdout_reporter, *file_reporters]:
                 reporter.dump_to_file()
 
         if had_errors:
             raise RuntimeError()
 
     @staticmethod
-    def _get_reporters(
+    def _get_file_reporters(
         args: argparse.Namespace, manifest: Manifest
     ) -> list[CheckReporter]:
-        """Get all reporters.
+        """Get all reporters that write a report file.
+
+        The results of these reporters are passed on in manifest order, also
+        when the projects are checked concurrently.
 
         Args:
             args (argparse.Namespace): Arguments given to the command line
@@ -143,10 +175,15 @@ class Check(dfetch.commands.command.Command):
         Returns:
             List[CheckReporter]: List of reporters that each provide a unique report
         """
-        reporters: list[CheckReporter] = [CheckStdoutReporter(manifest)]
+        reporters: list[CheckReporter] = []
         if args.jenkins_json:
             reporters += [JenkinsReporter(manifest, args.jenkins_json)]
         if args.sarif:
+            # pylint: disable=import-outside-toplevel
+            from dfetch.reporting.check.sarif_reporter import (  # sarif_om is large
+                SarifReporter,
+            )
+
             reporters += [SarifReporter(manifest, args.sarif)]
         if args.code_climate:
             reporters += [CodeClimateReporter(manifest, args.code_climate)]
@@ -1,35 +1,220 @@
 """Module for common command operations."""
 
+import argparse
 import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging import LogRecord
 
 import yaml
 
-from dfetch.log import get_logger
+from dfetch.log import capture_log_records, emit_log_records, get_logger
 from dfetch.manifest.manifest import Manifest
-from dfetch.manifest.parse import get_submanifests
+from dfetch.manifest.parse import find_submanifests, load_submanifest
 from dfetch.manifest.project import ProjectEntry
+from dfetch.util import trace
 
 logger = get_logger(__name__)
 
 
-def check_sub_manifests(manifest: Manifest, project: ProjectEntry) -> None:
-    """Check for sub-manifests within a project.
+def _positive_int(value: str) -> int:
+    """Parse a strictly positive integer command-line argument."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a positive number")
+    return number
 
-    Args:
-        manifest (dfetch.manifest.manifest.Manifest): The parent manifest with projects.
-        project (ProjectEntry): The parent project.
+
+def add_jobs_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the ``--jobs`` option to handle multiple projects concurrently."""
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=_positive_int,
+        default=1,
+        help=(
+            "Handle up to N projects concurrently (default: 1). "
+            "Output is still shown per project, in manifest order."
+        ),
+    )
+
+
+def _run_action(project: ProjectEntry, action: Callable[[ProjectEntry], None]) -> bool:
+    """Run *action* for *project* and report a failure, returns True if it failed."""
+    try:
+        with trace.span(project.name, "project"):
+            action(project)
+    except RuntimeError as exc:
+        logger.print_error_line(project.name, str(exc))
+        return True
+    return False
+
+
+def _precheck_fails(
+    project: ProjectEntry, precheck: Callable[[ProjectEntry], None] | None
+) -> bool:
+    """Run the *precheck* for *project*, returns True if the project must be skipped."""
+    if precheck is None:
+        return False
+    try:
+        precheck(project)
+    except RuntimeError:
+        return True
+    return False
+
+
+def _run_captured(
+    project: ProjectEntry, action: Callable[[ProjectEntry], None]
+) -> tuple[bool, list[LogRecord]]:
+    """Run *action* for *project* on a worker thread, collecting its output."""
+    with capture_log_records() as records:
+        failed = _run_action(project, action)
+    return failed, records
+
+
+def run_for_projects(
+    projects: Iterable[ProjectEntry],
+    action: Callable[[ProjectEntry], None],
+    jobs: int = 1,
+    precheck: Callable[[ProjectEntry], None] | None = None,
+    finish: Callable[[ProjectEntry], None] | None = None,
+) -> bool:
+    """Run *action* for every project, handling up to *jobs* projects at once.
+
+    The optional *precheck* is always run on the calling thread in the order of
+    *projects*; when it raises a :exc:`RuntimeError` the project is skipped,
+    the precheck is expected to have reported why. A :exc:`RuntimeError` raised
+    by *action* is reported for its project.
+
+    The optional *finish* is run on the calling thread for every project that
+    wasn't skipped, in the order of *projects*, right after the output of its
+    action is shown. Use it for work that isn't safe to do concurrently, such
+    as adding results to a shared report.
+
+    With more than one job, the actions run on a pool of worker threads. The
+    log output of every project is then collected and shown in the order of
+    *projects*, so the output doesn't depend on which project finishes first.
+    Actions must therefore not change the working directory.
+
+    Returns:
+        bool: True if any project was skipped or failed.
+    """
+    if jobs <= 1:
+        had_errors = False
+        for project in projects:
+            if _precheck_fails(project, precheck):
+                had_errors = True
+                continue
+            had_errors |= _run_action(project, action)
+            if finish:
+                finish(project)
+        return had_errors
+
+    pending: list[
+        tuple[
+            ProjectEntry,
+            list[LogRecord],
+            Future[tuple[bool, list[LogRecord]]] | None,
+        ]
+    ] = []
+    pool = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="dfetch")
+    try:
+        for project in projects:
+            with capture_log_records() as records:
+                skipped = _precheck_fails(project, precheck)
+            future = None if skipped else pool.submit(_run_captured, project, action)
+            pending.append((project, records, future))
+
+        had_errors = False
+        for project, records, future in pending:
+            emit_log_records(records)
+            if future is None:
+                had_errors = True
+                continue
+            failed, project_records = future.result()
+            emit_log_records(project_records)
+            had_errors |= failed
+            if finish:
+                finish(project)
+        return had_errors
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+class SubManifestIndex:
+    """Index of the sub-manifests in the destinations of projects.
+
+    Sub-manifests of many projects are found with :meth:`index` in a single
+    walk over their destinations and parsed concurrently. :meth:`recommend` then
+    shows the projects a project depends on that are missing in the manifest,
+    indexing the project first if that wasn't done yet (for instance because
+    it was fetched after indexing).
     """
-    manifest_remote_urls = {project.remote_url for project in manifest.projects}
 
-    for submanifest in get_submanifests(skip=[manifest.path]):
+    def __init__(self, manifest: Manifest) -> None:
+        """Create an empty index for the projects of *manifest*.
+
+        Args:
+            manifest (dfetch.manifest.manifest.Manifest): The parent manifest with projects.
+        """
+        self._manifest = manifest
+        self._remote_urls = {project.remote_url for project in manifest.projects}
+        self._submanifests: dict[str, dict[str, Future[Manifest]]] = {}
+
+    def index(self, projects: Iterable[ProjectEntry], jobs: int = 1) -> None:
+        """Find the sub-manifests of all *projects* and parse up to *jobs* at once."""
+        destinations = [
+            project.destination
+            for project in projects
+            if os.path.isdir(project.destination)
+        ]
+        found = find_submanifests(destinations)
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="dfetch") as pool:
+            for destination, paths in found.items():
+                self._submanifests[destination] = {
+                    path: pool.submit(Manifest.from_file, path)
+                    for path in paths
+                    if os.path.realpath(path) != self._manifest.path
+                }
+
+    def recommend(self, project: ProjectEntry) -> None:
+        """Recommend the projects of the sub-manifests of *project* missing in the manifest.
+
+        Args:
+            project (ProjectEntry): The parent project.
+
+        Raises:
+            RuntimeError: A sub-manifest is invalid.
+        """
+        if not os.path.isdir(project.destination):
+            return
+        destination = os.path.realpath(project.destination)
+        if destination not in self._submanifests:
+            self.index([project])
+
+        for path, parsed in self._submanifests[destination].items():
+
+            def _parsed(_: str, parsed: Future[Manifest] = parsed) -> Manifest:
+                return parsed.result()
+
+            submanifest = load_submanifest(path, destination, load=_parsed)
+            if submanifest:
+                self._recommend_from(project, submanifest)
+
+    def _recommend_from(self, project: ProjectEntry, submanifest: Manifest) -> None:
+        """Recommend the projects of *submanifest* missing in the manifest."""
         recommendations: list[ProjectEntry] = []
         for subproject in submanifest.projects:
-            if subproject.remote_url not in manifest_remote_urls:
+            if subproject.remote_url not in self._remote_urls:
                 recommendations.append(subproject.as_recommendation())
 
         if recommendations:
             submanifest_relpath = os.path.relpath(
-                submanifest.path, start=os.path.dirname(manifest.path)
+                submanifest.path, start=os.path.dirname(self._manifest.path)
             ).replace("\\", "/")
             _make_recommendation(project, recommendations, submanifest_relpath)
 
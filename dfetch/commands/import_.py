@@ -11,9 +11,11 @@ For full step-by-step migration instructions see :ref:`migration`.
 """
 
 import argparse
+import bisect
+import math
 import os
 import re
-from collections.abc import Sequence
+from collections.abc import Iterable, Iterator, Sequence
 from itertools import combinations
 
 import dfetch.commands.command
@@ -105,6 +107,10 @@ def _generate_remote_name(remote_url: str) -> str:
 def _determine_best_remotes(projects_urls: set[str]) -> tuple[str, ...]:
     """Determine the smallest amount of remotes, that cover the most urls.
 
+    When there are few potential remotes, every combination is scored with
+    :func:`_calculate_solution_score`. Otherwise the solution is improved step
+    by step (see :func:`_improve_remotes`), which scales to thousands of urls.
+
     Args:
         projects_urls (Set[str]): A list of urls of projects.
 
@@ -113,20 +119,17 @@ def _determine_best_remotes(projects_urls: set[str]) -> tuple[str, ...]:
     """
     max_remote_length = 50
     max_remotes = 5
+    max_combinations = 10000
 
-    # Determine all possible remotes
-    potential_remotes: set[str] = set()
-    for url in projects_urls:
-        potential_remotes.add(url[:max_remote_length].rsplit("/", maxsplit=1)[0])
-        potential_remotes.add(url[:max_remote_length].rsplit("/", maxsplit=2)[0])
-        potential_remotes.add(url[:max_remote_length].rsplit(":", maxsplit=1)[0])
+    potential_remotes = _potential_remotes(projects_urls, max_remote_length)
+    sizes = range(min(len(potential_remotes), max_remotes) + 1)
 
-    useless_potential = {"http", "https"}
-    potential_remotes = potential_remotes - useless_potential
+    if sum(math.comb(len(potential_remotes), i) for i in sizes) > max_combinations:
+        return _improve_remotes(projects_urls, potential_remotes, max_remotes)
 
     # For each permutation of any length, calculate the solution score
     solutions: list[tuple[int, tuple[str, ...]]] = []
-    for i in range(min(len(potential_remotes), max_remotes) + 1):
+    for i in sizes:
         for solution in combinations(potential_remotes, i):
             score = _calculate_solution_score(solution, projects_urls)
             solutions += [(score, solution)]
@@ -135,6 +138,91 @@ def _determine_best_remotes(projects_urls: set[str]) -> tuple[str, ...]:
     return min(solutions)[1]
 
 
+def _potential_remotes(urls: Iterable[str], max_remote_length: int) -> set[str]:
+    """Get all possible remotes of the urls, cut at a path or port separator."""
+    potential_remotes: set[str] = set()
+    for url in urls:
+        potential_remotes.add(url[:max_remote_length].rsplit("/", maxsplit=1)[0])
+        potential_remotes.add(url[:max_remote_length].rsplit("/", maxsplit=2)[0])
+        potential_remotes.add(url[:max_remote_length].rsplit(":", maxsplit=1)[0])
+
+    useless_potential = {"http", "https"}
+    return potential_remotes - useless_potential
+
+
+def _improve_remotes(
+    projects_urls: set[str], potential_remotes: set[str], max_remotes: int
+) -> tuple[str, ...]:
+    """Find a good set of remotes by improving the solution until it can't be improved.
+
+    Starting without remotes, the solution is replaced by the best of its
+    neighbours: the solution with a remote dropped, with the most useful remote
+    added, or with a remote swapped for the most useful other one. The score
+    decreases with every step, so this ends.
+
+    Args:
+        projects_urls (Set[str]): A set of projects urls
+        potential_remotes (Set[str]): All remotes to choose from
+        max_remotes (int): Maximum number of remotes in the solution
+
+    Returns:
+        Tuple[str, ...]: A set of remote urls.
+    """
+    # The urls starting with a remote are a range of the sorted urls
+    urls = sorted(projects_urls)
+    coverage = {
+        remote: _urls_starting_with(urls, remote)
+        for remote in sorted(potential_remotes)
+    }
+
+    def neighbours(solution: tuple[str, ...]) -> Iterator[tuple[str, ...]]:
+        smaller = [solution[:i] + solution[i + 1 :] for i in range(len(solution))]
+        yield from smaller
+        for option in ([solution] if len(solution) < max_remotes else []) + smaller:
+            addition = _most_useful_remote(urls, coverage, option)
+            if addition:
+                yield option + (addition,)
+
+    def score(solution: tuple[str, ...]) -> int:
+        return _calculate_solution_score(solution, projects_urls)
+
+    solution: tuple[str, ...] = ()
+    while True:
+        best = min(neighbours(solution), key=score, default=solution)
+        if score(best) >= score(solution):
+            return solution
+        solution = best
+
+
+def _urls_starting_with(sorted_urls: Sequence[str], remote: str) -> tuple[int, int]:
+    """Get the range of *sorted_urls* that start with *remote*."""
+    first = last = bisect.bisect_left(sorted_urls, remote)
+    while last < len(sorted_urls) and sorted_urls[last].startswith(remote):
+        last += 1
+    return first, last
+
+
+def _most_useful_remote(
+    urls: Sequence[str], coverage: dict[str, tuple[int, int]], solution: tuple[str, ...]
+) -> str | None:
+    """Get the remote that shortens the *urls* the most when added to *solution*."""
+    # Length of each url that remains after the longest remote of the solution
+    remaining = [len(url) for url in urls]
+    for remote in solution:
+        for index in range(*coverage[remote]):
+            remaining[index] = min(remaining[index], len(urls[index]) - len(remote))
+
+    best, best_saving = None, 0
+    for remote, (first, last) in coverage.items():
+        saving = sum(
+            max(0, remaining[index] - len(urls[index]) + len(remote))
+            for index in range(first, last)
+        )
+        if saving > best_saving:
+            best, best_saving = remote, saving
+    return best
+
+
 def _calculate_solution_score(
     solution: tuple[str, ...], projects_urls: set[str]
 ) -> int:
@@ -51,7 +51,7 @@ from dfetch.log import get_logger
 from dfetch.manifest.project import ProjectEntry
 from dfetch.project import create_super_project
 from dfetch.project.metadata import InvalidMetadataError, Metadata
-from dfetch.reporting import REPORTERS, ReportTypes
+from dfetch.reporting import ReportTypes, reporter_for
 from dfetch.util.license import (
     LicenseScanResult,
     guess_license_in_file,
@@ -106,7 +106,7 @@ class Report(dfetch.commands.command.Command):
         superproject = create_super_project()
 
         with dfetch.util.util.in_directory(superproject.root_directory):
-            reporter = REPORTERS[args.type](superproject.manifest)
+            reporter = reporter_for(args.type)(superproject.manifest)
 
             for project in superproject.manifest.selected_projects(args.projects):
                 license_scan = self._determine_licenses(project)
@@ -24,7 +24,11 @@ from pathlib import Path
 import dfetch.commands.command
 import dfetch.manifest.project
 import dfetch.project
-from dfetch.commands.common import check_sub_manifests
+from dfetch.commands.common import (
+    SubManifestIndex,
+    add_jobs_argument,
+    run_for_projects,
+)
 from dfetch.log import get_logger
 from dfetch.project import create_super_project
 from dfetch.util.util import (
@@ -65,6 +69,15 @@ class Update(dfetch.commands.command.Command):
                 "are also checked for outdated entries."
             ),
         )
+        parser.add_argument(
+            "--shallow-submodules",
+            action="store_true",
+            help=(
+                "Only fetch the used commit of the submodules of git projects, "
+                "like 'shallow-submodules: true' in the manifest for all projects."
+            ),
+        )
+        add_jobs_argument(parser)
         parser.add_argument(
             "projects",
             metavar="<project>",
@@ -77,39 +90,37 @@ class Update(dfetch.commands.command.Command):
         """Perform the update."""
         superproject = create_super_project()
 
-        had_errors: bool = False
         destinations: list[str] = [
             os.path.realpath(project.destination)
             for project in superproject.manifest.projects
         ]
+        submanifests = SubManifestIndex(superproject.manifest)
+
+        def _update(project: dfetch.manifest.project.ProjectEntry) -> None:
+            destination = project.destination
+
+            def _ignored(dst: str = destination) -> list[str]:
+                return list(superproject.ignored_files(dst))
+
+            dfetch.project.create_sub_project(project).update(
+                force=args.force,
+                ignored_files_callback=_ignored,
+                eol_preferences_callback=superproject.eol_preferences,
+                shallow_submodules=args.shallow_submodules,
+            )
+
+            if not args.no_recommendations:
+                submanifests.recommend(project)
+
         with in_directory(superproject.root_directory):
-            for project in superproject.manifest.selected_projects(args.projects):
-                try:
-                    self._check_destination(project, destinations)
-                except RuntimeError:
-                    had_errors = True
-                    continue
-
-                destination = project.destination
-
-                def _ignored(dst: str = destination) -> list[str]:
-                    return list(superproject.ignored_files(dst))
-
-                try:
-                    dfetch.project.create_sub_project(project).update(
-                        force=args.force,
-                        ignored_files_callback=_ignored,
-                        eol_preferences_callback=superproject.eol_preferences,
-                    )
-
-                    if not args.no_recommendations and os.path.isdir(
-                        project.destination
-                    ):
-                        with in_directory(project.destination):
-                            check_sub_manifests(superproject.manifest, project)
-                except RuntimeError as exc:
-                    logger.print_error_line(project.name, str(exc))
-                    had_errors = True
+            projects = superproject.manifest.selected_projects(args.projects)
+            dfetch.project.prefetch_remotes(projects, force=args.force)
+            had_errors = run_for_projects(
+                projects,
+                _update,
+                jobs=args.jobs,
+                precheck=lambda project: self._check_destination(project, destinations),
+            )
 
         if had_errors:
             raise RuntimeError()
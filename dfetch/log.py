@@ -5,8 +5,10 @@ from __future__ import annotations
 import logging
 import os
 import sys
+import threading
 import types
-from contextlib import nullcontext
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager, nullcontext
 from logging import LogRecord
 from typing import TYPE_CHECKING, Any, cast
 
@@ -50,6 +52,56 @@ class _NoExpandRichHandler(RichHandler):
         return renderable
 
 
+_capture = threading.local()
+
+
+class _CaptureFilter(logging.Filter):  # pylint: disable=too-few-public-methods
+    """Divert records of threads that capture their output into a buffer."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Keep the record for later if this thread is capturing."""
+        records: list[LogRecord] | None = getattr(_capture, "records", None)
+        if records is None:
+            return True
+        records.append(record)
+        return False
+
+
+@contextmanager
+def capture_log_records() -> Generator[list[LogRecord], None, None]:
+    """Collect all log output of the current thread instead of printing it.
+
+    Used to run work concurrently while still showing its output in a
+    deterministic order: emit the collected records later with
+    :func:`emit_log_records`. Spinners are disabled while capturing.
+    """
+    records: list[LogRecord] = []
+    previous = getattr(_capture, "records", None)
+    _capture.records = records
+    try:
+        yield records
+    finally:
+        _capture.records = previous
+
+
+def emit_log_records(records: Iterable[LogRecord]) -> None:
+    """Print log records that were collected with :func:`capture_log_records`."""
+    handlers = [
+        handler
+        for handler in logging.getLogger().handlers
+        if any(isinstance(f, _CaptureFilter) for f in handler.filters)
+    ]
+    for record in records:
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def is_capturing() -> bool:
+    """Check if the log output of the current thread is being captured."""
+    return getattr(_capture, "records", None) is not None
+
+
 def make_console(no_color: bool = False) -> Console:
     """Create a Rich Console with proper color handling."""
     return Console(
@@ -73,6 +125,7 @@ def configure_root_logger(console: Console | None = None) -> None:
         rich_tracebacks=True,
         highlighter=NullHighlighter(),
     )
+    handler.addFilter(_CaptureFilter())
 
     logging.basicConfig(
         level=logging.INFO,
@@ -212,7 +265,7 @@ class DLogger(logging.Logger):
                 break
             logger = logger.parent
 
-        if not rich_console or not enabled:
+        if not rich_console or not enabled or is_capturing():
             return nullcontext(None)
 
         if name not in DLogger._printed_projects:
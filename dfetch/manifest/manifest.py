@@ -18,6 +18,7 @@ download and a section ``projects:`` that contains a list of projects to fetch.
            dst: external/mymodule/
 """
 
+import contextlib
 import difflib
 import io
 import os
@@ -35,13 +36,19 @@ from strictyaml.ruamel.scalarstring import SingleQuotedScalarString
 from strictyaml.ruamel.tokens import CommentToken
 from typing_extensions import NotRequired, TypedDict
 
+from dfetch import __version__
 from dfetch.log import get_logger
 from dfetch.manifest.project import ProjectEntry, ProjectEntryDict
 from dfetch.manifest.remote import Remote, RemoteDict
 from dfetch.manifest.schema import MANIFEST_SCHEMA
+from dfetch.util.cache import DigestCache
 
 logger = get_logger(__name__)
 
+# The validated data of manifest files, so parsing and validating an unchanged
+# manifest file again can be skipped. Bump the suffix when the stored data changes.
+_VALIDATED_MANIFESTS = DigestCache("manifests", f"{__version__}-1")
+
 
 def _ensure_unique(seq: list[dict[str, Any]], key: str, context: str) -> None:
     """Raise RuntimeError if any value for *key* appears more than once in *seq*."""
@@ -154,11 +161,31 @@ class ManifestDict(TypedDict, total=True):  # pylint: disable=too-many-ancestors
         Sequence[
             ProjectEntryDict
             | ProjectEntry
-            | dict[str, str | list[str] | dict[str, str]]
+            | dict[str, str | bool | list[str] | dict[str, str]]
         ]
     ]
 
 
+@dataclass(frozen=True)
+class _ValidatedManifest:
+    """The text of a manifest file, with the data it was validated into before."""
+
+    text: str
+    data: dict[str, Any]
+
+
+def _validated_state(data: dict[str, Any]) -> dict[str, Any]:
+    """Get the remotes, projects and locations of project names from validated data."""
+    return {
+        "remotes": list(data["remotes"]),
+        "projects": list(data["projects"]),
+        "locations": {
+            str(name): (int(line), int(column))
+            for name, (line, column) in data["locations"].items()
+        },
+    }
+
+
 class Manifest:
     """Manifest describing all the modules information.
 
@@ -168,6 +195,11 @@ class Manifest:
     to the underlying YAML document.  The only cached fields are ``__path``,
     ``__relative_path``, ``__version`` (immutable after construction), and
     ``_default_remote_name`` (also immutable: remotes are never added at runtime).
+
+    A manifest file that was validated before is created from the validated data
+    kept in the user cache (see :meth:`from_file`). Its document is only parsed
+    from ``__text`` when it is needed, until then projects, remotes and the
+    locations of project names are read from ``__validated``.
     """
 
     CURRENT_VERSION = "0.0"
@@ -177,11 +209,31 @@ class Manifest:
 
     def __init__(
         self,
-        doc: YAML,
+        doc: YAML | _ValidatedManifest,
         path: str | os.PathLike[str] | None = None,
     ) -> None:
-        """Create the manifest."""
-        manifest_data = self._initialize_basic_attributes(doc, path)
+        """Create the manifest, from a document or from validated data.
+
+        Raises:
+            KeyError, TypeError, ValueError: When validated data is malformed.
+        """
+        self.__path: str = str(path) if path else ""
+        self.__relative_path: str = (
+            os.path.relpath(self.__path, os.getcwd()) if self.__path else ""
+        )
+        if isinstance(doc, _ValidatedManifest):
+            # The document is only parsed from the text when it is needed
+            self.__doc: YAML | None = None
+            self.__text = doc.text
+            self.__validated: dict[str, Any] | None = _validated_state(doc.data)
+            self.__version: str = str(doc.data["version"])
+            self._setup_default_remote(self.__validated["remotes"])
+            return
+
+        self.__doc = doc
+        self.__text = ""
+        self.__validated = None
+        manifest_data = self._initialize_basic_attributes(doc)
         remotes_raw = manifest_data.get("remotes", [])
         projects_raw = manifest_data.get("projects", [])
         self._validate_manifest_data(remotes_raw, projects_raw)
@@ -189,32 +241,37 @@ class Manifest:
         # Re-apply quoting to scalars whose style was stripped by strictyaml.
         self._normalize_string_scalars()
 
-    def _initialize_basic_attributes(
-        self, doc: YAML, path: str | os.PathLike[str] | None
-    ) -> dict[str, Any]:
+    def _initialize_basic_attributes(self, doc: YAML) -> dict[str, Any]:
         """Initialize basic manifest attributes and ensure version is properly quoted.
 
         Args:
             doc: The parsed YAML document.
-            path: Optional path to the manifest file.
 
         Returns:
             The manifest data dictionary.
         """
-        self._doc = doc
-        self.__path: str = str(path) if path else ""
-        self.__relative_path: str = (
-            os.path.relpath(self.__path, os.getcwd()) if self.__path else ""
-        )
-
         manifest_data: dict[str, Any] = cast(dict[str, Any], doc.data)["manifest"]
-        self.__version: str = str(manifest_data.get("version", self.CURRENT_VERSION))
+        self.__version = str(manifest_data.get("version", self.CURRENT_VERSION))
+        self._quote_version(doc)
+
+        return manifest_data
 
+    def _quote_version(self, doc: YAML) -> None:
+        """Make sure the version is written as a string."""
         doc["manifest"].as_marked_up()["version"] = SingleQuotedScalarString(
             self.__version
         )
 
-        return manifest_data
+    @property
+    def _doc(self) -> YAML:
+        """The YAML document, parsed when it's needed for the first time."""
+        if self.__doc is None:
+            doc = Manifest._load(self.__text)
+            self._quote_version(doc)
+            self.__doc = doc
+            self.__validated = None
+            self._normalize_string_scalars()
+        return self.__doc
 
     def _validate_manifest_data(
         self,
@@ -246,7 +303,7 @@ class Manifest:
         projects: Sequence[
             ProjectEntryDict
             | ProjectEntry
-            | dict[str, str | list[str] | dict[str, str]]
+            | dict[str, str | bool | list[str] | dict[str, str]]
         ],
     ) -> dict[str, ProjectEntry]:
         """Build a mapping of name → ProjectEntry from raw project data.
@@ -306,8 +363,13 @@ class Manifest:
         """Create a manifest from a file like object."""
         if not isinstance(text, str):
             text = text.read()
+        return Manifest(Manifest._load(text), path=path)
+
+    @staticmethod
+    def _load(text: str) -> YAML:
+        """Parse and validate the text of a manifest."""
         try:
-            doc = load(text, schema=MANIFEST_SCHEMA)
+            return load(text, schema=MANIFEST_SCHEMA)
         except (YAMLValidationError, StrictYAMLError) as err:
             raise RuntimeError(
                 "\n".join(
@@ -322,7 +384,6 @@ class Manifest:
             ) from err
         except ValueError as err:
             raise RuntimeError(f"Schema validation failed: {err}") from err
-        return Manifest(doc, path=path)
 
     @staticmethod
     def from_file(path: str) -> "Manifest":
@@ -332,6 +393,10 @@ class Manifest:
             path:
                 Path to a manifest file.
 
+        When the file was validated before and hasn't changed since, the
+        validated data is taken from the user cache instead of parsing and
+        validating the file again.
+
         Returns:
              A Manifest object that can be used directly.
 
@@ -339,7 +404,31 @@ class Manifest:
             FileNotFoundError: Given path was not a file.
         """
         with open(path, encoding="utf-8", newline="") as opened_file:
-            return Manifest.from_yaml(opened_file, path)
+            text = opened_file.read()
+
+        validated = _VALIDATED_MANIFESTS.get(path, text)
+        if isinstance(validated, dict):
+            with contextlib.suppress(KeyError, TypeError, ValueError):
+                return Manifest(_ValidatedManifest(text, validated), path)
+
+        manifest = Manifest.from_yaml(text, path)
+        _VALIDATED_MANIFESTS.put(
+            path, text, manifest._validated_data()  # pylint: disable=protected-access
+        )
+        return manifest
+
+    def _validated_data(self) -> dict[str, Any]:
+        """Get the validated data to create this manifest again, without parsing it."""
+        manifest_mu = self._doc["manifest"].as_marked_up()
+        projects = manifest_mu.get("projects", [])
+        return {
+            "version": self.__version,
+            "remotes": manifest_mu.get("remotes", []),
+            "projects": projects,
+            "locations": {
+                project["name"]: project.lc.value("name") for project in projects
+            },
+        }
 
     @property
     def path(self) -> str:
@@ -359,6 +448,8 @@ class Manifest:
     @property
     def projects(self) -> Sequence[ProjectEntry]:
         """Get a list of Projects from the manifest."""
+        if self.__validated is not None:
+            return list(self._build_projects(self.__validated["projects"]).values())
         manifest_mu = self._doc["manifest"].as_marked_up()
         if "projects" not in manifest_mu:
             return []
@@ -412,6 +503,9 @@ class Manifest:
     @property
     def remotes(self) -> Sequence[Remote]:
         """Get a list of Remotes from the manifest."""
+        if self.__validated is not None:
+            remotes_dict, _ = self._determine_remotes(self.__validated["remotes"])
+            return list(remotes_dict.values())
         manifest_mu = self._doc["manifest"].as_marked_up()
         remotes_dict, _ = self._determine_remotes(manifest_mu.get("remotes", []))
         return list(remotes_dict.values())
@@ -443,10 +537,14 @@ class Manifest:
             FileNotFoundError: If manifest text is not available
             RuntimeError: If the project name is not found
         """
-        p = self._find_doc_project(name)
-        if p is None:
+        if self.__validated is not None:
+            location = self.__validated["locations"].get(name)
+        else:
+            p = self._find_doc_project(name)
+            location = None if p is None else p.lc.value("name")
+        if location is None:
             raise RuntimeError(f"{name} was not found in the manifest!")
-        line_0, col_0 = p.lc.value("name")
+        line_0, col_0 = location
         return ManifestEntryLocation(
             line_number=line_0 + 1,
             start=col_0 + 1,
@@ -2,22 +2,61 @@
 
 import os
 import pathlib
+from collections.abc import Callable, Iterable
 
 from dfetch import DEFAULT_MANIFEST_NAME
 from dfetch.log import get_logger
 from dfetch.manifest.manifest import Manifest
 from dfetch.util.util import (
     check_no_path_traversal,
-    find_file,
     prefix_runtime_exceptions,
 )
 
 logger = get_logger(__name__)
 
+MANIFEST_SEARCH_DEPTH_ENV = "DFETCH_MANIFEST_SEARCH_DEPTH"
+
+# Directories never holding the manifest of a project, hidden directories
+# (such as .git, .svn and .venv) are skipped as well.
+SKIPPED_DIRECTORIES = frozenset({"node_modules", "__pycache__"})
+
+
+class _ManifestOverride:  # pylint: disable=too-few-public-methods
+    """The manifest to use instead of looking for one, if any."""
+
+    def __init__(self) -> None:
+        """Create an override without a manifest."""
+        self.path: str | None = None
+
+
+_OVERRIDE = _ManifestOverride()
+
+
+def set_manifest_path(path: str | None) -> None:
+    """Use the manifest at *path* instead of looking for one, look for one again if None."""
+    _OVERRIDE.path = path
+
 
 def find_manifest() -> str:
-    """Find a manifest."""
-    paths = find_file(DEFAULT_MANIFEST_NAME, ".")
+    """Find the manifest to use.
+
+    The manifest set with :func:`set_manifest_path` is used as is. Otherwise
+    the current directory and its parents are tried, and only when none of them
+    has a manifest, the subdirectories are searched closest first.
+
+    Raises:
+        RuntimeError: No manifest was found.
+    """
+    if _OVERRIDE.path:
+        if not os.path.isfile(_OVERRIDE.path):
+            raise RuntimeError(f"Manifest {_OVERRIDE.path} does not exist!")
+        return os.path.realpath(_OVERRIDE.path)
+
+    in_parents = _find_in_parents(DEFAULT_MANIFEST_NAME)
+    if in_parents:
+        return in_parents
+
+    paths = _find_closest_files(DEFAULT_MANIFEST_NAME, ".", _max_search_depth())
 
     if len(paths) == 0:
         raise RuntimeError("No manifests were found!")
@@ -29,32 +68,166 @@ def find_manifest() -> str:
     return os.path.realpath(paths[0])
 
 
-def get_submanifests(skip: list[str] | None = None) -> list[Manifest]:
-    """Parse & validate any manifest file in cwd and return a list of all valid manifests."""
+def _find_in_parents(name: str) -> str | None:
+    """Find the file with *name* in the current directory or the closest parent."""
+    directory = os.path.realpath(".")
+    while True:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def _max_search_depth() -> int | None:
+    """Get how many directories deep to look for a manifest, None for no limit."""
+    try:
+        return max(0, int(os.environ[MANIFEST_SEARCH_DEPTH_ENV]))
+    except (KeyError, ValueError):
+        return None
+
+
+def _find_closest_files(name: str, path: str, max_depth: int | None) -> list[str]:
+    """Find the files with *name* in the least deep subdirectories of *path* having one.
+
+    Hidden and :data:`SKIPPED_DIRECTORIES` are not searched, nor are directories
+    deeper than *max_depth*.
+    """
+    directories = [path]
+    depth = 0
+    while directories and (max_depth is None or depth <= max_depth):
+        found: list[str] = []
+        subdirectories: list[str] = []
+        for directory in directories:
+            files, children = _scan_directory(directory, name)
+            found += files
+            subdirectories += children
+        if found:
+            return found
+        directories = subdirectories
+        depth += 1
+    return []
+
+
+def _scan_directory(directory: str, name: str) -> tuple[list[str], list[str]]:
+    """Get the files with *name* in *directory* and its subdirectories worth searching."""
+    files: list[str] = []
+    subdirectories: list[str] = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                if entry.is_dir(follow_symlinks=False):
+                    if _is_searched(entry.name):
+                        subdirectories.append(entry.path)
+                elif entry.name == name and entry.is_file():
+                    files.append(entry.path)
+    except OSError:
+        pass
+    return files, subdirectories
+
+
+def _is_searched(name: str) -> bool:
+    """Check if a directory with *name* can hold the manifest of a project."""
+    return not name.startswith(".") and name not in SKIPPED_DIRECTORIES
+
+
+def find_submanifests(roots: Iterable[str | pathlib.Path]) -> dict[str, list[str]]:
+    """Find the manifest files in all *roots* in a single walk.
+
+    Hidden and :data:`SKIPPED_DIRECTORIES` are not searched, unless they are a
+    root themselves. A root inside another root is only walked once, its
+    manifests belong to the deepest root.
+
+    Returns:
+        The paths of the manifest files found in each root, by real path of the root.
+    """
+    real_roots = sorted({os.path.realpath(root) for root in roots})
+    found: dict[str, list[str]] = {root: [] for root in real_roots}
+    for root in real_roots:
+        if not any(_is_walked_by(root, other) for other in real_roots):
+            _walk_submanifests(root, real_roots, found)
+    return found
+
+
+def _walk_submanifests(
+    root: str, real_roots: list[str], found: dict[str, list[str]]
+) -> None:
+    """Add the manifest files in *root* to *found*, under the deepest root holding them."""
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(filter(_is_searched, dirnames))
+        if DEFAULT_MANIFEST_NAME in filenames:
+            owner = max(
+                (other for other in real_roots if _is_inside(directory, other)),
+                key=len,
+            )
+            found[owner].append(os.path.join(directory, DEFAULT_MANIFEST_NAME))
+
+
+def _is_walked_by(root: str, other: str) -> bool:
+    """Check if walking the root *other* reaches the root *root* below it."""
+    if root == other or not _is_inside(root, other):
+        return False
+    return all(map(_is_searched, pathlib.Path(os.path.relpath(root, other)).parts))
+
+
+def _is_inside(path: str, root: str) -> bool:
+    """Check if *path* is *root* or inside it, both must be real paths."""
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def load_submanifest(
+    path: str,
+    root: str | pathlib.Path,
+    load: Callable[[str], Manifest] | None = None,
+) -> Manifest | None:
+    """Parse & validate the sub-manifest at *path* found in *root*.
+
+    Args:
+        path: Path to the sub-manifest.
+        root: Directory the sub-manifest was found in.
+        load: Parses & validates the manifest at a path, :meth:`Manifest.from_file` by default.
+
+    Returns:
+        The manifest, or None if it is outside *root* or no longer exists.
+
+    Raises:
+        RuntimeError: The manifest is invalid, prefixed with its path.
+    """
+    root_dir = os.path.realpath(root)
+    path = os.path.realpath(path)
+
+    try:
+        check_no_path_traversal(path, root_dir)
+    except RuntimeError:
+        logger.warning(f"Sub-manifest {path} is outside {root_dir}")
+        return None
+
+    logger.debug(f"Found sub-manifest {path}")
+    with prefix_runtime_exceptions(
+        pathlib.Path(path).relative_to(os.path.dirname(root_dir)).as_posix()
+    ):
+        try:
+            return (load or Manifest.from_file)(path)
+        except FileNotFoundError:
+            logger.warning(f"Sub-manifest {path} was found but no longer exists")
+            return None
+
+
+def get_submanifests(
+    skip: list[str] | None = None, root: str | pathlib.Path = "."
+) -> list[Manifest]:
+    """Parse & validate any manifest file in *root* and return a list of all valid manifests."""
     skip = skip or []
     logger.debug("Looking for sub-manifests")
 
     submanifests: list[Manifest] = []
-    root_dir = os.getcwd()
-    for path in find_file(DEFAULT_MANIFEST_NAME, root_dir):
-        path = os.path.realpath(path)
-
-        try:
-            check_no_path_traversal(path, root_dir)
-        except RuntimeError:
-            logger.warning(f"Sub-manifest {path} is outside {root_dir}")
-            continue
-
-        if path not in skip:
-            logger.debug(f"Found sub-manifest {path}")
-            with prefix_runtime_exceptions(
-                pathlib.Path(path).relative_to(os.path.dirname(os.getcwd())).as_posix()
-            ):
-                try:
-                    submanifests += [Manifest.from_file(path)]
-                except FileNotFoundError:
-                    logger.warning(
-                        f"Sub-manifest {path} was found but no longer exists"
-                    )
+    for paths in find_submanifests([root]).values():
+        for path in paths:
+            if os.path.realpath(path) not in skip:
+                submanifest = load_submanifest(path, root)
+                if submanifest:
+                    submanifests += [submanifest]
 
     return submanifests
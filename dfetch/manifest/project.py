@@ -190,6 +190,32 @@ root of the repository.
 
       .. scenario-include:: ../features/fetch-with-ignore-svn.feature
 
+Submodules
+##########
+*Dfetch* also fetches the submodules of git projects, except the ones outside ``src:`` or
+matched by ``ignore:``, those are never downloaded. Multiple submodules are fetched
+at the same time, at most ``$DFETCH_MAX_CONCURRENCY`` (default 16).
+
+By default the full history of the submodules is fetched. With ``shallow-submodules: true``
+only the commit of each submodule (and their submodules) used by the project is fetched.
+If a server doesn't allow fetching a single commit, the full history is fetched anyway.
+Use ``dfetch update --shallow-submodules`` to do this for all projects.
+
+.. code-block:: yaml
+
+    manifest:
+        version: 0.0
+
+        remotes:
+        - name: github
+          url-base: https://github.com/
+
+        projects:
+        - name: firmware
+          repo-path: some-org/firmware
+          src: drivers
+          shallow-submodules: true
+
 VCS type
 ########
 *DFetch* does its best to find out what type of version control system (vcs) the remote url is, for
@@ -401,13 +427,14 @@ ProjectEntryDict = TypedDict(
         "vcs": str,
         "ignore": Sequence[str],
         "integrity": dict[str, str],
+        "shallow-submodules": bool,
         "default_remote": str,
     },
     total=False,
 )
 
 
-class ProjectEntry:  # pylint: disable=too-many-instance-attributes
+class ProjectEntry:  # pylint: disable=too-many-instance-attributes,too-many-public-methods
     """A single Project entry in the manifest file."""
 
     def __init__(self, kwargs: ProjectEntryDict) -> None:
@@ -430,6 +457,7 @@ class ProjectEntry:  # pylint: disable=too-many-instance-attributes
         self._ignore: Sequence[str] = kwargs.get("ignore", [])
         integrity_data: dict[str, str] = kwargs.get("integrity", {})
         self._integrity = Integrity(hash=integrity_data.get("hash", ""))
+        self._shallow_submodules = bool(kwargs.get("shallow-submodules", False))
 
         if not self._remote and not self._url:
             self._remote = kwargs.get("default_remote", "")
@@ -437,7 +465,7 @@ class ProjectEntry:  # pylint: disable=too-many-instance-attributes
     @classmethod
     def from_yaml(
         cls,
-        yamldata: dict[str, str | list[str] | dict[str, str]] | ProjectEntryDict,
+        yamldata: dict[str, str | bool | list[str] | dict[str, str]] | ProjectEntryDict,
         default_remote: str = "",
     ) -> "ProjectEntry":
         """Create a Project Entry from yaml data.
@@ -549,6 +577,11 @@ class ProjectEntry:  # pylint: disable=too-many-instance-attributes
         """Get the list of files/folders to ignore from this project (relative to src)."""
         return self._ignore
 
+    @property
+    def shallow_submodules(self) -> bool:
+        """Get whether only the recorded commit of the submodules is fetched."""
+        return self._shallow_submodules
+
     @property
     def integrity(self) -> Integrity:
         """Get the integrity verification data for this archive project."""
@@ -584,9 +617,9 @@ class ProjectEntry:  # pylint: disable=too-many-instance-attributes
         recommendation._repo_path = ""  # pylint: disable=protected-access
         return recommendation
 
-    def as_yaml(self) -> dict[str, str | list[str] | dict[str, str]]:
+    def as_yaml(self) -> dict[str, str | bool | list[str] | dict[str, str]]:
         """Get this project as yaml dictionary."""
-        yamldata: dict[str, str | list[str] | dict[str, str] | None] = {
+        yamldata: dict[str, str | bool | list[str] | dict[str, str] | None] = {
             "name": self._name,
             "revision": self._revision,
             "remote": self._remote,
@@ -600,13 +633,14 @@ class ProjectEntry:  # pylint: disable=too-many-instance-attributes
             "vcs": self._vcs,
             "integrity": self._integrity.as_yaml() or None,
             "ignore": list(self._ignore) if self._ignore else None,
+            "shallow-submodules": self._shallow_submodules,
         }
 
         return {k: v for k, v in yamldata.items() if v}
 
     @staticmethod
     def from_raw(
-        project: "ProjectEntryDict | ProjectEntry | dict[str, str | list[str] | dict[str, str]]",
+        project: "ProjectEntryDict | ProjectEntry | dict[str, str | bool | list[str] | dict[str, str]]",
         default_remote: str = "",
     ) -> "ProjectEntry":
         """Convert a raw project value to a :class:`ProjectEntry`.
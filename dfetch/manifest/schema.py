@@ -48,6 +48,7 @@ PROJECT_SCHEMA = Map(
         Optional("src"): SAFE_STR,
         Optional("ignore"): Seq(SAFE_STR),
         Optional("integrity"): INTEGRITY_MAP,
+        Optional("shallow-submodules"): Bool(),
     }
 )
 
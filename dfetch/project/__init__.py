@@ -2,6 +2,7 @@
 
 import os
 import pathlib
+from collections.abc import Sequence
 
 import dfetch.manifest.project
 from dfetch.log import get_logger
@@ -15,6 +16,8 @@ from dfetch.project.superproject import NoVcsSuperProject, SuperProject
 from dfetch.project.svnsubproject import SvnSubProject
 from dfetch.project.svnsuperproject import SvnSuperProject
 from dfetch.util.util import resolve_absolute_path
+from dfetch.vcs.archive import ArchiveRemote, is_archive_url
+from dfetch.vcs.git import GitRemote
 
 SUPPORTED_SUBPROJECT_TYPES: list[
     type[ArchiveSubProject] | type[GitSubProject] | type[SvnSubProject]
@@ -28,9 +31,9 @@ def create_sub_project(
     project_entry: dfetch.manifest.project.ProjectEntry,
 ) -> SubProject:
     """Create a new SubProject based on a project from the manifest."""
-    for project_type in SUPPORTED_SUBPROJECT_TYPES:
-        if project_type.NAME == project_entry.vcs:
-            return project_type(project_entry)
+    project_type = _known_subproject_type(project_entry)
+    if project_type:
+        return project_type(project_entry)
 
     for project_type in SUPPORTED_SUBPROJECT_TYPES:
         project = project_type(project_entry)
@@ -40,6 +43,89 @@ def create_sub_project(
     raise RuntimeError("vcs type unsupported")
 
 
+def _known_subproject_type(
+    project_entry: dfetch.manifest.project.ProjectEntry,
+) -> type[ArchiveSubProject] | type[GitSubProject] | type[SvnSubProject] | None:
+    """Get the type of subproject, if it is known without asking the remote.
+
+    This is the case when the manifest names the ``vcs:``, or the url is an
+    archive or ends with ``.git``. Otherwise :func:`create_sub_project` asks the remote if it is
+    git first, and then if it is svn.
+    """
+    for project_type in SUPPORTED_SUBPROJECT_TYPES:
+        if project_type.NAME == project_entry.vcs:
+            return project_type
+    if is_archive_url(project_entry.remote_url):
+        return ArchiveSubProject
+    if project_entry.remote_url.endswith(".git"):
+        return GitSubProject  # Not asked by GitRemote.is_git either
+    return None
+
+
+def prefetch_remotes(
+    projects: Sequence[dfetch.manifest.project.ProjectEntry],
+    archives: bool = False,
+    force: bool = False,
+) -> None:
+    """Ask the remotes of all *projects* for their versions at once.
+
+    Handling the projects one after another would wait for each remote in turn.
+    Instead the references of all git remotes, the latest revisions of all svn
+    projects in a batched ``svn info`` (and with *archives* the reachability of
+    all archives) are requested concurrently in a single event loop up front.
+    The answers are kept for this run, so the projects find them when they need
+    them. Remotes that fail are reported when handling their project.
+
+    Without *archives* (an update) and *force*, projects pinned to the tag or
+    revision they already have are left out, since they don't ask their remote.
+    """
+    git_remotes, svn_projects, archive_remotes = _remotes_to_prefetch(
+        projects, skip_wanted_pins=not (archives or force)
+    )
+    if not archives:
+        archive_remotes = []
+    if len(git_remotes) + len(svn_projects) + len(archive_remotes) < 2:
+        return
+
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    async def _prefetch() -> None:
+        await asyncio.gather(
+            GitRemote.prefetch_refs(git_remotes),
+            asyncio.to_thread(SvnSubProject.prefetch_info, svn_projects),
+            *(remote.is_accessible_async() for remote in archive_remotes),
+        )
+
+    logger.debug("Asking all remotes for their versions")
+    asyncio.run(_prefetch())
+
+
+def _remotes_to_prefetch(
+    projects: Sequence[dfetch.manifest.project.ProjectEntry], skip_wanted_pins: bool
+) -> tuple[list[str], list[dfetch.manifest.project.ProjectEntry], list[ArchiveRemote]]:
+    """Get the git remotes, svn projects and archives of *projects* to prefetch.
+
+    A project of unknown type is asked if it is git first by
+    :func:`create_sub_project`, so its git references are prefetched.
+    """
+    git_remotes: list[str] = []
+    svn_projects: list[dfetch.manifest.project.ProjectEntry] = []
+    archive_remotes: list[ArchiveRemote] = []
+    for project in projects:
+        project_type = _known_subproject_type(project)
+        if project_type is None:
+            git_remotes.append(project.remote_url)
+        elif skip_wanted_pins and project_type(project).has_wanted_pin():
+            continue
+        elif project_type is ArchiveSubProject:
+            archive_remotes.append(ArchiveRemote(project.remote_url))
+        elif project_type is SvnSubProject:
+            svn_projects.append(project)
+        else:
+            git_remotes.append(project.remote_url)
+    return git_remotes, svn_projects, archive_remotes
+
+
 def create_super_project() -> SuperProject:
     """Create a SuperProject by looking for a manifest file."""
     logger.debug("Looking for manifest")
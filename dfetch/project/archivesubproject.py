@@ -158,11 +158,16 @@ class ArchiveSubProject(SubProject):
         return Version(revision=self.remote)
 
     def _fetch_impl(
-        self, version: Version, eol_hint: str | None = None
+        self,
+        version: Version,
+        eol_hint: str | None = None,
+        *,
+        shallow_submodules: bool = False,
     ) -> tuple[Version, list[Dependency]]:
         """Download and extract the archive to the local destination.
 
-        1. Download the archive to a temporary file.
+        1. Download the archive to a temporary file, archives with a known
+           hash come from the download cache if possible.
         2. If ``integrity.hash`` is specified, verify the downloaded file.
         3. Extract to :attr:`local_path`, respecting ``src:`` and ``ignore:``.
 
@@ -181,7 +186,9 @@ class ArchiveSubProject(SubProject):
             expected = IntegrityHash.parse(revision)
             if expected:
                 actual_hex = self._remote_repo.download(
-                    tmp_path, algorithm=expected.algorithm
+                    tmp_path,
+                    algorithm=expected.algorithm,
+                    expected=expected.hex_digest,
                 )
                 if not expected.matches(actual_hex):
                     raise RuntimeError(
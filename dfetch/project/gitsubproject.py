@@ -24,6 +24,7 @@ class GitSubProject(SubProject):
         """Create a Git subproject."""
         super().__init__(project)
         self._remote_repo = GitRemote(self.remote)
+        self._shallow_submodules = project.shallow_submodules
 
     @property
     def remote_repo(self) -> GitRemote:
@@ -68,7 +69,11 @@ class GitSubProject(SubProject):
             SubProject._log_tool("git", "<not found in PATH>")
 
     def _fetch_impl(
-        self, version: Version, eol_hint: str | None = None
+        self,
+        version: Version,
+        eol_hint: str | None = None,
+        *,
+        shallow_submodules: bool = False,
     ) -> tuple[Version, list[Dependency]]:
         """Get the revision of the remote and place it at the local path."""
         rev_or_branch_or_tag = self._determine_what_to_fetch(version)
@@ -89,6 +94,7 @@ class GitSubProject(SubProject):
                 must_keeps=license_globs + [".gitmodules"],
                 ignore=self.ignore,
                 eol=eol_hint,
+                shallow_submodules=shallow_submodules or self._shallow_submodules,
             )
         )
 
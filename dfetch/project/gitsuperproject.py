@@ -81,7 +81,7 @@ class GitSuperProject(SuperProject):
         """Import projects from underlying superproject."""
         projects: list[ProjectEntry] = []
         toplevel: str = ""
-        for submodule in GitLocalRepo.submodules():
+        for submodule in GitLocalRepo().submodules():
             projects.append(
                 ProjectEntry(
                     {
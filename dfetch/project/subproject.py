@@ -10,9 +10,12 @@ from dfetch.manifest.project import ProjectEntry, plaintext_warning
 from dfetch.manifest.version import Version
 from dfetch.project.abstract_check_reporter import AbstractCheckReporter
 from dfetch.project.metadata import Dependency, InvalidMetadataError, Metadata
-from dfetch.util.util import hash_directory, safe_rm
+from dfetch.util import trace
+from dfetch.util.hashing import algorithm_of, hash_algorithm
+from dfetch.util.snapshot import DirectorySnapshot
+from dfetch.util.util import safe_rm
 from dfetch.util.versions import latest_tag_from_list
-from dfetch.vcs.patch import Patch
+from dfetch.vcs.patch import Patch, PatchStack
 
 logger = get_logger(__name__)
 
@@ -71,6 +74,24 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
             Version(revision=on_disk.revision, branch=on_disk_branch),
         )
 
+    def has_wanted_pin(self) -> bool:
+        """Check if the project is pinned to a tag or revision it already has.
+
+        Updating such a project (without force) doesn't ask its remote.
+        """
+        wanted = self.wanted_version
+        if not (wanted.tag or (wanted.revision and self.revision_is_enough())):
+            return False
+        if not os.path.exists(self.__metadata.path):
+            return False
+        try:
+            on_disk = Metadata.from_file(self.__metadata.path).version
+        except InvalidMetadataError:
+            return False  # Reported when the project is updated
+        if wanted.tag:
+            return wanted.tag == on_disk.tag
+        return wanted.revision == on_disk.revision
+
     def update_is_required(self, force: bool = False) -> Version | None:
         """Check if this project should be upgraded.
 
@@ -95,6 +116,7 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
         eol_preferences_callback: (
             Callable[[Sequence[str]], dict[str, str]] | None
         ) = None,
+        shallow_submodules: bool = False,
     ) -> None:
         """Update this subproject if required.
 
@@ -111,8 +133,11 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
                 the line ending ("lf" or "crlf") the superproject requests per path (e.g.
                 from its gitattributes). Used to resolve the destination's preference,
                 which the VCS backend applies natively while fetching.
+            shallow_submodules (bool, optional): Only fetch the recorded commit of
+                submodules, even if the project doesn't ask for it. Defaults to False.
         """
-        to_fetch = self.update_is_required(force)
+        with trace.span("resolve", "phase"):
+            to_fetch = self.update_is_required(force)
 
         if not to_fetch:
             return
@@ -121,7 +146,7 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
             list(ignored_files_callback()) if ignored_files_callback else []
         )
 
-        if not force and self._are_there_local_changes(pre_fetch_ignored):
+        if not force and self._are_there_local_changes_traced(pre_fetch_ignored):
             self._log_project(
                 "skipped - local changes after last update (use --force to overwrite)"
             )
@@ -138,26 +163,34 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
         ):
             if warning := plaintext_warning(self.__project.remote_url):
                 logger.print_warning_line(self.__project.name, warning)
-            actually_fetched, dependency = self._fetch_impl(
-                to_fetch, self._destination_eol_hint(eol_preferences_callback)
-            )
+            with trace.span("fetch", "phase", version=str(to_fetch)):
+                actually_fetched, dependency = self._fetch_impl(
+                    to_fetch,
+                    self._destination_eol_hint(eol_preferences_callback),
+                    shallow_submodules=shallow_submodules,
+                )
         self._log_project(f"Fetched {actually_fetched}")
 
-        applied_patches = self._apply_patches(patch_count)
+        with trace.span("patch", "phase"):
+            applied_patches = self._apply_patches(patch_count)
 
         post_fetch_ignored = (
             list(ignored_files_callback()) if ignored_files_callback else []
         )
 
-        self.__metadata.fetched(
-            actually_fetched,
-            hash_=hash_directory(
+        with trace.span("hash", "phase"):
+            snapshot = DirectorySnapshot.take(
                 self.local_path,
                 skiplist=[self.__metadata.FILENAME] + post_fetch_ignored,
-            ),
+                algorithm=hash_algorithm(),
+            )
+        self.__metadata.fetched(
+            actually_fetched,
+            hash_=snapshot.directory_hash,
             patch_=applied_patches,
             dependencies=list(dependency),
         )
+        snapshot.save(self.local_path)
 
         logger.debug(f"Writing repo metadata to: {self.__metadata.path}")
         self.__metadata.dump()
@@ -179,7 +212,19 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
         return result.get(probe) or result.get(exact)
 
     def _apply_patches(self, count: int = -1) -> list[str]:
-        """Apply the patches."""
+        """Apply the patches.
+
+        The patches are applied on top of each other in memory, every file
+        they change is written once when all are applied (or one fails).
+        """
+        stack = PatchStack(root=self.local_path)
+        try:
+            return self._apply_patches_on(stack, count)
+        finally:
+            stack.write()
+
+    def _apply_patches_on(self, stack: PatchStack, count: int) -> list[str]:
+        """Apply the first *count* patches on *stack*."""
         cwd = pathlib.Path(".").resolve()
         applied_patches = []
         count = len(self.__project.patch) if count == -1 else count
@@ -200,7 +245,7 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
             normalized_patch_path = str(relative_patch_path.as_posix())
 
             self._log_project(f'Applying patch "{normalized_patch_path}"')
-            result = Patch.from_file(normalized_patch_path).apply(root=self.local_path)
+            result = stack.apply(Patch.from_file(normalized_patch_path))
 
             if result.encoding_warning:
                 self._log_project(
@@ -242,7 +287,8 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
         ):
             if warning := plaintext_warning(self.__project.remote_url):
                 logger.print_warning_line(self.__project.name, warning)
-            latest_version = self._check_for_newer_version()
+            with trace.span("resolve", "phase"):
+                latest_version = self._check_for_newer_version()
 
         if not latest_version:
             self._report_unavailable_version(reporters)
@@ -252,7 +298,7 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
             self._report_unfetched_project(reporters, latest_version)
             return
 
-        if self._are_there_local_changes(files_to_ignore):
+        if self._are_there_local_changes_traced(files_to_ignore):
             self._report_local_changes(reporters)
 
         self._check_latest_with_on_disk_version(
@@ -439,6 +485,11 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
         revision = self._latest_revision_on_branch(branch)
         return Version(revision=revision, branch=branch) if revision else None
 
+    def _are_there_local_changes_traced(self, files_to_ignore: Sequence[str]) -> bool:
+        """Check if there are local changes, recorded as a phase when tracing."""
+        with trace.span("local changes", "phase"):
+            return self._are_there_local_changes(files_to_ignore)
+
     def _are_there_local_changes(self, files_to_ignore: Sequence[str]) -> bool:
         """Check if there are local changes.
 
@@ -447,15 +498,32 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
         """
         logger.debug(f"Checking if there were local changes in {self.local_path}")
         on_disk_hash = self._on_disk_hash()
+        if not on_disk_hash:
+            return False
 
-        return bool(on_disk_hash) and on_disk_hash != hash_directory(
-            self.local_path,
-            skiplist=[self.__metadata.FILENAME] + list(files_to_ignore),
-        )
+        skiplist = [self.__metadata.FILENAME] + list(files_to_ignore)
+        snapshot = DirectorySnapshot.load(self.local_path)
+        if snapshot and snapshot.directory_hash == on_disk_hash:
+            # Only files that were touched since the last snapshot are read
+            refreshed = snapshot.refresh(self.local_path, skiplist)
+        else:
+            refreshed = DirectorySnapshot.take(
+                self.local_path, skiplist, algorithm=algorithm_of(on_disk_hash)
+            )
+            if refreshed.directory_hash != on_disk_hash:
+                refreshed = None
+
+        if refreshed:
+            refreshed.save(self.local_path)
+        return refreshed is None
 
     @abstractmethod
     def _fetch_impl(
-        self, version: Version, eol_hint: str | None = None
+        self,
+        version: Version,
+        eol_hint: str | None = None,
+        *,
+        shallow_submodules: bool = False,
     ) -> tuple[Version, list[Dependency]]:
         """Fetch the given version of the subproject, should be implemented by the child class.
 
@@ -465,6 +533,9 @@ class SubProject(ABC):  # pylint: disable=too-many-public-methods
                 requests for the destination. Backends apply it natively while
                 fetching where the VCS supports it (git renormalisation,
                 ``svn export --native-eol``).
+            shallow_submodules: Only fetch the recorded commit of submodules, for
+                backends that have submodules (git), besides the projects asking
+                for it themselves.
         """
 
     @abstractmethod
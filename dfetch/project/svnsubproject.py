@@ -3,6 +3,7 @@
 import os
 import pathlib
 import urllib.parse
+from collections.abc import Sequence
 
 from dfetch.log import get_logger
 from dfetch.manifest.project import ProjectEntry
@@ -84,6 +85,18 @@ class SvnSubProject(SubProject):
         Returns:
             Tuple[str, str, str]: branch, branch_path, revision
         """
+        branch, branch_path = self._branch_and_path(version)
+
+        revision = version.revision or self._get_revision(branch_path)
+
+        if not revision.isdigit():
+            raise RuntimeError(f"{revision} must be a number for SVN")
+
+        return (branch, branch_path, revision)
+
+    @staticmethod
+    def _branch_and_path(version: Version) -> tuple[str, str]:
+        """Get the branch and the (quoted) path in the repository of the given version."""
         if version.tag:
             branch_path = f"tags/{version.tag}/"
             branch = ""
@@ -98,14 +111,25 @@ class SvnSubProject(SubProject):
                 else SvnRepo.DEFAULT_BRANCH
             )
 
-        branch_path = urllib.parse.quote(branch_path)
-
-        revision = version.revision or self._get_revision(branch_path)
+        return branch, urllib.parse.quote(branch_path)
 
-        if not revision.isdigit():
-            raise RuntimeError(f"{revision} must be a number for SVN")
+    @staticmethod
+    def prefetch_info(projects: Sequence[ProjectEntry]) -> None:
+        """Ask the latest revision of the wanted versions of all *projects* at once.
 
-        return (branch, branch_path, revision)
+        Projects pinned to a revision don't need to ask for it. For projects
+        pinned to a tag, the last change of the tags is asked as well, so an
+        unchanged list of tags comes from the cache. The answers are kept, so
+        resolving the version of each project finds them.
+        """
+        targets: list[str] = []
+        for project in projects:
+            if project.version.tag:
+                targets.append(f"{project.remote_url}/tags")
+            if not project.version.revision:
+                branch_path = SvnSubProject._branch_and_path(project.version)[1]
+                targets.append(f"{project.remote_url}/{branch_path}")
+        SvnRepo.prefetch_info(targets)
 
     def _remove_ignored_files(self) -> None:
         """Remove any ignored files, whilst keeping license files."""
@@ -114,7 +138,11 @@ class SvnSubProject(SubProject):
                 safe_rm(file_or_dir)
 
     def _fetch_impl(
-        self, version: Version, eol_hint: str | None = None
+        self,
+        version: Version,
+        eol_hint: str | None = None,
+        *,
+        shallow_submodules: bool = False,
     ) -> tuple[Version, list[Dependency]]:
         """Get the revision of the remote and place it at the local path."""
         branch, branch_path, revision = self._determine_what_to_fetch(version)
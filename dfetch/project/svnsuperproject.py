@@ -16,11 +16,7 @@ from dfetch.manifest.project import ProjectEntry
 from dfetch.project.subproject import SubProject
 from dfetch.project.superproject import RevisionRange, SuperProject
 from dfetch.project.svnsubproject import SvnSubProject
-from dfetch.util.util import (
-    check_no_path_traversal,
-    in_directory,
-    resolve_absolute_path,
-)
+from dfetch.util.util import check_no_path_traversal, resolve_absolute_path
 from dfetch.vcs.patch import Patch, PatchType
 from dfetch.vcs.svn import SvnRepo
 
@@ -119,10 +115,12 @@ class SvnSuperProject(SuperProject):
         if new:
             return patch.dump()
 
-        with in_directory(path):
-            patch.extend(
-                Patch.for_new_files(repo.untracked_files(".", ignore), PatchType.SVN)
+        root = path if os.path.isdir(path) else os.path.dirname(path) or "."
+        patch.extend(
+            Patch.for_new_files(
+                repo.untracked_files(str(path), ignore), PatchType.SVN, root=root
             )
+        )
 
         # SVN has no way of producing a reverse working copy patch, reverse ourselves
         if reverse:
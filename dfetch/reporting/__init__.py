@@ -3,8 +3,6 @@
 from enum import Enum
 
 from dfetch.reporting.reporter import Reporter
-from dfetch.reporting.sbom_reporter import SbomReporter
-from dfetch.reporting.stdout_reporter import StdoutReporter
 
 
 class ReportTypes(Enum):
@@ -18,7 +16,18 @@ class ReportTypes(Enum):
         return self.value
 
 
-REPORTERS: dict[ReportTypes, type[Reporter]] = {
-    ReportTypes.STDOUT: StdoutReporter,
-    ReportTypes.SBOM: SbomReporter,
-}
+def reporter_for(report_type: ReportTypes) -> type[Reporter]:
+    """Get the reporter creating the given type of report.
+
+    The reporter is only imported when it is needed, since the SBOM reporter
+    pulls in large libraries.
+    """
+    # pylint: disable=import-outside-toplevel
+    if report_type == ReportTypes.SBOM:
+        from dfetch.reporting.sbom_reporter import SbomReporter
+
+        return SbomReporter
+
+    from dfetch.reporting.stdout_reporter import StdoutReporter
+
+    return StdoutReporter
@@ -0,0 +1,86 @@
+"""Reporter that holds back check results until they can be reported in order.
+
+When projects are checked concurrently, the results arrive in the order the
+remotes answer. Reporters that build up a report (Jenkins, SARIF, Code Climate)
+would then list the projects in a different order on every run. A
+:class:`DeferredCheckReporter` records the results of a single project, so they
+can be passed on to the wrapped reporter once all earlier projects are reported.
+"""
+
+from collections.abc import Callable
+
+from dfetch.manifest.project import ProjectEntry
+from dfetch.manifest.version import Version
+from dfetch.project.abstract_check_reporter import AbstractCheckReporter
+
+
+class DeferredCheckReporter(AbstractCheckReporter):
+    """Record check results and pass them on to another reporter later."""
+
+    def __init__(  # pylint: disable=super-init-not-called
+        self, reporter: AbstractCheckReporter
+    ) -> None:
+        """Create the reporter.
+
+        Args:
+            reporter (AbstractCheckReporter): Reporter to pass the results on to.
+        """
+        self._reporter = reporter
+        self._results: list[Callable[[], None]] = []
+
+    def unfetched_project(
+        self, project: ProjectEntry, wanted_version: Version, latest: Version
+    ) -> None:
+        """Record an unfetched project."""
+        self._results.append(
+            lambda: self._reporter.unfetched_project(project, wanted_version, latest)
+        )
+
+    def up_to_date_project(self, project: ProjectEntry, latest: Version) -> None:
+        """Record an up-to-date project."""
+        self._results.append(lambda: self._reporter.up_to_date_project(project, latest))
+
+    def pinned_but_out_of_date_project(
+        self, project: ProjectEntry, wanted_version: Version, latest: Version
+    ) -> None:
+        """Record a pinned but out-of-date project."""
+        self._results.append(
+            lambda: self._reporter.pinned_but_out_of_date_project(
+                project, wanted_version, latest
+            )
+        )
+
+    def unavailable_project_version(
+        self, project: ProjectEntry, wanted_version: Version
+    ) -> None:
+        """Record a pinned but unavailable project version."""
+        self._results.append(
+            lambda: self._reporter.unavailable_project_version(project, wanted_version)
+        )
+
+    def out_of_date_project(
+        self,
+        project: ProjectEntry,
+        wanted_version: Version,
+        current: Version,
+        latest: Version,
+    ) -> None:
+        """Record an out-of-date project."""
+        self._results.append(
+            lambda: self._reporter.out_of_date_project(
+                project, wanted_version, current, latest
+            )
+        )
+
+    def local_changes(self, project: ProjectEntry) -> None:
+        """Record a project with local changes."""
+        self._results.append(lambda: self._reporter.local_changes(project))
+
+    def report(self) -> None:
+        """Pass all recorded results on to the wrapped reporter."""
+        results, self._results = self._results, []
+        for result in results:
+            result()
+
+    def dump_to_file(self) -> None:
+        """Do nothing, the wrapped reporter is dumped by its owner."""
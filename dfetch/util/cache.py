@@ -0,0 +1,378 @@
+r"""User-level cache for information about remotes.
+
+Querying a remote for its branches, tags or latest revision costs a network
+round-trip. The answers are kept in a cache directory of the user, so runs
+shortly after each other don't have to ask again.
+
+* The cache directory is ``$DFETCH_CACHE_DIR`` or the platform's user cache
+  directory (``$XDG_CACHE_HOME/dfetch``, ``~/.cache/dfetch`` or
+  ``%LOCALAPPDATA%\dfetch\cache``).
+* Entries expire after ``$DFETCH_CACHE_TTL`` seconds (default 300), a TTL of
+  ``0`` disables the cache.
+* With :func:`set_refresh` cached entries are ignored, but still updated.
+
+Only remotes reached over the network are cached, local remotes are cheap to
+query and may change at any time.
+
+Downloaded files with a known hash are kept in a :class:`ContentCache`, what
+is slow to derive from a local file is kept in a :class:`DigestCache` and
+what never changes once known (such as a listing at a fixed revision) in an
+:class:`ImmutableCache`.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+CACHE_DIR_ENV = "DFETCH_CACHE_DIR"
+CACHE_TTL_ENV = "DFETCH_CACHE_TTL"
+DEFAULT_TTL = 300.0
+
+_SCP_LIKE_URL = re.compile(r"^[\w.+-]+@[\w.-]+:")
+
+_refresh = threading.Event()
+
+# Functions forgetting what was remembered during a run
+_run_caches: list[Callable[[], None]] = []
+
+
+def cache_dir() -> Path:
+    """Get the user-level cache directory of *Dfetch*."""
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        return Path(configured)
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return Path(base) / "dfetch" / "cache"
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return Path(base) / "dfetch"
+
+
+def cache_ttl() -> float:
+    """Get the number of seconds cached remote information stays valid."""
+    try:
+        return max(0.0, float(os.environ.get(CACHE_TTL_ENV, DEFAULT_TTL)))
+    except ValueError:
+        return DEFAULT_TTL
+
+
+def set_refresh(refresh: bool = True) -> None:
+    """Ignore (but still update) cached remote information when *refresh* is set."""
+    if refresh:
+        _refresh.set()
+    else:
+        _refresh.clear()
+
+
+def register_run_cache(clear: Callable[[], None]) -> None:
+    """Register a cache that only holds for a single run, *clear* empties it."""
+    _run_caches.append(clear)
+
+
+def clear_run_caches() -> None:
+    """Forget everything that was remembered during an earlier run."""
+    for clear in _run_caches:
+        clear()
+
+
+def is_network_url(url: str) -> bool:
+    """Check if *url* points to a remote that is reached over the network."""
+    if _SCP_LIKE_URL.match(url):
+        return True
+    scheme = urllib.parse.urlparse(url).scheme
+    # A single letter is a windows drive (C:/...), not a scheme
+    return len(scheme) > 1 and scheme != "file"
+
+
+class RemoteCache:
+    """Cache of remote information, stored as a json file in the cache directory.
+
+    Values must be json serializable. The cache is shared by all threads and
+    processes, a broken or unwritable cache file is ignored.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Create a cache stored in ``<cache dir>/<name>.json``."""
+        self._name = name
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] | None = None
+        self._stamp: tuple[Path, int] | None = None
+
+    @property
+    def path(self) -> Path:
+        """Path of the file the cache is stored in."""
+        return cache_dir() / f"{self._name}.json"
+
+    def get(self, key: str) -> Any:
+        """Get the value stored for *key*, or None if it's unknown or expired."""
+        ttl = cache_ttl()
+        if not ttl or _refresh.is_set():
+            return None
+        with self._lock:
+            entry = self._load().get(key)
+        if not entry or time.time() - entry["time"] > ttl:
+            return None
+        return entry.get("value")
+
+    def put(self, key: str, value: Any) -> None:
+        """Store *value* for *key*."""
+        ttl = cache_ttl()
+        if not ttl:
+            return
+        with self._lock:
+            entries = self._load()
+            now = time.time()
+            entries[key] = {"time": now, "value": value}
+            for expired in [k for k, e in entries.items() if now - e["time"] > ttl]:
+                del entries[expired]
+            self._save(entries)
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        """Get the entries, reading the file again if another run changed it."""
+        stamp = self._file_stamp()
+        if self._entries is None or stamp != self._stamp:
+            try:
+                with open(self.path, encoding="utf-8") as cache_file:
+                    entries = json.load(cache_file)
+            except (OSError, ValueError):
+                entries = {}
+            self._entries = {
+                key: entry
+                for key, entry in (entries if isinstance(entries, dict) else {}).items()
+                if isinstance(entry, dict) and isinstance(entry.get("time"), float)
+            }
+            self._stamp = stamp
+        return self._entries
+
+    def _file_stamp(self) -> tuple[Path, int] | None:
+        """Identify the current version of the cache file."""
+        path = self.path
+        try:
+            return (path, path.stat().st_mtime_ns)
+        except OSError:
+            return None
+
+    def _save(self, entries: dict[str, dict[str, Any]]) -> None:
+        """Replace the cache file and remember its version."""
+        _write_json(self.path, entries)
+        self._stamp = self._file_stamp()
+
+
+class ContentCache:
+    """Content-addressed store of downloaded files in the cache directory.
+
+    Files are stored as ``<cache dir>/<name>/<algorithm>/<hex>``, so the same
+    content is only stored once, whatever url it came from. When the store grows
+    beyond ``$DFETCH_CONTENT_CACHE_SIZE`` MiB (default 1024), the least recently
+    used files are removed. A size of ``0`` disables the store.
+    """
+
+    SIZE_ENV = "DFETCH_CONTENT_CACHE_SIZE"
+    DEFAULT_SIZE_MIB = 1024
+
+    def __init__(self, name: str) -> None:
+        """Create a store in ``<cache dir>/<name>``."""
+        self._name = name
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        """Directory the files are stored in."""
+        return cache_dir() / self._name
+
+    @classmethod
+    def max_size(cls) -> int:
+        """Get the maximum size of the store in bytes."""
+        try:
+            size_mib = max(
+                0.0, float(os.environ.get(cls.SIZE_ENV, cls.DEFAULT_SIZE_MIB))
+            )
+        except ValueError:
+            size_mib = cls.DEFAULT_SIZE_MIB
+        return int(size_mib * 1024 * 1024)
+
+    def get(self, algorithm: str, hex_digest: str) -> Path | None:
+        """Get the stored file with the given hash, or None if it isn't stored."""
+        if not self.max_size():
+            return None
+        stored = self._entry(algorithm, hex_digest)
+        try:
+            os.utime(stored)  # Mark as recently used
+        except OSError:
+            return None
+        return stored
+
+    def put(self, algorithm: str, hex_digest: str, file_path: str) -> None:
+        """Store a copy of *file_path*, that has the given hash."""
+        max_size = self.max_size()
+        if not max_size or os.path.getsize(file_path) > max_size:
+            return
+        stored = self._entry(algorithm, hex_digest)
+        tmp_name = ""
+        try:
+            stored.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=stored.parent, prefix=f".{hex_digest}-", delete=False
+            ) as tmp_file:
+                tmp_name = tmp_file.name
+            shutil.copyfile(file_path, tmp_name)
+            os.replace(tmp_name, stored)
+        except OSError:
+            if tmp_name:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_name)
+            return
+        self._evict(max_size)
+
+    def remove(self, algorithm: str, hex_digest: str) -> None:
+        """Remove the stored file with the given hash, for instance when corrupt."""
+        with contextlib.suppress(OSError):
+            os.unlink(self._entry(algorithm, hex_digest))
+
+    def _entry(self, algorithm: str, hex_digest: str) -> Path:
+        if not re.fullmatch(r"[a-z0-9_]+", algorithm) or not re.fullmatch(
+            r"[0-9a-f]+", hex_digest
+        ):
+            raise ValueError(f"Invalid hash {algorithm}:{hex_digest}")
+        return self.path / algorithm / hex_digest
+
+    def _evict(self, max_size: int) -> None:
+        """Remove least recently used files until the store fits in *max_size*."""
+        with self._lock:
+            entries = []
+            for stored in self.path.glob("*/*"):
+                if stored.name.startswith("."):
+                    continue
+                with contextlib.suppress(OSError):
+                    stat = stored.stat()
+                    entries.append((stat.st_mtime, stat.st_size, stored))
+            total = sum(size for _, size, _ in entries)
+            for _, size, stored in sorted(entries):
+                if total <= max_size:
+                    break
+                with contextlib.suppress(OSError):
+                    stored.unlink()
+                    total -= size
+
+
+class DigestCache:
+    """Cache of what was derived from a file, valid as long as its content is the same.
+
+    One entry per file is stored as ``<cache dir>/<name>/<key>.json``, together
+    with the digest of the content it was derived from. Values must be json
+    serializable, a broken or unwritable entry is ignored.
+    """
+
+    def __init__(self, name: str, version: str) -> None:
+        """Create a cache in ``<cache dir>/<name>``.
+
+        Args:
+            name: Name of the directory the entries are stored in.
+            version: Version of the stored values, entries of another version are ignored.
+        """
+        self._name = name
+        self._version = version
+
+    @property
+    def path(self) -> Path:
+        """Directory the entries are stored in."""
+        return cache_dir() / self._name
+
+    def get(self, path: str, content: str) -> Any:
+        """Get the value derived from *content* of the file at *path*, or None if unknown."""
+        try:
+            with open(self._entry(path), encoding="utf-8") as entry_file:
+                entry = json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("digest") != self._digest(content):
+            return None
+        return entry.get("value")
+
+    def put(self, path: str, content: str, value: Any) -> None:
+        """Store *value* derived from *content* of the file at *path*."""
+        _write_json(
+            self._entry(path), {"digest": self._digest(content), "value": value}
+        )
+
+    def _entry(self, path: str) -> Path:
+        """Get the file the entry of the file at *path* is stored in."""
+        key = hashlib.sha256(os.path.realpath(path).encode()).hexdigest()[:32]
+        return self.path / f"{key}.json"
+
+    def _digest(self, content: str) -> str:
+        return hashlib.sha256(f"{self._version}\0{content}".encode()).hexdigest()
+
+
+class ImmutableCache:
+    """Cache of remote information that never changes, such as a listing at a fixed revision.
+
+    Every entry is stored as ``<cache dir>/<name>/<hash of key>.json`` and never
+    expires. With :func:`set_refresh` entries are ignored, but still updated.
+    Values must be json serializable, a broken or unwritable entry is ignored.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Create a cache in ``<cache dir>/<name>``."""
+        self._name = name
+
+    @property
+    def path(self) -> Path:
+        """Directory the entries are stored in."""
+        return cache_dir() / self._name
+
+    def get(self, key: str) -> Any:
+        """Get the value stored for *key*, or None if it's unknown."""
+        if _refresh.is_set():
+            return None
+        try:
+            with open(self._entry(key), encoding="utf-8") as entry_file:
+                entry = json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("key") != key:
+            return None
+        return entry.get("value")
+
+    def put(self, key: str, value: Any) -> None:
+        """Store *value* for *key*."""
+        _write_json(self._entry(key), {"key": key, "value": value})
+
+    def _entry(self, key: str) -> Path:
+        """Get the file the entry of *key* is stored in."""
+        return self.path / f"{hashlib.sha256(key.encode()).hexdigest()[:32]}.json"
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """Replace the json file at *path* at once, so readers never see half a file."""
+    tmp_name = ""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=path.parent,
+            prefix=f".{path.stem}-",
+            delete=False,
+        ) as tmp_file:
+            tmp_name = tmp_file.name
+            json.dump(data, tmp_file)
+        os.replace(tmp_name, path)
+    except OSError:
+        # Caching is best-effort, the information can always be asked again
+        if tmp_name:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_name)
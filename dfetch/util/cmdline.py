@@ -3,8 +3,23 @@
 import logging
 import os
 import subprocess  # nosec
+import weakref
 from collections.abc import Mapping
-from typing import Any
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from dfetch.util import trace
+
+if TYPE_CHECKING:
+    # Imported where needed, importing asyncio slows down starting dfetch
+    import asyncio
+
+MAX_CONCURRENCY_ENV = "DFETCH_MAX_CONCURRENCY"
+DEFAULT_MAX_CONCURRENCY = 16
+
+_LIMITS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
 
 
 class SubprocessCommandError(Exception):
@@ -41,23 +56,44 @@ def run_on_cmdline(
     cmd: list[str],
     env: Mapping[str, str] | None = None,
     input_data: bytes | None = None,
+    cwd: str | Path | None = None,
 ) -> "subprocess.CompletedProcess[Any]":
-    """Run a command and log the output, and raise if something goes wrong."""
-    logger.debug(f"Running {cmd}")
+    """Run a command and log the output, and raise if something goes wrong.
 
-    try:
-        proc = subprocess.run(  # nosec B603 — shell=False, list-form args from internal code
-            cmd, shell=False, env=env, input=input_data, capture_output=True, check=True
-        )
-    except subprocess.CalledProcessError as exc:
-        raise SubprocessCommandError(
-            exc.cmd,
-            exc.output.decode(errors="replace").strip(),
-            exc.stderr.decode(errors="replace").strip(),
-            exc.returncode,
-        ) from exc
-    except FileNotFoundError as exc:
-        raise RuntimeError(f"{cmd[0]} not available on system, please install") from exc
+    The command runs in *cwd* when given, instead of the current working
+    directory. Prefer this over changing directory, so commands can safely
+    be run from multiple threads.
+    """
+    logger.debug(f"Running {cmd}" + (f" in {cwd}" if cwd else ""))
+
+    with trace.span(
+        " ".join(cmd[:2]), "subprocess", argv=trace.redact_argv(cmd), cwd=str(cwd or "")
+    ):
+        try:
+            proc = subprocess.run(  # nosec B603 — shell=False, list-form args from internal code
+                cmd,
+                shell=False,
+                env=env,
+                input=input_data,
+                capture_output=True,
+                check=True,
+                cwd=cwd,
+            )
+        except subprocess.CalledProcessError as exc:
+            raise SubprocessCommandError(
+                exc.cmd,
+                exc.output.decode(errors="replace").strip(),
+                exc.stderr.decode(errors="replace").strip(),
+                exc.returncode,
+            ) from exc
+        except FileNotFoundError as exc:
+            if cwd and not os.path.isdir(cwd):
+                raise RuntimeError(
+                    f"Cannot run {cmd[0]}, {cwd} does not exist"
+                ) from exc
+            raise RuntimeError(
+                f"{cmd[0]} not available on system, please install"
+            ) from exc
 
     stdout, stderr = proc.stdout, proc.stderr
 
@@ -74,6 +110,123 @@ def run_on_cmdline(
     return proc
 
 
+def max_concurrency() -> int:
+    """Get the number of commands that may run at the same time in an event loop."""
+    try:
+        return max(1, int(os.environ.get(MAX_CONCURRENCY_ENV, DEFAULT_MAX_CONCURRENCY)))
+    except ValueError:
+        return DEFAULT_MAX_CONCURRENCY
+
+
+def concurrency_limit() -> "asyncio.Semaphore":
+    """Get the semaphore limiting concurrent commands in the running event loop.
+
+    All asynchronous commands and requests of a loop share it, so a large
+    manifest doesn't start hundreds of processes or connections at once.
+    """
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    loop = asyncio.get_running_loop()
+    if loop not in _LIMITS:
+        _LIMITS[loop] = asyncio.Semaphore(max_concurrency())
+    return _LIMITS[loop]
+
+
+async def run_on_cmdline_async(  # pylint: disable=too-many-arguments
+    logger: logging.Logger,
+    cmd: list[str],
+    *,
+    env: Mapping[str, str] | None = None,
+    input_data: bytes | None = None,
+    cwd: str | Path | None = None,
+    timeout: float | None = None,
+) -> "subprocess.CompletedProcess[bytes]":
+    """Run a command in the running event loop, like :func:`run_on_cmdline`.
+
+    Many commands can be awaited at once without a thread for each, at most
+    :func:`max_concurrency` of them run at the same time. The process is
+    killed when the command is cancelled or takes longer than *timeout*
+    seconds.
+
+    Raises:
+        SubprocessCommandError: When the command fails.
+        RuntimeError: When the command cannot be started or timed out.
+    """
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    async with concurrency_limit():
+        logger.debug(f"Running {cmd}" + (f" in {cwd}" if cwd else ""))
+        with trace.span(
+            " ".join(cmd[:2]),
+            "subprocess",
+            argv=trace.redact_argv(cmd),
+            cwd=str(cwd or ""),
+        ):
+            process = await _start_process(cmd, env, cwd, input_data is not None)
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(input_data), timeout
+                )
+            except asyncio.TimeoutError as exc:
+                await _kill(process)
+                raise RuntimeError(
+                    f"{' '.join(cmd)} timed out after {timeout}s"
+                ) from exc
+            except asyncio.CancelledError:
+                await _kill(process)
+                raise
+
+    proc = subprocess.CompletedProcess(cmd, process.returncode or 0, stdout, stderr)
+    _log_output(proc, logger)
+
+    if proc.returncode:
+        raise SubprocessCommandError(
+            cmd,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace").strip(),
+            proc.returncode,
+        )
+    return proc
+
+
+async def _start_process(
+    cmd: list[str],
+    env: Mapping[str, str] | None,
+    cwd: str | Path | None,
+    with_input: bool,
+) -> "asyncio.subprocess.Process":
+    """Start *cmd* in the running event loop, with pipes for its output.
+
+    Raises:
+        RuntimeError: When the command cannot be started.
+    """
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    try:
+        return await asyncio.create_subprocess_exec(
+            *cmd,
+            env=env,
+            cwd=cwd,
+            stdin=subprocess.PIPE if with_input else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError as exc:
+        if cwd and not os.path.isdir(cwd):
+            raise RuntimeError(f"Cannot run {cmd[0]}, {cwd} does not exist") from exc
+        raise RuntimeError(f"{cmd[0]} not available on system, please install") from exc
+
+
+async def _kill(process: "asyncio.subprocess.Process") -> None:
+    """Kill *process* if it is still running and wait for it to exit."""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
 def _log_output(proc: subprocess.CompletedProcess, logger: logging.Logger) -> None:  # type: ignore
     logger.debug(f"Return code: {proc.returncode}")
 
@@ -0,0 +1,157 @@
+"""Hashing of fetched directories.
+
+The hash of a fetched project is stored in its metadata as ``<algorithm>:<hex>``,
+to find local changes later. The algorithm is BLAKE2b, or the one set in
+``$DFETCH_HASH_ALGORITHM`` (``blake2b`` or ``sha256``):
+
+* Every file is hashed on its own, spread over multiple threads (``hashlib``
+  releases the GIL while hashing). Large files are memory mapped instead of
+  read in chunks.
+* The files are combined in sorted order of their relative path, so the hash
+  doesn't depend on the order the filesystem lists them in.
+
+Metadata of earlier versions of *Dfetch* holds a bare hex MD5 hash, created by
+:func:`dfetch.util.util.hash_directory`. Hashes are always verified the way they
+were created, whatever ``$DFETCH_HASH_ALGORITHM`` is set to. Setting it to
+``md5`` writes such legacy hashes, which earlier versions can still verify.
+"""
+
+import hashlib
+import mmap
+import os
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+from _hashlib import HASH
+
+from dfetch.util.util import hash_directory, hashed_files
+
+ALGORITHM_ENV = "DFETCH_HASH_ALGORITHM"
+SUPPORTED_ALGORITHMS = ("blake2b", "sha256")
+
+#: Algorithm of hashes without an ``<algorithm>:`` prefix
+LEGACY_ALGORITHM = "md5"
+
+#: Algorithm of newly fetched projects, unless ``$DFETCH_HASH_ALGORITHM`` is set
+DEFAULT_ALGORITHM = "blake2b"
+
+_CHUNK_SIZE = 1024 * 1024
+_MMAP_THRESHOLD = 1024 * 1024
+
+
+def hash_algorithm() -> str:
+    """Get the algorithm to hash newly fetched projects with.
+
+    Raises:
+        RuntimeError: When ``$DFETCH_HASH_ALGORITHM`` is not supported.
+    """
+    algorithm = os.environ.get(ALGORITHM_ENV, "").strip().lower() or DEFAULT_ALGORITHM
+    if algorithm not in (LEGACY_ALGORITHM, *SUPPORTED_ALGORITHMS):
+        raise RuntimeError(
+            f"Unsupported hash algorithm '{algorithm}' in {ALGORITHM_ENV},"
+            f" use one of: {', '.join((LEGACY_ALGORITHM, *SUPPORTED_ALGORITHMS))}"
+        )
+    return algorithm
+
+
+def algorithm_of(directory_hash: str) -> str:
+    """Get the algorithm a directory hash was created with."""
+    algorithm, separator, _ = directory_hash.partition(":")
+    return algorithm if separator else LEGACY_ALGORITHM
+
+
+def new_hasher(algorithm: str) -> HASH:
+    """Create a hasher for *algorithm*.
+
+    Raises:
+        RuntimeError: When the algorithm is not supported.
+    """
+    if algorithm == LEGACY_ALGORITHM:
+        return hashlib.md5(usedforsecurity=False)
+    if algorithm not in SUPPORTED_ALGORITHMS:
+        raise RuntimeError(f"Unsupported hash algorithm '{algorithm}'")
+    return hashlib.new(algorithm)
+
+
+def files_to_hash(
+    path: str, skiplist: list[str] | None, algorithm: str
+) -> list[tuple[str, str]]:
+    """Get the ``(file path, name)`` of all files to hash, in the order they are hashed."""
+    if algorithm == LEGACY_ALGORITHM:
+        return list(hashed_files(path, skiplist))
+    return sorted(
+        hashed_files(path, skiplist), key=lambda file: _relative(path, file[0])
+    )
+
+
+def hash_file_content(file_path: str, algorithm: str) -> str:
+    """Hash the content of a single file, anything that isn't a file is empty."""
+    hasher = new_hasher(algorithm)
+    if not os.path.isfile(file_path):
+        return hasher.hexdigest()
+    with open(file_path, "rb") as f_obj:
+        size = os.fstat(f_obj.fileno()).st_size
+        if size >= _MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(f_obj.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher.update(mapped)
+                return hasher.hexdigest()
+            except (OSError, ValueError):
+                hasher = new_hasher(algorithm)  # Not mappable, read it instead
+        for chunk in iter(lambda: f_obj.read(_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hash_file_contents(file_paths: Sequence[str], algorithm: str) -> list[str]:
+    """Hash the content of all given files concurrently, in the given order."""
+    if len(file_paths) < 2:
+        return [hash_file_content(file_path, algorithm) for file_path in file_paths]
+    workers = min(len(file_paths), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(lambda file: hash_file_content(file, algorithm), file_paths)
+        )
+
+
+def combine_file_hashes(
+    relative_paths: Sequence[str], file_hashes: Sequence[str], algorithm: str
+) -> str:
+    """Combine the hashes of the files in a directory into the directory hash.
+
+    Args:
+        relative_paths: Paths of the files relative to the directory, sorted.
+        file_hashes: Hex hash of the content of each file.
+        algorithm: Algorithm used to hash the files.
+    """
+    hasher = new_hasher(algorithm)
+    for relative_path, file_hash in zip(relative_paths, file_hashes):
+        hasher.update(relative_path.encode() + b"\0" + bytes.fromhex(file_hash))
+    return f"{algorithm}:{hasher.hexdigest()}"
+
+
+def hash_directory_with(
+    path: str, skiplist: list[str] | None, algorithm: str | None = None
+) -> str:
+    """Hash a directory with all its files.
+
+    Args:
+        path: Directory to hash.
+        skiplist: Names of files to leave out.
+        algorithm: Algorithm to use, by default :func:`hash_algorithm`.
+            With :data:`LEGACY_ALGORITHM` the hash of earlier versions is created.
+    """
+    algorithm = algorithm or hash_algorithm()
+    if algorithm == LEGACY_ALGORITHM:
+        return hash_directory(path, skiplist)
+    files = [file_path for file_path, _ in files_to_hash(path, skiplist, algorithm)]
+    return combine_file_hashes(
+        [_relative(path, file_path) for file_path in files],
+        hash_file_contents(files, algorithm),
+        algorithm,
+    )
+
+
+def _relative(root: str, file_path: str) -> str:
+    """Get the path of *file_path* relative to *root* with forward slashes."""
+    return os.path.relpath(file_path, root).replace(os.sep, "/")
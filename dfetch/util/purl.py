@@ -3,14 +3,15 @@
 Supports: GitHub, Bitbucket, SVN, SSH paths, and generic VCS URLs.
 """
 
+import functools
 import re
+from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 
 from packageurl import PackageURL
-from tldextract import TLDExtract
 
-# Although tldextract can fetch the latest suffix list, we don't want that here
-NO_FETCH_EXTRACT = TLDExtract(suffix_list_urls=(), extra_suffixes=("local",))
+if TYPE_CHECKING:
+    from tldextract import TLDExtract
 
 # Matches SSH-style Git URLs like:
 #   git@gitlab.com:org/repo.git
@@ -39,9 +40,20 @@ EXCLUDED_DOMAINS = ["gitlab", "gitea", "gitee", "sf", "gnu"]
 DEFAULT_NAME = "unknown"
 
 
+@functools.cache
+def _no_fetch_extract() -> "TLDExtract":
+    """Get the extractor of domains, only imported when needed since that takes long."""
+    from tldextract import (  # pylint: disable=import-outside-toplevel
+        TLDExtract,
+    )
+
+    # Although tldextract can fetch the latest suffix list, we don't want that here
+    return TLDExtract(suffix_list_urls=(), extra_suffixes=("local",))
+
+
 def _namespace_and_name_from_domain_and_path(domain: str, path: str) -> tuple[str, str]:
     """Split the full path to a name and namespace."""
-    domain = NO_FETCH_EXTRACT(domain).domain
+    domain = _no_fetch_extract()(domain).domain
     parts: list[str] = [domain] if domain not in EXCLUDED_DOMAINS else []
 
     if path:
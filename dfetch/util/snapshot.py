@@ -0,0 +1,237 @@
+"""Snapshots of the files in a directory, to find local changes quickly.
+
+Hashing a fetched project (see :mod:`dfetch.util.hashing`) reads every byte of
+it. A :class:`DirectorySnapshot` records the hash of the directory together
+with the size, modification time and inode of every hashed file and the hash of
+its content. When checking for local changes later, only files whose stat
+differs from the snapshot are read again.
+
+A snapshot reports a change exactly when hashing the directory would give a
+different hash. The directory hash is combined from the hashes of the files,
+so it is recomputed from the snapshot. Legacy MD5 hashes cover the name and
+content of each file in traversal order, so the snapshot compares that sequence.
+
+Stat information is only valid on the machine that took it, so snapshots are
+kept in the user cache directory (see :mod:`dfetch.util.cache`) and not in the
+metadata of the project. A missing or outdated snapshot just means all files
+are read again.
+"""
+
+import contextlib
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from dfetch.util.cache import cache_dir
+from dfetch.util.hashing import (
+    LEGACY_ALGORITHM,
+    algorithm_of,
+    combine_file_hashes,
+    files_to_hash,
+    hash_file_contents,
+    new_hasher,
+)
+
+# Files changed this shortly before a snapshot could be changed again without
+# a visible change in their modification time, so they are always read again.
+_RACY_WINDOW_NS = 2_000_000_000
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class FileState:
+    """Stat and content hash of a single file in a snapshot."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+    digest: str
+
+
+class DirectorySnapshot:
+    """Hash of a directory together with the state of all files hashed."""
+
+    def __init__(self, directory_hash: str, taken_ns: int, files: list[FileState]):
+        """Create a snapshot.
+
+        Args:
+            directory_hash: Hash of the directory as given by ``hash_directory``.
+            taken_ns: Time the snapshot was taken in nanoseconds since the epoch.
+            files: State of the hashed files, in traversal order.
+        """
+        self.directory_hash = directory_hash
+        self.taken_ns = taken_ns
+        self.files = files
+
+    @classmethod
+    def take(
+        cls, path: str, skiplist: list[str] | None, algorithm: str
+    ) -> "DirectorySnapshot":
+        """Hash the directory at *path* and record the state of its files.
+
+        The directory is read once, the resulting hash is identical to
+        ``hash_directory_with(path, skiplist, algorithm)``.
+        """
+        taken_ns = time.time_ns()
+        files = files_to_hash(path, skiplist, algorithm)
+        if algorithm == LEGACY_ALGORITHM:
+            return cls._take_legacy(path, files, taken_ns)
+        file_hashes = hash_file_contents([file for file, _ in files], algorithm)
+        states = [
+            _file_state(path, file_path, file_hash)
+            for (file_path, _), file_hash in zip(files, file_hashes)
+        ]
+        return cls(_combine(states, algorithm), taken_ns, states)
+
+    @classmethod
+    def _take_legacy(
+        cls, path: str, files: list[tuple[str, str]], taken_ns: int
+    ) -> "DirectorySnapshot":
+        """Create the legacy hash and the snapshot, in a single read of each file."""
+        digest = new_hasher(LEGACY_ALGORITHM)
+        states = []
+        for file_path, name in files:
+            digest.update(hashlib.md5(name.encode(), usedforsecurity=False).digest())
+            file_digest = new_hasher(LEGACY_ALGORITHM)
+            for chunk in _read_chunks(file_path):
+                digest.update(chunk)
+                file_digest.update(chunk)
+            states.append(_file_state(path, file_path, file_digest.hexdigest()))
+        return cls(digest.hexdigest(), taken_ns, states)
+
+    @property
+    def algorithm(self) -> str:
+        """Algorithm the directory and its files were hashed with."""
+        return algorithm_of(self.directory_hash)
+
+    def refresh(
+        self, path: str, skiplist: list[str] | None
+    ) -> "DirectorySnapshot | None":
+        """Compare the directory at *path* with this snapshot.
+
+        Only files with a different stat, or changed shortly before the snapshot
+        was taken, are read.
+
+        Returns:
+            None if the directory changed, otherwise an up-to-date snapshot.
+        """
+        algorithm = self.algorithm
+        known = {state.path: state for state in self.files}
+        taken_ns = time.time_ns()
+        states: list[FileState] = []
+        to_hash: dict[int, str] = {}
+        for file_path, _ in files_to_hash(path, skiplist, algorithm):
+            current = _file_state(path, file_path, "")
+            previous = known.get(current.path)
+            if previous and self._unchanged(previous, current):
+                states.append(previous)
+            else:
+                to_hash[len(states)] = file_path
+                states.append(current)
+
+        file_hashes = hash_file_contents(list(to_hash.values()), algorithm)
+        for index, file_hash in zip(to_hash, file_hashes):
+            states[index] = dataclasses.replace(states[index], digest=file_hash)
+
+        if algorithm == LEGACY_ALGORITHM:
+            changed = [_hashed(state) for state in states] != [
+                _hashed(state) for state in self.files
+            ]
+        else:
+            changed = _combine(states, algorithm) != self.directory_hash
+        return (
+            None
+            if changed
+            else DirectorySnapshot(self.directory_hash, taken_ns, states)
+        )
+
+    def _unchanged(self, previous: FileState, current: FileState) -> bool:
+        """Check if the stat of a file is the same and can be trusted."""
+        return (
+            (previous.size, previous.mtime_ns, previous.inode)
+            == (current.size, current.mtime_ns, current.inode)
+            and previous.mtime_ns >= 0
+            and previous.mtime_ns < self.taken_ns - _RACY_WINDOW_NS
+        )
+
+    @staticmethod
+    def _storage(path: str) -> Path:
+        """Get the file a snapshot of the directory at *path* is stored in."""
+        key = hashlib.sha256(os.path.realpath(path).encode()).hexdigest()[:32]
+        return cache_dir() / "snapshots" / f"{key}.json"
+
+    @classmethod
+    def load(cls, path: str) -> "DirectorySnapshot | None":
+        """Load the stored snapshot of the directory at *path*, if any."""
+        try:
+            with open(cls._storage(path), encoding="utf-8") as snapshot_file:
+                data = json.load(snapshot_file)
+            return cls(
+                str(data["hash"]),
+                int(data["taken_ns"]),
+                [FileState(*entry) for entry in data["files"]],
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path: str) -> None:
+        """Store this snapshot of the directory at *path*, replacing any earlier one."""
+        storage = self._storage(path)
+        data = {
+            "hash": self.directory_hash,
+            "taken_ns": self.taken_ns,
+            "files": [
+                [f.path, f.size, f.mtime_ns, f.inode, f.digest] for f in self.files
+            ],
+        }
+        tmp_name = ""
+        try:
+            storage.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=storage.parent, delete=False
+            ) as tmp_file:
+                tmp_name = tmp_file.name
+                json.dump(data, tmp_file)
+            os.replace(tmp_name, storage)
+        except OSError:
+            # A snapshot only saves time, without it all files are read again
+            if tmp_name:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_name)
+
+
+def _combine(states: list[FileState], algorithm: str) -> str:
+    """Combine the hashes of the files into the directory hash."""
+    return combine_file_hashes(
+        [state.path for state in states], [state.digest for state in states], algorithm
+    )
+
+
+def _hashed(state: FileState) -> tuple[str, str]:
+    """Get what the legacy directory hash covers of a file: its name and content."""
+    return os.path.basename(state.path), state.digest
+
+
+def _file_state(root: str, file_path: str, digest: str) -> FileState:
+    """Get the state of *file_path*, a file that can't be stat'ed never matches."""
+    relative = Path(os.path.relpath(file_path, root)).as_posix()
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return FileState(relative, -1, -1, -1, digest)
+    return FileState(relative, stat.st_size, stat.st_mtime_ns, stat.st_ino, digest)
+
+
+def _read_chunks(file_path: str) -> Iterator[bytes]:
+    """Read the content of *file_path* in chunks, like ``hash_file`` does."""
+    if not os.path.isfile(file_path):
+        return
+    with open(file_path, "rb") as f_obj:
+        yield from iter(lambda: f_obj.read(_CHUNK_SIZE), b"")
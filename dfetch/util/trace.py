@@ -0,0 +1,139 @@
+"""Record where the time of a run goes, as a Chrome trace.
+
+With ``dfetch --trace <file>`` every command, project, phase of a project
+(resolving the version, fetching, patching, hashing) and subprocess is
+recorded as a span. The spans are written in the Chrome trace event format,
+which can be opened in https://ui.perfetto.dev or ``chrome://tracing``. Spans
+on the same thread are nested, so the critical path of a run is directly
+visible.
+
+Without ``--trace`` a span costs a single check. Credentials in the URLs of
+recorded command lines are redacted, so a trace can be shared.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections.abc import Generator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+
+class Tracer:
+    """Collects spans from all threads."""
+
+    def __init__(self) -> None:
+        """Create a tracer, times are relative to its creation."""
+        self._start_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+        self._threads: dict[int, str] = {}
+
+    def add(
+        self,
+        name: str,
+        category: str,
+        start_ns: int,
+        end_ns: int,
+        args: dict[str, Any],
+    ) -> None:
+        """Add a span that ran on the current thread."""
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - self._start_ns) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(thread.ident or 0, thread.name)
+
+    def events(self) -> list[dict[str, Any]]:
+        """Get all trace events, including the names of the threads."""
+        with self._lock:
+            thread_names = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": ident,
+                    "args": {"name": name},
+                }
+                for ident, name in self._threads.items()
+            ]
+            return thread_names + sorted(self._events, key=lambda e: e["ts"])
+
+    def dump(self, path: str) -> None:
+        """Write the trace as json to *path*."""
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump(
+                {"traceEvents": self.events(), "displayTimeUnit": "ms"}, trace_file
+            )
+
+
+class _Recording:  # pylint: disable=too-few-public-methods
+    """The tracer spans are recorded in, while tracing."""
+
+    def __init__(self) -> None:
+        """Create a recording that isn't tracing."""
+        self.tracer: Tracer | None = None
+
+
+_RECORDING = _Recording()
+
+_URL_USERINFO = re.compile(r"(?<=://)[^/@\s]+@")
+
+
+def start() -> None:
+    """Start recording spans."""
+    _RECORDING.tracer = Tracer()
+
+
+def stop(path: str) -> None:
+    """Stop recording and write the recorded spans to *path*."""
+    tracer, _RECORDING.tracer = _RECORDING.tracer, None
+    if tracer:
+        tracer.dump(path)
+
+
+def is_tracing() -> bool:
+    """Check if spans are being recorded."""
+    return _RECORDING.tracer is not None
+
+
+def redact_argv(argv: Sequence[str]) -> list[str]:
+    """Replace the ``user:password@`` of any URL in the command line *argv*."""
+    return [_URL_USERINFO.sub("***@", arg) for arg in argv]
+
+
+@contextmanager
+def span(
+    name: str, category: str, **args: Any
+) -> Generator[dict[str, Any], None, None]:
+    """Record the time spent in the ``with`` block as a span.
+
+    Args:
+        name: Name shown for the span.
+        category: Kind of span, like ``command``, ``project``, ``phase`` or
+            ``subprocess``.
+        args: Details shown with the span, more can be added to the yielded dict.
+    """
+    tracer = _RECORDING.tracer
+    if tracer is None:
+        yield args
+        return
+    start_ns = time.perf_counter_ns()
+    try:
+        yield args
+    except BaseException as exc:
+        args["error"] = type(exc).__name__
+        raise
+    finally:
+        tracer.add(name, category, start_ns, time.perf_counter_ns(), args)
@@ -206,21 +206,26 @@ def find_file(name: str, path: str = ".") -> list[str]:
     ]
 
 
-def hash_directory(path: str, skiplist: list[str] | None) -> str:
-    """Hash a directory with all its files."""
-    digest = hashlib.md5(usedforsecurity=False)
-    skiplist = skiplist or []
+def hashed_files(path: str, skiplist: list[str] | None) -> Iterator[tuple[str, str]]:
+    """Iterate the ``(file path, name)`` of the files hashed by :func:`hash_directory`.
 
+    The files are yielded in the order they are hashed.
+    """
+    skiplist = skiplist or []
     for root, _, files in os.walk(path):
         for name in files:
             if name not in skiplist:
-                file_path = os.path.join(root, name)
+                yield os.path.join(root, name), name
+
+
+def hash_directory(path: str, skiplist: list[str] | None) -> str:
+    """Hash a directory with all its files."""
+    digest = hashlib.md5(usedforsecurity=False)
 
-                # Hash the path and add to the digest to account for empty files/directories
-                digest.update(
-                    hashlib.md5(name.encode(), usedforsecurity=False).digest()
-                )
-                digest = hash_file(file_path, digest)
+    for file_path, name in hashed_files(path, skiplist):
+        # Hash the path and add to the digest to account for empty files/directories
+        digest.update(hashlib.md5(name.encode(), usedforsecurity=False).digest())
+        digest = hash_file(file_path, digest)
 
     return digest.hexdigest()
 
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import bisect
+import functools
 import re
 from collections import defaultdict
+from collections.abc import Sequence
 
 import semver
 from semver.version import Version
@@ -51,21 +54,79 @@ def coerce(version: str) -> tuple[str, Version | None, str]:
     )
 
 
-def latest_tag_from_list(current_tag: str, available_tags: list[str]) -> str:
-    """Based on the given tag string and list of tags, get the latest available."""
-    parsed_tags = _create_available_version_dict(available_tags)
+class VersionIndex:
+    """Index of the versions in a list of tags, to answer questions about them quickly.
+
+    Every tag is parsed once. The versions are kept sorted, grouped by the
+    prefix before the version, so finding the latest version of a prefix is
+    logarithmic. Use :func:`version_index` to share the index of the same tags.
+    """
+
+    def __init__(self, tags: Sequence[str]) -> None:
+        """Create the index of *tags*."""
+        self._tags = tuple(tags)
+
+    @functools.cached_property
+    def _by_prefix(self) -> dict[str, tuple[list[Version], list[str]]]:
+        """The sorted versions and their tags for each prefix, equal versions in list order."""
+        index: dict[str, tuple[list[Version], list[str]]] = {}
+        for prefix, parsed in _create_available_version_dict(list(self._tags)).items():
+            parsed.sort(key=lambda version_and_tag: version_and_tag[0])
+            index[prefix] = ([v for v, _ in parsed], [tag for _, tag in parsed])
+        return index
+
+    @functools.cached_property
+    def _newest_first(self) -> list[str]:
+        """The tags sorted newest-semver-first, non-semver tags appended as-is."""
+
+        def _parse_semver(tag: str) -> semver.Version | None:
+            try:
+                return semver.Version.parse(tag.lstrip("vV"))
+            except ValueError:
+                return None
+
+        parsed = {t: _parse_semver(t) for t in self._tags}
+        semver_tags = sorted(
+            (t for t, v in parsed.items() if v is not None),
+            key=lambda t: parsed[t],  # type: ignore[arg-type, return-value]
+            reverse=True,
+        )
+        non_semver = [t for t, v in parsed.items() if v is None]
+        return semver_tags + non_semver
+
+    def latest(self, current_tag: str) -> str:
+        """Get the tag of the latest version with the same prefix as *current_tag*.
 
-    prefix, current_version, _ = coerce(current_tag)
+        The first tag in the list wins when several tags have the latest version.
+        If there is no newer version, *current_tag* itself is returned.
+        """
+        prefix, current_version, _ = coerce(current_tag)
+        if not current_version or prefix not in self._by_prefix:
+            return current_tag
 
-    latest_string: str = current_tag
+        versions, tags = self._by_prefix[prefix]
+        if bisect.bisect_right(versions, current_version) == len(versions):
+            return current_tag
+        return tags[bisect.bisect_left(versions, versions[-1])]
 
-    if current_version:
-        latest_tag: Version = current_version
-        for tag in parsed_tags[prefix]:
-            if tag[0] > latest_tag:
-                latest_tag, latest_string = tag
+    def newest(self, count: int | None = None) -> list[str]:
+        """Get the *count* newest tags (all by default), see :func:`sort_tags_newest_first`."""
+        return self._newest_first[:count]
 
-    return latest_string
+
+@functools.lru_cache(maxsize=16)
+def _cached_version_index(tags: tuple[str, ...]) -> VersionIndex:
+    return VersionIndex(tags)
+
+
+def version_index(tags: Sequence[str]) -> VersionIndex:
+    """Get the index of *tags*, the index of the same tags is only created once."""
+    return _cached_version_index(tuple(tags))
+
+
+def latest_tag_from_list(current_tag: str, available_tags: list[str]) -> str:
+    """Based on the given tag string and list of tags, get the latest available."""
+    return version_index(available_tags).latest(current_tag)
 
 
 def _create_available_version_dict(
@@ -106,21 +167,7 @@ def prioritise_default(branches: list[str], default: str) -> list[str]:
 
 def sort_tags_newest_first(tags: list[str]) -> list[str]:
     """Sort *tags* newest-semver-first; non-semver tags appended as-is."""
-
-    def _parse_semver(tag: str) -> semver.Version | None:
-        try:
-            return semver.Version.parse(tag.lstrip("vV"))
-        except ValueError:
-            return None
-
-    parsed = {t: _parse_semver(t) for t in tags}
-    semver_tags = sorted(
-        (t for t, v in parsed.items() if v is not None),
-        key=lambda t: parsed[t],  # type: ignore[arg-type, return-value]
-        reverse=True,
-    )
-    non_semver = [t for t, v in parsed.items() if v is None]
-    return semver_tags + non_semver
+    return version_index(tags).newest()
 
 
 def is_commit_sha(value: str) -> bool:
@@ -23,6 +23,7 @@ Example manifest entry::
 
 from __future__ import annotations
 
+import copy
 import hashlib
 import http.client
 import os
@@ -43,6 +44,8 @@ from typing import overload
 from packageurl import PackageURL
 
 from dfetch.log import get_logger
+from dfetch.util.cache import ContentCache, RemoteCache, register_run_cache
+from dfetch.util.cmdline import concurrency_limit
 from dfetch.util.util import (
     check_no_path_traversal,
     copy_directory_contents,
@@ -50,6 +53,12 @@ from dfetch.util.util import (
     prune_files_by_pattern,
 )
 from dfetch.util.versions import coerce
+from dfetch.vcs.extraction_plan import (
+    ExtractionPlan,
+    tar_member_kind,
+    zip_member_kind,
+)
+from dfetch.vcs.http import CONNECTION_POOL, http_download
 
 logger = get_logger(__name__)
 
@@ -60,6 +69,16 @@ ARCHIVE_EXTENSIONS = (".tar.gz", ".tgz", ".tar.bz2", ".tar.xz", ".zip")
 _MAX_UNCOMPRESSED_BYTES = 500 * 1024 * 1024  # 500 MB
 _MAX_MEMBER_COUNT = 10_000
 
+# Archives that were found reachable, so a check doesn't need to ask again.
+_REACHABLE_CACHE = RemoteCache("archive-reachable")
+
+# Archives that were found reachable during this run.
+_REACHABLE_IN_RUN: set[str] = set()
+register_run_cache(_REACHABLE_IN_RUN.clear)
+
+# Downloaded archives by content hash, so known content is never downloaded twice.
+_DOWNLOAD_CACHE = ContentCache("archives")
+
 
 def is_archive_url(url: str) -> bool:
     """Return *True* when *url* ends with a recognised archive extension.
@@ -114,19 +133,6 @@ def archive_url_to_purl(
     )
 
 
-def _http_conn(scheme: str, netloc: str, timeout: int) -> http.client.HTTPConnection:
-    """Return an :class:`http.client.HTTPConnection` or HTTPS variant for *netloc*."""
-    if scheme == "https":
-        return http.client.HTTPSConnection(netloc, timeout=timeout)
-    return http.client.HTTPConnection(netloc, timeout=timeout)
-
-
-def _resource_path(parsed: urllib.parse.ParseResult) -> str:
-    """Return the path + query portion of *parsed* suitable for HTTP requests."""
-    path = parsed.path or "/"
-    return f"{path}?{parsed.query}" if parsed.query else path
-
-
 class ArchiveRemote:
     """Represents a remote archive (tar/zip) URL.
 
@@ -144,7 +150,8 @@ class ArchiveRemote:
           no network round-trip needed.
         * ``http``/``https`` URLs first try a ``HEAD`` request.  If the server
           rejects it (405/501) a partial ``GET`` (``Range: bytes=0-0``) is
-          attempted instead.  Returns *False* on any final failure.
+          attempted instead.  Returns *False* on any final failure.  A
+          reachable URL is remembered in the user cache for a while.
         * Any other URL scheme returns *False*.
         """
         parsed = urllib.parse.urlparse(self.url)
@@ -155,40 +162,80 @@ class ArchiveRemote:
                 return False
         if parsed.scheme not in ("http", "https"):
             return False
-        return self._is_http_reachable(parsed)
+        if self.url in _REACHABLE_IN_RUN or _REACHABLE_CACHE.get(self.url):
+            logger.debug(f"{self.url} was reachable recently, using cached result")
+            return True
+        reachable = self._is_http_reachable(parsed)
+        if reachable:
+            _REACHABLE_IN_RUN.add(self.url)
+            _REACHABLE_CACHE.put(self.url, True)
+        return reachable
+
+    async def is_accessible_async(self, timeout: float = 30) -> bool:
+        """Check if the archive URL is reachable, like :meth:`is_accessible`.
+
+        To await in an event loop, together with other requests and commands.
+        :mod:`http.client` is blocking, so the request runs on a worker thread,
+        limited by :func:`dfetch.util.cmdline.concurrency_limit`. A request
+        taking longer than *timeout* seconds counts as unreachable.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        async with concurrency_limit():
+            try:
+                return await asyncio.wait_for(
+                    asyncio.to_thread(self.is_accessible), timeout
+                )
+            except asyncio.TimeoutError:
+                logger.debug(f"{self.url} didn't respond within {timeout}s")
+                return False
+
+    @staticmethod
+    def clear_reachable_cache() -> None:
+        """Forget which archives were found reachable during this run."""
+        _REACHABLE_IN_RUN.clear()
 
     def _is_http_reachable(self, parsed: urllib.parse.ParseResult) -> bool:
         """Try HEAD then partial-GET to confirm an HTTP/HTTPS URL is reachable."""
-        netloc, path = parsed.netloc, _resource_path(parsed)
         for method, headers in [("HEAD", {}), ("GET", {"Range": "bytes=0-0"})]:
             try:
-                conn = _http_conn(parsed.scheme, netloc, timeout=15)
-                try:
-                    conn.request(method, path, headers=headers)
-                    status = conn.getresponse().status
-                    if status not in (405, 501):
-                        return status < 400
-                finally:
-                    conn.close()
+                with CONNECTION_POOL.request(
+                    method, parsed, headers, timeout=15
+                ) as resp:
+                    status = resp.status
+                if status not in (405, 501):
+                    return status < 400
             except (OSError, ValueError, http.client.HTTPException):
                 return False
         return False
 
     @overload
-    def download(self, dest_path: str, algorithm: str) -> str: ...
+    def download(
+        self, dest_path: str, algorithm: str, expected: str | None = None
+    ) -> str: ...
     @overload
-    def download(self, dest_path: str, algorithm: None = ...) -> None: ...
+    def download(
+        self, dest_path: str, algorithm: None = ..., expected: None = ...
+    ) -> None: ...
 
-    def download(self, dest_path: str, algorithm: str | None = None) -> str | None:
+    def download(
+        self, dest_path: str, algorithm: str | None = None, expected: str | None = None
+    ) -> str | None:
         """Download the archive to *dest_path*, optionally computing its hash.
 
         When *algorithm* is given the hash is computed during the download
         stream (zero extra file reads) and the hex digest is returned.
 
+        Archives downloaded over HTTP(S) with a hash are kept in a download
+        cache, keyed by their ``<algorithm>:<hex>``. When the *expected* hex
+        digest is given and that content is in the cache, it is copied from
+        there instead of downloading it again.
+
         Args:
             dest_path: Local file path to write the archive to.
             algorithm: Hash algorithm name (e.g. ``"sha256"``).  When *None*
                 no hash is computed and *None* is returned.
+            expected: Hex digest the archive is expected to have.
 
         Returns:
             Hex digest string when *algorithm* is provided, else *None*.
@@ -196,86 +243,87 @@ class ArchiveRemote:
         Raises:
             RuntimeError: On download failure or unsupported URL scheme.
         """
-        hasher = hashlib.new(algorithm) if algorithm else None
         parsed = urllib.parse.urlparse(self.url)
-        if parsed.scheme == "file":
-            file_path = urllib.request.url2pathname(parsed.path)
-            try:
-                if hasher:
-                    with open(file_path, "rb") as src, open(dest_path, "wb") as dst:
-                        for chunk in iter(lambda: src.read(65536), b""):
-                            dst.write(chunk)
-                            hasher.update(chunk)
-                else:
-                    shutil.copy(file_path, dest_path)
-            except OSError as exc:
-                raise RuntimeError(
-                    f"'{self.url}' is not a valid URL or unreachable: {exc}"
-                ) from exc
-        elif parsed.scheme in ("http", "https"):
-            self._http_download(parsed, dest_path, hasher=hasher)
-        else:
-            raise RuntimeError(
-                f"'{self.url}' uses unsupported scheme '{parsed.scheme}'."
-            )
-        return hasher.hexdigest() if hasher else None
-
-    _MAX_REDIRECTS = 10
+        if algorithm and parsed.scheme in ("http", "https"):
+            return self._cached_download(parsed, dest_path, algorithm, expected)
+        return self._download(parsed, dest_path, algorithm)
 
-    @staticmethod
-    def _stream_response_to_file(
-        resp: http.client.HTTPResponse,
-        dest_path: str,
-        hasher: hashlib._Hash | None,
-    ) -> None:
-        """Write the response body to *dest_path*, updating *hasher* for each chunk."""
-        with open(dest_path, "wb") as fh:
-            while chunk := resp.read(65536):
-                fh.write(chunk)
-                if hasher:
-                    hasher.update(chunk)
-
-    def _http_download(
+    def _cached_download(
         self,
         parsed: urllib.parse.ParseResult,
         dest_path: str,
-        hasher: hashlib._Hash | None = None,
-    ) -> None:
-        """Download an HTTP/HTTPS resource to *dest_path*, following redirects.
+        algorithm: str,
+        expected: str | None,
+    ) -> str | None:
+        """Download through the download cache, copying from it on a hit."""
+        if expected and self._copy_from_download_cache(
+            dest_path, algorithm, expected.lower()
+        ):
+            return expected.lower()
+
+        hex_digest = self._download(parsed, dest_path, algorithm)
+        if hex_digest:
+            _DOWNLOAD_CACHE.put(algorithm, hex_digest, dest_path)
+        return hex_digest
+
+    def _download(
+        self, parsed: urllib.parse.ParseResult, dest_path: str, algorithm: str | None
+    ) -> str | None:
+        """Download *parsed* to *dest_path*, optionally computing its hash."""
+        if parsed.scheme == "file":
+            return self._file_copy(parsed, dest_path, algorithm)
+        if parsed.scheme in ("http", "https"):
+            return http_download(self.url, dest_path, algorithm)
+        raise RuntimeError(f"'{self.url}' uses unsupported scheme '{parsed.scheme}'.")
+
+    def _file_copy(
+        self, parsed: urllib.parse.ParseResult, dest_path: str, algorithm: str | None
+    ) -> str | None:
+        """Copy a ``file://`` archive to *dest_path*, optionally computing its hash."""
+        file_path = urllib.request.url2pathname(parsed.path)
+        try:
+            if not algorithm:
+                shutil.copy(file_path, dest_path)
+                return None
+            hasher = hashlib.new(algorithm)
+            with open(file_path, "rb") as src, open(dest_path, "wb") as dst:
+                for chunk in iter(lambda: src.read(65536), b""):
+                    dst.write(chunk)
+                    hasher.update(chunk)
+            return hasher.hexdigest()
+        except OSError as exc:
+            raise RuntimeError(
+                f"'{self.url}' is not a valid URL or unreachable: {exc}"
+            ) from exc
+
+    def _copy_from_download_cache(
+        self, dest_path: str, algorithm: str, expected: str
+    ) -> bool:
+        """Copy the archive with the *expected* hash from the download cache.
 
-        Up to :attr:`_MAX_REDIRECTS` 3xx redirects are followed transparently
-        (e.g. GitHub archive URLs redirect to a CDN).  When *hasher* is
-        provided each chunk is fed into it during streaming, so the caller gets
-        the hash without an extra file read.
+        The hash is checked again while copying, a corrupted entry is removed.
+        Returns True when *dest_path* now holds the archive.
         """
-        for _ in range(self._MAX_REDIRECTS + 1):
-            conn = _http_conn(parsed.scheme, parsed.netloc, timeout=60)
-            try:
-                conn.request("GET", _resource_path(parsed))
-                resp = conn.getresponse()
-                if resp.status in (301, 302, 303, 307, 308):
-                    location = resp.getheader("Location", "")
-                    if not location:
-                        raise RuntimeError(
-                            f"Redirect with no Location header from '{parsed.geturl()}'"
-                        )
-                    parsed = urllib.parse.urlparse(
-                        urllib.parse.urljoin(parsed.geturl(), location)
-                    )
-                    continue
-                if resp.status != 200:
-                    raise RuntimeError(
-                        f"HTTP {resp.status} when downloading '{self.url}'"
-                    )
-                self._stream_response_to_file(resp, dest_path, hasher)
-                return
-            except (OSError, http.client.HTTPException) as exc:
-                raise RuntimeError(
-                    f"'{self.url}' is not a valid URL or unreachable: {exc}"
-                ) from exc
-            finally:
-                conn.close()
-        raise RuntimeError(f"Too many redirects when downloading '{self.url}'")
+        try:
+            cached = _DOWNLOAD_CACHE.get(algorithm, expected)
+        except ValueError:
+            return False
+        if not cached:
+            return False
+        hasher = hashlib.new(algorithm)
+        try:
+            with open(cached, "rb") as src, open(dest_path, "wb") as dst:
+                for chunk in iter(lambda: src.read(65536), b""):
+                    dst.write(chunk)
+                    hasher.update(chunk)
+        except OSError:
+            return False
+        if hasher.hexdigest() != expected:
+            logger.debug(f"Removing corrupted {algorithm}:{expected} from cache")
+            _DOWNLOAD_CACHE.remove(algorithm, expected)
+            return False
+        logger.debug(f"Using cached download of {self.url} ({algorithm}:{expected})")
+        return True
 
 
 class ArchiveLocalRepo:
@@ -306,6 +354,33 @@ class ArchiveLocalRepo:
             ignore: Sequence of glob patterns for files/directories to exclude.
             is_license: Whether to check for and retain license files when
                         *src* is specified.
+
+        Only the selected members are extracted, each directly to its place in
+        *dest_dir*. Archives where the selection depends on links inside the
+        archive are extracted completely to a temporary directory first.
+        """
+        pathlib.Path(dest_dir).mkdir(parents=True, exist_ok=True)
+
+        if not ArchiveLocalRepo._extract_selected(
+            archive_path, dest_dir, src, ignore, is_license
+        ):
+            ArchiveLocalRepo._extract_via_temp_dir(
+                archive_path, dest_dir, src, is_license
+            )
+
+        ArchiveLocalRepo._check_symlinks_in_dest(dest_dir)
+
+        if ignore:
+            prune_files_by_pattern(dest_dir, ignore)
+
+    @staticmethod
+    def _extract_via_temp_dir(
+        archive_path: str, dest_dir: str, src: str, is_license: bool
+    ) -> None:
+        """Extract the whole archive to a temporary directory and copy the selection.
+
+        Used for archives an :class:`~dfetch.vcs.extraction_plan.ExtractionPlan`
+        can't handle.
         """
         with tempfile.TemporaryDirectory() as tmp_dir:
             ArchiveLocalRepo._extract_raw(archive_path, tmp_dir)
@@ -319,17 +394,91 @@ class ArchiveLocalRepo:
             else:
                 extract_root = tmp_dir
 
-            pathlib.Path(dest_dir).mkdir(parents=True, exist_ok=True)
-
             if src:
                 copy_src_subset(extract_root, dest_dir, src.rstrip("/"), is_license)
             else:
                 copy_directory_contents(extract_root, dest_dir)
 
-            ArchiveLocalRepo._check_symlinks_in_dest(dest_dir)
+    @staticmethod
+    def _extract_selected(
+        archive_path: str,
+        dest_dir: str,
+        src: str,
+        ignore: Sequence[str],
+        is_license: bool,
+    ) -> bool:
+        """Extract only the selected members, directly to their place in *dest_dir*.
+
+        The members are validated like :meth:`_extract_raw` does, and each
+        selected member is written once, under its final name.
+
+        Returns:
+            False when the archive needs :meth:`_extract_via_temp_dir`.
+        """
+        lower = archive_path.lower()
+        if tarfile.is_tarfile(archive_path) and not lower.endswith(".zip"):
+            if sys.version_info < (3, 11, 4):
+                return False  # Extraction filters are needed to extract members
+            return ArchiveLocalRepo._extract_selected_tar(
+                archive_path, dest_dir, src, ignore, is_license
+            )
+        if lower.endswith(".zip") or zipfile.is_zipfile(archive_path):
+            return ArchiveLocalRepo._extract_selected_zip(
+                archive_path, dest_dir, src, ignore, is_license
+            )
+        raise RuntimeError(
+            f"Unsupported archive format: '{archive_path}'. "
+            f"Supported formats: {', '.join(ARCHIVE_EXTENSIONS)}"
+        )
+
+    @staticmethod
+    def _extract_selected_tar(
+        archive_path: str,
+        dest_dir: str,
+        src: str,
+        ignore: Sequence[str],
+        is_license: bool,
+    ) -> bool:
+        """Extract the selected members of a tar archive, see :meth:`_extract_selected`."""
+        with tarfile.open(archive_path, "r:*") as tf:
+            ArchiveLocalRepo._check_tar_members(tf)
+            members = tf.getmembers()
+            plan = ExtractionPlan.create(
+                [(m.name, tar_member_kind(m)) for m in members],
+                src,
+                ignore,
+                is_license,
+            )
+            if plan is None:
+                return False
+            _extract_tar_members(tf, members, plan, dest_dir)
+        return True
 
-            if ignore:
-                prune_files_by_pattern(dest_dir, ignore)
+    @staticmethod
+    def _extract_selected_zip(
+        archive_path: str,
+        dest_dir: str,
+        src: str,
+        ignore: Sequence[str],
+        is_license: bool,
+    ) -> bool:
+        """Extract the selected members of a zip archive, see :meth:`_extract_selected`."""
+        with zipfile.ZipFile(archive_path) as zf:
+            infos = ArchiveLocalRepo.check_zip_members(zf)
+            plan = ExtractionPlan.create(
+                [(info.filename, zip_member_kind(info)) for info in infos],
+                src,
+                ignore,
+                is_license,
+            )
+            if plan is None:
+                return False
+            for index, info in enumerate(infos):
+                for destination in plan.destinations(index):
+                    renamed = copy.copy(info)
+                    renamed.filename = destination + ("/" if info.is_dir() else "")
+                    zf.extract(renamed, dest_dir)  # nosec B202
+        return True
 
     @staticmethod
     def _check_archive_limits(member_count: int, total_bytes: int) -> None:
@@ -590,3 +739,42 @@ class ArchiveLocalRepo:
                 f"Unsupported archive format: '{archive_path}'. "
                 f"Supported formats: {', '.join(ARCHIVE_EXTENSIONS)}"
             )
+
+
+def _extract_tar_members(
+    tf: tarfile.TarFile,
+    members: list[tarfile.TarInfo],
+    plan: ExtractionPlan,
+    dest_dir: str,
+) -> None:
+    """Extract the planned *members* of *tf* under their destination name.
+
+    Like :meth:`tarfile.TarFile.extractall`, the attributes of directories
+    are set last, so read-only directories can still be filled.
+    """
+    directories = []
+    for index, member in enumerate(members):
+        for destination in plan.destinations(index):
+            renamed = copy.copy(member)
+            renamed.name = destination
+            set_attrs = not member.isdir()  # Directories are done last
+            tf.extract(renamed, dest_dir, set_attrs, filter=_tar_filter)  # nosec B202
+            if member.isdir():
+                directories.append(_tar_filter(renamed, dest_dir))
+
+    for directory in reversed(directories):
+        dir_path = os.path.join(dest_dir, directory.name)
+        tf.utime(directory, dir_path)
+        tf.chmod(directory, dir_path)
+
+
+def _tar_filter(member: tarfile.TarInfo, dest_path: str) -> tarfile.TarInfo:
+    """Apply the ``tar`` extraction filter, without taking over the owner.
+
+    Extracted files belong to the user running *Dfetch*, as they did when the
+    extracted files were copied into place. Only root changes the owner of
+    extracted files, to uid 0 here, which is root itself.
+    """
+    return tarfile.tar_filter(member, dest_path).replace(
+        uid=0, gid=0, uname="", gname="", deep=False
+    )
@@ -0,0 +1,256 @@
+"""Selection of the archive members to extract, and where to extract them to.
+
+Extracting only the selected members gives the same result as extracting the
+whole archive and copying the selection afterwards, see :class:`ExtractionPlan`.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import pathlib
+import stat
+import tarfile
+import zipfile
+from collections.abc import Sequence
+
+from dfetch.util.license import is_license_file
+
+
+def tar_member_kind(member: tarfile.TarInfo) -> str:
+    """Classify a tar member for an :class:`ExtractionPlan`."""
+    if member.isdir():
+        return "dir"
+    if member.issym():
+        return "symlink"
+    if member.islnk():
+        return "hardlink"
+    return "file"
+
+
+def zip_member_kind(info: zipfile.ZipInfo) -> str:
+    """Classify a zip member for an :class:`ExtractionPlan`."""
+    if info.is_dir():
+        return "dir"
+    if stat.S_ISLNK(info.external_attr >> 16):
+        return "symlink"
+    return "file"
+
+
+class ExtractionPlan:
+    """Which archive members to extract, and where to.
+
+    Applies the same selection as extracting everything and then copying the
+    result: a single top-level directory is stripped, ``src:`` selects a
+    sub-directory or file (license files in the root are kept) and members
+    that ``ignore:`` would remove afterwards are skipped.
+    """
+
+    def __init__(self, destinations: dict[int, list[str]]) -> None:
+        """Create a plan from the destinations of each member, by member index."""
+        self._destinations = destinations
+
+    def destinations(self, index: int) -> list[str]:
+        """Get the paths (relative to the destination) to extract member *index* to."""
+        return self._destinations.get(index, [])
+
+    @classmethod
+    def create(
+        cls,
+        members: list[tuple[str, str]],
+        src: str,
+        ignore: Sequence[str],
+        keep_licenses: bool,
+    ) -> ExtractionPlan | None:
+        """Plan the extraction of *members*, the ``(name, kind)`` of each member.
+
+        Raises:
+            RuntimeError: When *src* is not in the archive.
+
+        Returns:
+            None when the selection depends on links in the archive, these
+            archives must be extracted completely before selecting.
+        """
+        kinds = [kind for _, kind in members]
+        if "hardlink" in kinds:
+            return None
+
+        paths = _strip_top_level(
+            [pathlib.PurePosixPath(name).parts for name, _ in members], kinds
+        )
+        if paths is None:
+            return None
+
+        if src:
+            targets = _src_targets(paths, kinds, src, keep_licenses)
+        else:
+            targets = {path: index for index, path in enumerate(paths) if path}
+        if targets is None:
+            return None
+
+        return cls(_destinations(targets, kinds, ignore))
+
+
+def _destinations(
+    targets: dict[tuple[str, ...], int], kinds: list[str], ignore: Sequence[str]
+) -> dict[int, list[str]]:
+    """Get the destinations of each member index, leaving out the ignored ones."""
+    destinations: dict[int, list[str]] = {}
+    for path, index in targets.items():
+        if not _ignored(path, kinds[index], ignore):
+            destinations.setdefault(index, []).append("/".join(path))
+    return destinations
+
+
+def _src_targets(
+    paths: list[tuple[str, ...]], kinds: list[str], src: str, keep_licenses: bool
+) -> dict[tuple[str, ...], int] | None:
+    """Get the members selected by ``src:``, by their path below *src*.
+
+    Raises:
+        RuntimeError: When *src* is not in the archive.
+
+    Returns:
+        None when the selection depends on links in the archive.
+    """
+    targets: dict[tuple[str, ...], int] = {}
+    src_parts = pathlib.PurePosixPath(src.rstrip("/")).parts
+    if not _select_src(paths, kinds, src_parts, targets):
+        return None
+    if not targets and not _is_dir(paths, kinds, src_parts):
+        raise RuntimeError(
+            f"src {src.rstrip('/')!r} was not found in the extracted archive"
+        )
+    if keep_licenses and not _select_licenses(paths, kinds, targets):
+        return None
+    return targets
+
+
+def _strip_top_level(
+    paths: list[tuple[str, ...]], kinds: list[str]
+) -> list[tuple[str, ...]] | None:
+    """Strip a single top-level directory, if the archive uses one."""
+    top_kinds = _single_top_level_kinds(paths, kinds)
+    if not top_kinds:
+        return paths
+    if "symlink" in top_kinds:
+        return None
+    if "file" in top_kinds and all(len(path) <= 1 for path in paths):
+        return paths
+    return [path[1:] for path in paths]
+
+
+def _single_top_level_kinds(paths: list[tuple[str, ...]], kinds: list[str]) -> set[str]:
+    """Get the kinds of the top-level entry, if all members share a single one."""
+    tops = {path[0] for path in paths if path}
+    if len(tops) != 1:
+        return set()
+    top = tops.pop()
+    return {kind for path, kind in zip(paths, kinds) if path == (top,)} or {"dir"}
+
+
+def _is_dir(
+    paths: list[tuple[str, ...]], kinds: list[str], dir_path: tuple[str, ...]
+) -> bool:
+    """Check if the archive has a directory at *dir_path*."""
+    return not dir_path or any(
+        (path == dir_path and kind == "dir") or _is_below(path, dir_path)
+        for path, kind in zip(paths, kinds)
+    )
+
+
+def _is_below(path: tuple[str, ...], parent: tuple[str, ...]) -> bool:
+    """Check if *path* is somewhere below the directory *parent*."""
+    return len(path) > len(parent) and path[: len(parent)] == parent
+
+
+def _select_src(
+    paths: list[tuple[str, ...]],
+    kinds: list[str],
+    src_parts: tuple[str, ...],
+    targets: dict[tuple[str, ...], int],
+) -> bool:
+    """Add the members selected by ``src:`` to *targets*.
+
+    Returns:
+        False when ``src:`` is outside the archive or goes through a symlink.
+    """
+    if not _is_safe_src(paths, kinds, src_parts):
+        return False
+
+    for index, path in enumerate(paths):
+        if path == src_parts and kinds[index] == "file":
+            targets[(src_parts[-1],)] = index
+        elif _is_below(path, src_parts):
+            targets[path[len(src_parts) :]] = index
+    return True
+
+
+def _is_safe_src(
+    paths: list[tuple[str, ...]], kinds: list[str], src_parts: tuple[str, ...]
+) -> bool:
+    """Check that ``src:`` stays inside the archive and doesn't go through a symlink."""
+    if {"..", ""} & set(src_parts) or pathlib.PurePosixPath(*src_parts).is_absolute():
+        return False
+    return not any(
+        kind == "symlink" and path and path == src_parts[: len(path)]
+        for path, kind in zip(paths, kinds)
+    )
+
+
+def _select_licenses(
+    paths: list[tuple[str, ...]],
+    kinds: list[str],
+    targets: dict[tuple[str, ...], int],
+) -> bool:
+    """Add the license files in the root of the archive to *targets*.
+
+    Returns:
+        False when a license file is a symlink.
+    """
+    for index, path in enumerate(paths):
+        if len(path) == 1 and is_license_file(path[0]):
+            if kinds[index] == "symlink":
+                return False
+            if kinds[index] == "file":
+                targets[path] = index
+    return True
+
+
+def _ignored(path: tuple[str, ...], kind: str, patterns: Sequence[str]) -> bool:
+    """Check if ``ignore:`` *patterns* would remove *path* after extraction.
+
+    This mirrors :func:`~dfetch.util.util.prune_files_by_pattern` for simple
+    patterns: a matching path is removed with everything below it, but license
+    files are kept. Anything not certain to be removed is extracted, the prune
+    afterwards has the final word.
+    """
+    for pattern in patterns:
+        pattern_parts = _simple_pattern_parts(pattern)
+        if pattern_parts and any(
+            _removed_at(path, kind, pattern_parts, depth)
+            for depth in range(len(pattern_parts), len(path) + 1)
+        ):
+            return True
+    return False
+
+
+def _simple_pattern_parts(pattern: str) -> tuple[str, ...]:
+    """Split an ``ignore:`` pattern in parts, nothing if it isn't a simple pattern."""
+    pattern_parts = pathlib.PurePosixPath(pattern.lstrip("/")).parts
+    if any("**" in part or part in (".", "..") for part in pattern_parts):
+        return ()
+    return pattern_parts
+
+
+def _removed_at(
+    path: tuple[str, ...], kind: str, pattern_parts: tuple[str, ...], depth: int
+) -> bool:
+    """Check if the pattern matching the first *depth* parts of *path* removes it."""
+    if not all(
+        fnmatch.fnmatchcase(name, part)
+        for name, part in zip(path[depth - len(pattern_parts) : depth], pattern_parts)
+    ):
+        return False
+    if depth < len(path) or kind == "dir":
+        return True
+    return kind == "file" and not is_license_file(path[-1])
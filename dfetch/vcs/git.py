@@ -1,377 +1,194 @@
 """Git specific implementation."""
 
-import contextlib
-import functools
+import fnmatch
 import glob
+import hashlib
 import os
 import re
-import shutil
-import tempfile
-from collections.abc import Callable, Generator, Sequence
-from pathlib import Path
-from urllib.parse import urlparse, urlunparse
+import subprocess  # nosec
+import threading
+from collections.abc import Generator, Mapping, Sequence
+from pathlib import Path, PurePosixPath
+from typing import Any
 
 from dfetch.log import get_logger
-from dfetch.util.cmdline import SubprocessCommandError, run_on_cmdline
+from dfetch.util.cache import cache_dir, is_network_url
+from dfetch.util.cmdline import SubprocessCommandError, max_concurrency, run_on_cmdline
 from dfetch.util.license import is_license_file
-from dfetch.util.ssh import InvalidSshCommandError, sanitize_ssh_cmd
 from dfetch.util.util import (
     glob_within_root,
-    in_directory,
     move_directory_contents,
     safe_rm,
     strip_glob_prefix,
     unique_parent_dirs,
 )
+from dfetch.vcs.git_remote import GitRemote, non_interactive_env, normalize_remote_url
 from dfetch.vcs.git_types import CheckoutOptions, Submodule
 from dfetch.vcs.patch import Patch, PatchType
 
-__all__ = ["CheckoutOptions", "GitLocalRepo", "GitRemote", "Submodule"]
+__all__ = ["CheckoutOptions", "GitLocalRepo", "GitMirror", "GitRemote", "Submodule"]
 
 logger = get_logger(__name__)
 
-
-def _try_sanitize(source: str, raw: str | None) -> str | None:
-    if not raw:
-        return None
-    try:
-        return sanitize_ssh_cmd(raw)
-    except InvalidSshCommandError as exc:
-        logger.warning("Ignoring %s: %s, falling back to 'ssh'", source, exc)
-        return None
+# Run by ``git submodule foreach`` to print the name, path, sha and toplevel of each
+# submodule, and the first local branch containing its sha, separated by NUL
+_SUBMODULE_FOREACH_SCRIPT = (
+    'printf "%s\\0%s\\0%s\\0%s\\0%s\\n" "$name" "$sm_path" "$sha1" "$toplevel"'
+    ' "$(if [ -d .git ]; then git for-each-ref --count=1 --contains "$sha1"'
+    ' --format="%(refname:short)" refs/heads; fi)"'
+)
 
 
-def _build_git_ssh_command() -> str:
-    """Returns a safe SSH command string for Git that enforces non-interactive mode.
+def _is_submodule_kept(
+    path: str, src: str | None, ignore: Sequence[str] | None
+) -> bool:
+    """Check if the submodule at *path* is kept after applying *src* and *ignore*.
 
-    Respects existing GIT_SSH_COMMAND and git core.sshCommand.
+    Follows :meth:`GitLocalRepo._apply_src_and_ignore`: submodules outside
+    *src* are removed, unless *src* is inside them, and the *ignore* globs
+    are matched relative to *src*.
     """
-    ssh_cmd = _try_sanitize("GIT_SSH_COMMAND", os.environ.get("GIT_SSH_COMMAND"))
-
-    if not ssh_cmd:
-        try:
-            result = run_on_cmdline(
-                logger, ["git", "config", "--get", "core.sshCommand"]
-            )
-            ssh_cmd = _try_sanitize(
-                "core.sshCommand", result.stdout.decode().strip() or None
-            )
-        except SubprocessCommandError:
-            ssh_cmd = None
+    if src:
+        if path == src or Path(src).is_relative_to(Path(path)):
+            return True
+        within_src = strip_glob_prefix(path, src)
+        if within_src == path:
+            return False
+        path = within_src
 
-    if not ssh_cmd:
-        ssh_cmd = "ssh"
+    return not any(
+        _glob_matches_path_or_parent(pattern, path) for pattern in ignore or []
+    )
 
-    if "BatchMode=" not in ssh_cmd:
-        ssh_cmd += " -o BatchMode=yes"
-    else:
-        logger.debug(f'BatchMode already configured in "{ssh_cmd}"')
 
-    return ssh_cmd
+def _glob_matches_path_or_parent(pattern: str, path: str) -> bool:
+    """Check if :func:`glob.glob` with *pattern* would find *path* or one of its parents."""
+    parts = PurePosixPath(path).parts
+    pattern_parts = PurePosixPath(pattern).parts
+    return 0 < len(pattern_parts) <= len(parts) and all(
+        fnmatch.fnmatch(part, pattern_part)
+        # Like glob, wildcards don't match hidden files
+        and (pattern_part.startswith(".") or not part.startswith("."))
+        for part, pattern_part in zip(parts, pattern_parts)
+    )
 
 
-# As a cli tool, we can safely assume this remains stable during the runtime, caching for speed is better
-@functools.lru_cache
-def _extend_env_for_non_interactive_mode() -> dict[str, str]:
-    """Extend the environment vars for git running in non-interactive mode.
+def _parse_eol_attributes(output: str) -> dict[str, str]:
+    """Parse ``git check-attr -z text eol`` output into a path-to-eol mapping.
 
-    See https://serverfault.com/a/1054253 for background info
+    The ``-z`` output is a flat sequence of NUL-separated
+    ``<path> <attribute> <value>`` records. Only paths with an effective
+    ``eol`` of ``lf`` or ``crlf`` that are not marked ``-text`` are returned.
     """
-    env = os.environ.copy()
-    env["GIT_TERMINAL_PROMPT"] = "0"
-    env["GIT_SSH_COMMAND"] = _build_git_ssh_command()
-
-    # https://stackoverflow.com/questions/37182847/how-do-i-disable-git-credential-manager-for-windows#answer-45513654
-    env["GCM_INTERACTIVE"] = "never"
-    return env
-
-
-class GitRemote:
-    """A remote git repo."""
-
-    def __init__(self, remote: str) -> None:
-        """Create a git remote repo."""
-        self._remote = remote
-
-    def is_git(self) -> bool:
-        """Check if the set url is git."""
-        if self._remote.endswith(".git"):
-            return True
-
-        try:
-            run_on_cmdline(
-                logger,
-                cmd=["git", "ls-remote", "--heads", self._remote],
-                env=_extend_env_for_non_interactive_mode(),
-            )
-            return True
-        except SubprocessCommandError as exc:
-            return self._handle_ls_remote_error(exc)
-        except RuntimeError:
-            return False
-
-    def _handle_ls_remote_error(self, exc: SubprocessCommandError) -> bool:
-        """Determine whether a failed git ls-remote still implies a git remote.
-
-        Raises RuntimeError for unrecoverable errors (host unreachable).
-        Returns True when the server responded but auth is needed.
-        Returns False when the failure is unrelated to git.
-        """
-        if exc.returncode == 128 and "Could not resolve host" in exc.stderr:
-            raise RuntimeError(
-                f">>>{exc.cmd}<<< failed!\n"
-                + f"'{self._remote}' is not a valid URL or unreachable:\n{exc.stderr or exc.stdout}"
-            ) from exc
-        # git/git:http.c — emitted when the server redirects to a login page
-        if "unable to update url base from redirection" in exc.stderr:
-            redirect_match = re.search(r"redirect:\s+(\S+)", exc.stderr)
-            raw_url = redirect_match.group(1) if redirect_match else ""
-            parsed = urlparse(raw_url)
-            safe_url = urlunparse(
-                (parsed.scheme, parsed.netloc, parsed.path, "", "", "")
-            )
-            logger.debug(
-                "'%s' appears to be a git remote but was redirected to '%s' — "
-                "authentication may be required",
-                self._remote,
-                safe_url or "unknown",
-            )
-            return True
-        # git/git:credential.c — emitted when GIT_TERMINAL_PROMPT=0 and server returns 401
-        if (
-            "terminal prompts disabled" in exc.stderr
-            or "could not read Username" in exc.stderr
-        ):
-            logger.debug(
-                "'%s' appears to be a git remote but requires credentials",
-                self._remote,
-            )
-            return True
-        return False
+    attrs: dict[str, dict[str, str]] = {}
+    fields = output.split("\0")
+    for path, name, value in zip(fields[0::3], fields[1::3], fields[2::3]):
+        attrs.setdefault(path, {})[name] = value
+    return {
+        path: values["eol"]
+        for path, values in attrs.items()
+        if values.get("eol") in ("lf", "crlf") and values.get("text") != "unset"
+    }
 
-    def last_sha_on_branch(self, branch: str) -> str:
-        """Get the last sha of a branch."""
-        return self._find_sha_of_branch_or_tag(self._ls_remote(self._remote), branch)
 
-    def find_branch_tip_or_tag_from_sha(self, sha: str) -> tuple[str, str]:
-        """Find branch or tag from sha."""
-        return self._find_branch_tip_or_tag_from_sha(self._ls_remote(self._remote), sha)
+MIRROR_ENV = "DFETCH_GIT_MIRROR"
 
-    def list_of_tags(self) -> list[str]:
-        """Get list of all available tags."""
-        info = self._ls_remote(self._remote)
+_FULL_SHA = re.compile(r"^[0-9a-fA-F]{40}$")
+_MIRROR_LOCKS: dict[str, threading.Lock] = {}
+_MIRROR_LOCKS_LOCK = threading.Lock()
 
-        return [
-            reference.replace("refs/tags/", "")
-            for reference, _ in info.items()
-            if reference.startswith("refs/tags/")
-        ]
 
-    def list_of_branches(self) -> list[str]:
-        """Get list of all available branches."""
-        info = self._ls_remote(self._remote)
+class GitMirror:
+    """Bare mirror of a remote in the user cache directory.
 
-        return [
-            reference.replace("refs/heads/", "")
-            for reference, _ in info.items()
-            if reference.startswith("refs/heads/")
-        ]
+    The mirror is kept up-to-date with incremental fetches, so only objects
+    that are new since the previous fetch are transferred. Checkouts borrow the
+    objects of the mirror through git alternates. All workspaces of a user
+    share the same mirrors.
 
-    def get_default_branch(self) -> str:
-        """Try to get the default branch or fallback to master."""
-        try:
-            result = run_on_cmdline(
-                logger,
-                cmd=["git", "ls-remote", "--symref", self._remote, "HEAD"],
-                env=_extend_env_for_non_interactive_mode(),
-            ).stdout.decode()
-        except SubprocessCommandError:
-            logger.debug(
-                f"Failed determining default branch of {self._remote}, falling back to 'master'"
-            )
-            return "master"
-
-        for match in re.finditer(r"ref:\s+refs/heads/(.+)\s+HEAD", result):
-            return str(match.group(1))
+    Mirrors are opt-in: set ``DFETCH_GIT_MIRROR=1`` to use them.
+    """
 
-        logger.debug(
-            f"Didn't find a HEAD branch in {self._remote}, falling back to 'master'"
+    def __init__(self, remote: str) -> None:
+        """Create the mirror of *remote*, it is only created on disk when updated."""
+        self._remote = (
+            remote
+            if is_network_url(remote) or not os.path.exists(remote)
+            else os.path.abspath(remote)
         )
-        return "master"
+        url_hash = hashlib.sha256(
+            normalize_remote_url(self._remote).encode()
+        ).hexdigest()[:32]
+        self.path = str(cache_dir() / "git" / f"{url_hash}.git")
 
     @staticmethod
-    def _ls_remote(remote: str) -> dict[str, str]:
-        result = run_on_cmdline(
-            logger,
-            cmd=["git", "ls-remote", "--heads", "--tags", remote],
-            env=_extend_env_for_non_interactive_mode(),
-        ).stdout.decode()
-
-        info: dict[str, str] = {}
-        for line in filter(lambda x: x, result.split("\n")):
-            sha, ref = (part.strip() for part in f"{line} ".split("\t", maxsplit=1))
-
-            # Annotated tag commit (more important)
-            if ref.endswith("^{}"):
-                info[ref.strip("^{}")] = sha
-            elif ref not in info:
-                info[ref] = sha
-        return info
-
-    def fetch_for_tree_browse(self, target: str, version: str) -> None:
-        """Fetch just enough objects to support ``ls_tree`` on *version*.
-
-        Uses ``--no-checkout`` and ``--filter=blob:none`` so only tree objects
-        are transferred — no file contents are downloaded.
-        """
-        run_on_cmdline(logger, ["git", "-C", target, "init"])
-        run_on_cmdline(
-            logger,
-            [
-                "git",
-                "-C",
-                target,
-                "fetch",
-                "--depth=1",
-                "--filter=blob:none",
-                self._remote,
-                version,
-            ],
-            env=_extend_env_for_non_interactive_mode(),
-        )
+    def enabled() -> bool:
+        """Check if the user opted in to use git mirrors."""
+        return os.environ.get(MIRROR_ENV, "").lower() in ("1", "true", "yes", "on")
 
-    @contextlib.contextmanager
-    def browse_tree(
-        self, version: str = ""
-    ) -> Generator[Callable[[str], list[tuple[str, bool]]], None, None]:
-        """Shallow-clone the remote and yield a tree-listing callable.
+    def update(self, version: str) -> str:
+        """Make sure *version* is available in the mirror and return its sha.
 
-        The yielded callable accepts a path and returns ``(name, is_dir)`` pairs.
-        The clone is removed on context exit.
+        All branches and tags are fetched, a full sha that the mirror already
+        has doesn't need a fetch at all. A version that isn't a branch or tag is
+        fetched separately and kept under ``refs/dfetch/``.
         """
-        tmpdir = tempfile.mkdtemp(prefix="dfetch_browse_")
-        cloned = False
-        try:
-            self.fetch_for_tree_browse(tmpdir, version or self.get_default_branch())
-            cloned = True
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            logger.debug("Failed to fetch remote tree for '%s': %s", self._remote, e)
-
-        def ls(path: str = "") -> list[tuple[str, bool]]:
-            return GitRemote.ls_tree(tmpdir, path=path) if cloned else []
-
-        try:
-            yield ls
-        finally:
-            shutil.rmtree(tmpdir, ignore_errors=True)
-
-    @staticmethod
-    def _parse_ls_tree_entry(line: str, prefix: str) -> tuple[str, bool]:
-        """Parse one ``git ls-tree`` output line into a ``(name, is_dir)`` pair."""
-        meta, name = line.split("\t", 1)
-        base = name[len(prefix) :] if prefix and name.startswith(prefix) else name
-        return base, meta.split()[1] == "tree"
-
-    @staticmethod
-    def ls_tree(local_path: str, path: str = "") -> list[tuple[str, bool]]:
-        """List the contents of the HEAD tree at *path* in a local clone.
+        with self._lock():
+            if not os.path.isdir(self.path):
+                run_on_cmdline(logger, ["git", "init", "--bare", "--quiet", self.path])
+            elif _FULL_SHA.match(version) and self.has(version):
+                return version
+
+            self._git(
+                [
+                    "fetch",
+                    "--prune",
+                    "--quiet",
+                    self._remote,
+                    "+refs/heads/*:refs/heads/*",
+                    "+refs/tags/*:refs/tags/*",
+                ]
+            )
+            if not self.has(version):
+                self._git(
+                    [
+                        "fetch",
+                        "--quiet",
+                        self._remote,
+                        f"+{version}:refs/dfetch/{version}",
+                    ]
+                )
+                version = f"refs/dfetch/{version}"
+            return self._rev_parse(version)
 
-        Returns entries sorted with directories first (alphabetically),
-        then files (alphabetically).
-        """
-        cmd = ["git", "-C", local_path, "ls-tree", "FETCH_HEAD"]
-        if path:
-            cmd.append(path.rstrip("/") + "/")
+    def has(self, version: str) -> bool:
+        """Check if *version* resolves to a commit in the mirror."""
         try:
-            result = run_on_cmdline(logger, cmd=cmd)
-            prefix = (path.rstrip("/") + "/") if path else ""
-            entries = [
-                GitRemote._parse_ls_tree_entry(line, prefix)
-                for line in result.stdout.decode().splitlines()
-                if line.strip()
-            ]
-            entries.sort(key=lambda e: (not e[1], e[0]))  # dirs first, then files
-            return entries
+            self._rev_parse(version)
         except SubprocessCommandError:
-            return []
-
-    @staticmethod
-    def _find_sha_of_branch_or_tag(info: dict[str, str], branch_or_tag: str) -> str:
-        """Find SHA of a branch tip or tag."""
-        for reference, sha in info.items():
-            if reference in [
-                f"refs/heads/{branch_or_tag}",
-                f"refs/tags/{branch_or_tag}",
-            ]:
-                return sha
-        return ""
+            return False
+        return True
 
-    @staticmethod
-    def _find_branch_tip_or_tag_from_sha(
-        info: dict[str, str], rev: str
-    ) -> tuple[str, str]:
-        """Check all branch tips and tags and see if the sha is one of them."""
-        branch, tag = "", ""
-        if not rev:
-            return (branch, tag)
-        for reference, sha in info.items():
-            if sha.startswith(rev):  # Also allow for shorter SHA's
-                if reference.startswith("refs/tags/"):
-                    tag = reference.replace("refs/tags/", "")
-                elif reference.startswith("refs/heads/"):
-                    branch = reference.replace("refs/heads/", "")
-                break
-        return (branch, tag)
+    def _rev_parse(self, version: str) -> str:
+        result = self._git(
+            ["rev-parse", "--verify", "--quiet", f"{version}^{{commit}}"]
+        )
+        return str(result.stdout.decode().strip())
 
-    def check_version_exists(
-        self,
-        version: str,
-    ) -> bool:
-        """Check if a specific version exists on the remote by simulating a local checkout.
+    def _git(self, args: list[str]) -> "subprocess.CompletedProcess[Any]":
+        return run_on_cmdline(
+            logger,
+            ["git", "--git-dir", self.path, *args],
+            env=non_interactive_env(),
+        )
 
-        Args:
-            version (str): A target to checkout, can be branch, tag or sha
+    def _lock(self) -> threading.Lock:
+        """Get the lock that keeps threads from updating this mirror at once.
 
-        Returns:
-            exists: A bool indicating if the version is available on the remote.
+        Other processes are kept out by the locks git itself takes while fetching.
         """
-        temp_dir = tempfile.mkdtemp()
-        exists = False
-        with in_directory(temp_dir):
-            run_on_cmdline(logger, ["git", "init"])
-            run_on_cmdline(logger, ["git", "remote", "add", "origin", self._remote])
-            run_on_cmdline(logger, ["git", "checkout", "-b", "dfetch-local-branch"])
-            try:
-                run_on_cmdline(
-                    logger,
-                    ["git", "fetch", "--dry-run", "--depth", "1", "origin", version],
-                    env=_extend_env_for_non_interactive_mode(),
-                )
-                exists = True
-            except SubprocessCommandError as exc:
-                if exc.returncode != 128:
-                    raise
-        safe_rm(temp_dir, within=Path(temp_dir).parent)
-
-        return exists
-
-
-def _parse_eol_attributes(output: str) -> dict[str, str]:
-    """Parse ``git check-attr -z text eol`` output into a path-to-eol mapping.
-
-    The ``-z`` output is a flat sequence of NUL-separated
-    ``<path> <attribute> <value>`` records. Only paths with an effective
-    ``eol`` of ``lf`` or ``crlf`` that are not marked ``-text`` are returned.
-    """
-    attrs: dict[str, dict[str, str]] = {}
-    fields = output.split("\0")
-    for path, name, value in zip(fields[0::3], fields[1::3], fields[2::3]):
-        attrs.setdefault(path, {})[name] = value
-    return {
-        path: values["eol"]
-        for path, values in attrs.items()
-        if values.get("eol") in ("lf", "crlf") and values.get("text") != "unset"
-    }
+        with _MIRROR_LOCKS_LOCK:
+            return _MIRROR_LOCKS.setdefault(self.path, threading.Lock())
 
 
 class GitLocalRepo:
@@ -391,14 +208,25 @@ class GitLocalRepo:
         """Create a local git repo."""
         self._path = str(path)
 
+    @property
+    def _workdir(self) -> str:
+        """Directory to run git commands for this repository in.
+
+        Commands are run with an explicit working directory instead of changing
+        the process-wide one, so multiple repositories can be handled at once.
+        """
+        if os.path.isdir(self._path):
+            return self._path
+        return os.path.dirname(self._path) or "."
+
+    def _join(self, *parts: str) -> str:
+        """Return a path inside this repository."""
+        return os.path.join(self._workdir, *parts)
+
     def is_git(self) -> bool:
         """Check if is git."""
         try:
-            with in_directory(self._path):
-                run_on_cmdline(
-                    logger,
-                    ["git", "status"],
-                )
+            run_on_cmdline(logger, ["git", "status"], cwd=self._workdir)
             return True
         except (SubprocessCommandError, RuntimeError):
             return False
@@ -417,15 +245,15 @@ class GitLocalRepo:
         """
         if not paths:
             return {}
-        with in_directory(self._path):
-            try:
-                result = run_on_cmdline(
-                    logger,
-                    ["git", "check-attr", "-z", "--stdin", "text", "eol"],
-                    input_data="\0".join(paths).encode() + b"\0",
-                )
-            except (SubprocessCommandError, RuntimeError):
-                return {}
+        try:
+            result = run_on_cmdline(
+                logger,
+                ["git", "check-attr", "-z", "--stdin", "text", "eol"],
+                input_data="\0".join(paths).encode() + b"\0",
+                cwd=self._workdir,
+            )
+        except (SubprocessCommandError, RuntimeError):
+            return {}
         return _parse_eol_attributes(result.stdout.decode())
 
     def _configure_eol(self, eol: str) -> None:
@@ -439,11 +267,11 @@ class GitLocalRepo:
         """
         if eol not in ("lf", "crlf"):
             raise ValueError(f"Invalid eol value {eol!r}: must be 'lf' or 'crlf'")
-        info_dir = Path(".git") / "info"
+        info_dir = Path(self._join(self.METADATA_DIR, "info"))
         info_dir.mkdir(exist_ok=True)
         (info_dir / "attributes").write_text("* text=auto\n", encoding="utf-8")
-        run_on_cmdline(logger, ["git", "config", "core.eol", eol])
-        run_on_cmdline(logger, ["git", "config", "core.autocrlf", "false"])
+        self._git(["config", "core.eol", eol])
+        self._git(["config", "core.autocrlf", "false"])
 
     def _renormalize_eol(self) -> None:
         """Rewrite the working tree so the configured eol attribute takes effect.
@@ -454,24 +282,23 @@ class GitLocalRepo:
         requested endings. Only files already present in the working tree are
         written, keeping sparse checkouts sparse.
         """
-        run_on_cmdline(logger, ["git", "add", "--renormalize", "."])
-        changed = (
-            run_on_cmdline(logger, ["git", "diff", "--cached", "--name-only"])
-            .stdout.decode()
-            .strip()
-        )
+        self._git(["add", "--renormalize", "."])
+        changed = self._git(["diff", "--cached", "--name-only"]).stdout.decode().strip()
         if not changed:
             return
-        tracked = run_on_cmdline(logger, ["git", "ls-files", "-z"]).stdout.decode()
-        on_disk = [path for path in tracked.split("\0") if os.path.isfile(path)]
+        tracked = self._git(["ls-files", "-z"]).stdout.decode()
+        on_disk = [
+            path
+            for path in tracked.split("\0")
+            if path and os.path.isfile(self._join(path))
+        ]
         if not on_disk:
             return
-        tree = run_on_cmdline(logger, ["git", "write-tree"]).stdout.decode().strip()
+        tree = self._git(["write-tree"]).stdout.decode().strip()
         # read-tree drops the index stat-cache, so checkout-index rewrites files
-        run_on_cmdline(logger, ["git", "read-tree", tree])
-        run_on_cmdline(
-            logger,
-            ["git", "checkout-index", "-f", "-z", "--stdin"],
+        self._git(["read-tree", tree])
+        self._git(
+            ["checkout-index", "-f", "-z", "--stdin"],
             input_data="\0".join(on_disk).encode() + b"\0",
         )
 
@@ -481,9 +308,10 @@ class GitLocalRepo:
         keeps: Sequence[str],
         ignore: Sequence[str] | None = None,
     ) -> None:
-        run_on_cmdline(logger, ["git", "config", "core.sparsecheckout", "true"])
+        self._git(["config", "core.sparsecheckout", "true"])
 
-        with open(".git/info/sparse-checkout", "a", encoding="utf-8") as f:
+        sparse_checkout_file = self._join(self.METADATA_DIR, "info", "sparse-checkout")
+        with open(sparse_checkout_file, "a", encoding="utf-8") as f:
             patterns = list(keeps or [])
             patterns.append(f"/{src or '*'}")
 
@@ -501,48 +329,134 @@ class GitLocalRepo:
         Args:
             options: A :class:`CheckoutOptions` instance describing what to fetch.
         """
-        with in_directory(self._path):
-            run_on_cmdline(logger, ["git", "init"])
-            run_on_cmdline(logger, ["git", "remote", "add", "origin", options.remote])
-            run_on_cmdline(logger, ["git", "checkout", "-b", "dfetch-local-branch"])
-
-            if options.src or options.ignore:
-                self._configure_sparse_checkout(
-                    options.src, options.must_keeps or [], options.ignore
-                )
-
-            if options.eol is not None:
-                self._configure_eol(options.eol)
+        self._git(["init"])
+        self._git(["remote", "add", "origin", options.remote])
+        self._git(["checkout", "-b", "dfetch-local-branch"])
 
-            run_on_cmdline(
-                logger,
-                ["git", "fetch", "--depth", "1", "origin", options.version],
-                env=_extend_env_for_non_interactive_mode(),
+        if options.src or options.ignore:
+            self._configure_sparse_checkout(
+                options.src, options.must_keeps or [], options.ignore
             )
-            run_on_cmdline(logger, ["git", "reset", "--hard", "FETCH_HEAD"])
 
-            if options.eol is not None:
-                self._renormalize_eol()
+        if options.eol is not None:
+            self._configure_eol(options.eol)
 
-            run_on_cmdline(
-                logger,
-                ["git", "submodule", "update", "--init", "--recursive"],
-                env=_extend_env_for_non_interactive_mode(),
-            )
+        if not (GitMirror.enabled() and self._fetch_from_mirror(options)):
+            self._fetch(options)
+        # Blobs left out by a partial fetch are fetched from the remote on checkout
+        self._git(
+            ["reset", "--hard", "FETCH_HEAD"],
+            env=non_interactive_env(),
+        )
 
-            submodules = self.submodules()
+        if options.eol is not None:
+            self._renormalize_eol()
 
-            current_sha = (
-                run_on_cmdline(logger, ["git", "rev-parse", "HEAD"])
-                .stdout.decode()
-                .strip()
-            )
+        self._update_submodules(options)
+
+        submodules = self.submodules()
+
+        current_sha = self._git(["rev-parse", "HEAD"]).stdout.decode().strip()
 
-            submodules = self._apply_src_and_ignore(
-                options.remote, options.src, options.ignore, submodules
+        submodules = self._apply_src_and_ignore(
+            options.remote, options.src, options.ignore, submodules
+        )
+
+        return str(current_sha), submodules
+
+    def _update_submodules(self, options: CheckoutOptions) -> None:
+        """Fetch the submodules that are kept with *options.src* and *options.ignore*.
+
+        Submodules that would be removed afterwards are never fetched. The
+        submodules are fetched concurrently, limited by
+        :func:`dfetch.util.cmdline.max_concurrency`. With
+        *options.shallow_submodules* only their recorded commit is fetched, if
+        a server refuses that, their full history is fetched instead.
+        """
+        paths = [
+            path
+            for path in self._submodule_paths()
+            if _is_submodule_kept(path, options.src, options.ignore)
+        ]
+        if not paths:
+            return
+
+        update = ["submodule", "update", "--init", "--recursive"]
+        update += ["--jobs", str(max_concurrency())]
+        env = non_interactive_env()
+        if options.shallow_submodules:
+            try:
+                self._git([*update, "--depth", "1", "--", *paths], env=env)
+                return
+            except SubprocessCommandError as exc:
+                logger.debug(f"Shallow submodule update failed, fetching all: {exc}")
+        self._git([*update, "--", *paths], env=env)
+
+    def _submodule_paths(self) -> list[str]:
+        """Get the paths of the submodules recorded in the index."""
+        if not os.path.isfile(self._join(self.GIT_MODULES_FILE)):
+            return []
+        result = self._git(["ls-files", "--stage", "-z"])
+        return [
+            entry.split("\t", maxsplit=1)[1]
+            for entry in result.stdout.decode().split("\0")
+            if entry.startswith("160000 ")
+        ]
+
+    def _fetch(self, options: CheckoutOptions) -> None:
+        """Fetch *options.version* from the remote.
+
+        With ``src:`` only a part of the files is checked out, so a partial
+        clone (``--filter=blob:none``) is done. Only trees are fetched up front,
+        the file contents of the sparse checkout are fetched when checking out.
+        Servers that don't support filters send everything, as git ignores the
+        filter for them.
+        """
+        env = non_interactive_env()
+        if options.src:
+            try:
+                self._git(
+                    ["fetch", "--depth", "1", "--filter=blob:none"]
+                    + ["origin", options.version],
+                    env=env,
+                )
+                return
+            except SubprocessCommandError as exc:
+                logger.debug(f"Partial fetch failed, fetching everything: {exc}")
+        self._git(["fetch", "--depth", "1", "origin", options.version], env=env)
+
+    def _fetch_from_mirror(self, options: CheckoutOptions) -> bool:
+        """Fetch *options.version* through the local mirror of the remote.
+
+        The objects are borrowed from the mirror using git alternates, so
+        nothing needs to be copied. Returns False if the mirror couldn't be
+        used, the version should then be fetched from the remote directly.
+        """
+        mirror = GitMirror(options.remote)
+        try:
+            sha = mirror.update(options.version)
+            alternates = Path(self._join(self.METADATA_DIR, "objects", "info"))
+            alternates.mkdir(parents=True, exist_ok=True)
+            (alternates / "alternates").write_text(
+                os.path.join(os.path.abspath(mirror.path), "objects") + "\n",
+                encoding="utf-8",
             )
+            self._git(["fetch", "--quiet", mirror.path, sha])
+        except (SubprocessCommandError, OSError) as exc:
+            logger.debug(f"Not using git mirror for {options.remote}: {exc}")
+            return False
+        return True
 
-            return str(current_sha), submodules
+    def _git(
+        self,
+        args: list[str],
+        env: Mapping[str, str] | None = None,
+        input_data: bytes | None = None,
+    ) -> "subprocess.CompletedProcess[Any]":
+        """Run a git subcommand inside this repository."""
+        return run_on_cmdline(
+            logger, ["git", *args], env=env, input_data=input_data, cwd=self._workdir
+        )
 
     def _apply_src_and_ignore(
         self,
@@ -558,12 +472,15 @@ class GitLocalRepo:
         for ignore_path in ignore or []:
             paths = [
                 p
-                for p in glob.glob(ignore_path)
-                if not (os.path.isfile(p) and is_license_file(os.path.basename(p)))
+                for p in glob.glob(ignore_path, root_dir=self._workdir)
+                if not (
+                    os.path.isfile(self._join(p))
+                    and is_license_file(os.path.basename(p))
+                )
             ]
-            safe_rm(paths, within=".")
+            safe_rm([self._join(p) for p in paths], within=self._workdir)
 
-        return [s for s in submodules if os.path.exists(s.path)]
+        return [s for s in submodules if os.path.exists(self._join(s.path))]
 
     def _filter_submodules_by_src(
         self, remote: str, src: str, submodules: list[Submodule]
@@ -586,13 +503,13 @@ class GitLocalRepo:
                     continue
                 to_remove.add(submodule.path)
         for path in to_remove:
-            safe_rm(path, within=".")
-        GitLocalRepo._remove_empty_parents(to_remove)
-        self._move_src_folder_up(remote, src)
+            safe_rm(self._join(path), within=self._workdir)
+        GitLocalRepo._remove_empty_parents(to_remove, root=self._workdir)
+        self._move_src_folder_up(remote, src, root=self._workdir)
         return within_src
 
     @staticmethod
-    def _remove_empty_parents(paths: set[str]) -> None:
+    def _remove_empty_parents(paths: set[str], root: str = ".") -> None:
         """Remove empty ancestor directories left after removing out-of-scope submodule dirs.
 
         git submodule update may create a parent directory for a submodule even when
@@ -604,7 +521,7 @@ class GitLocalRepo:
             parent = Path(path).parent
             while parent != Path("."):
                 try:
-                    parent.rmdir()
+                    (Path(root) / parent).rmdir()
                 except OSError:
                     break
                 parent = parent.parent
@@ -615,7 +532,9 @@ class GitLocalRepo:
 
         Paths that escape the repo root are skipped with a warning.
         """
-        safe_matched, escaped = glob_within_root(src, repo_root)
+        safe_matched, escaped = glob_within_root(
+            os.path.join(glob.escape(str(repo_root)), src), repo_root
+        )
         for p in escaped:
             logger.warning(
                 f"The 'src:' filter '{src}' matched '{p}' outside the repo root"
@@ -633,7 +552,7 @@ class GitLocalRepo:
         for name in (GitLocalRepo.METADATA_DIR, GitLocalRepo.GIT_MODULES_FILE):
             safe_rm(chosen / name, within=chosen)
         try:
-            move_directory_contents(str(chosen), ".")
+            move_directory_contents(str(chosen), str(repo_root))
         except FileNotFoundError:
             logger.warning(
                 f"The 'src:' filter '{chosen}' didn't match any files from '{remote}'"
@@ -649,12 +568,13 @@ class GitLocalRepo:
                 )
 
     @staticmethod
-    def _move_src_folder_up(remote: str, src: str) -> None:
+    def _move_src_folder_up(remote: str, src: str, root: str = ".") -> None:
         """Move the files from the src folder into the root of the project.
 
         Args:
             remote (str): Name of the root
             src (str): Src folder to move up
+            root (str): Root of the project the src folder is in
         """
         if os.path.isabs(src):
             logger.warning(
@@ -662,7 +582,7 @@ class GitLocalRepo:
             )
             return
 
-        repo_root = Path(os.getcwd()).resolve()
+        repo_root = Path(root).resolve()
         safe_matched = GitLocalRepo._collect_safe_paths(src, repo_root, remote)
 
         if not safe_matched:
@@ -704,19 +624,14 @@ class GitLocalRepo:
 
     def get_last_file_hash(self, path: str) -> str:
         """Get the hash of a specific file."""
-        with in_directory(self._path):
-            result = run_on_cmdline(
-                logger,
-                ["git", "log", "-n", "1", "--pretty=format:%H", "--", path],
-            )
+        result = self._git(["log", "-n", "1", "--pretty=format:%H", "--", path])
 
         return str(result.stdout.decode())
 
-    @staticmethod
-    def get_remote_url() -> str:
+    def get_remote_url(self) -> str:
         """Get the url of the remote origin."""
         try:
-            result = run_on_cmdline(logger, ["git", "remote", "get-url", "origin"])
+            result = self._git(["remote", "get-url", "origin"])
             decoded_result = str(result.stdout.decode()).strip()
         except SubprocessCommandError:
             decoded_result = ""
@@ -745,23 +660,21 @@ class GitLocalRepo:
         reverse: bool = False,
     ) -> str:
         """Generate a relative diff patch."""
-        with in_directory(self._path):
-            cmd = [
-                "git",
-                "diff",
-                "--relative",
-                "--binary",  # Add binary content
-                "--no-ext-diff",  # Don't allow external diff tools
-                "--no-color",
-            ]
+        cmd = [
+            "diff",
+            "--relative",
+            "--binary",  # Add binary content
+            "--no-ext-diff",  # Don't allow external diff tools
+            "--no-color",
+        ]
 
-            if reverse:
-                cmd.extend(["-R", "--src-prefix=b/", "--dst-prefix=a/"])
+        if reverse:
+            cmd.extend(["-R", "--src-prefix=b/", "--dst-prefix=a/"])
 
-            cmd.extend(GitLocalRepo._build_hash_args(old_hash, new_hash))
-            cmd.extend(GitLocalRepo._build_ignore_args(ignore))
+        cmd.extend(GitLocalRepo._build_hash_args(old_hash, new_hash))
+        cmd.extend(GitLocalRepo._build_ignore_args(ignore))
 
-            result = run_on_cmdline(logger, cmd)
+        result = self._git(cmd)
 
         return str(result.stdout.decode())
 
@@ -774,22 +687,19 @@ class GitLocalRepo:
         if not Path(self._path).exists():
             return []
 
-        with in_directory(self._path):
-            return list(
-                run_on_cmdline(
-                    logger,
-                    [
-                        "git",
-                        "ls-files",
-                        "--ignored",
-                        "--others",
-                        "--exclude-standard",
-                        ".",
-                    ],
-                )
-                .stdout.decode()
-                .splitlines()
+        return list(
+            self._git(
+                [
+                    "ls-files",
+                    "--ignored",
+                    "--others",
+                    "--exclude-standard",
+                    ".",
+                ]
             )
+            .stdout.decode()
+            .splitlines()
+        )
 
     def any_changes_or_untracked(self) -> bool:
         """Return True if the repo has any changed or untracked files.
@@ -801,86 +711,58 @@ class GitLocalRepo:
         if not Path(self._path).exists():
             raise RuntimeError("Path does not exist.")
 
-        with in_directory(self._path):
-            return bool(
-                run_on_cmdline(
-                    logger,
-                    [
-                        "git",
-                        "status",
-                        "--porcelain",
-                        "--",
-                        ".",
-                    ],
-                )
-                .stdout.decode()
-                .splitlines()
-            )
+        return bool(
+            self._git(["status", "--porcelain", "--", "."]).stdout.decode().splitlines()
+        )
 
     def untracked_files_patch(self, ignore: Sequence[str] | None = None) -> Patch:
         """Create a diff for untracked files."""
-        with in_directory(self._path):
-            untracked_files = (
-                run_on_cmdline(
-                    logger, ["git", "ls-files", "--others", "--exclude-standard"]
-                )
-                .stdout.decode()
-                .splitlines()
-            )
+        untracked_files = (
+            self._git(["ls-files", "--others", "--exclude-standard"])
+            .stdout.decode()
+            .splitlines()
+        )
 
-            if ignore:
-                untracked_files = [
-                    file_path
-                    for file_path in untracked_files
-                    if not any(Path(file_path).match(pattern) for pattern in ignore)
-                ]
+        if ignore:
+            untracked_files = [
+                file_path
+                for file_path in untracked_files
+                if not any(Path(file_path).match(pattern) for pattern in ignore)
+            ]
 
-            if untracked_files:
-                return Patch.for_new_files(untracked_files, PatchType.GIT)
+        if untracked_files:
+            return Patch.for_new_files(
+                untracked_files, PatchType.GIT, root=self._workdir
+            )
 
-            return Patch.empty()
+        return Patch.empty()
 
-    @staticmethod
-    def submodules() -> list[Submodule]:
-        """Get a list of submodules in the current directory."""
-        result = run_on_cmdline(
-            logger,
-            [
-                "git",
-                "submodule",
-                "foreach",
-                "--quiet",
-                'printf "%s\\0%s\\0%s\\0%s\n" "$name" "$sm_path" "$sha1" "$toplevel"',
-            ],
+    def submodules(self) -> list[Submodule]:
+        """Get a list of submodules in this repository.
+
+        The submodules are listed in a single ``git submodule foreach``, which
+        also finds the first local branch containing the sha of each
+        submodule. The branches and tags of all urls are listed concurrently,
+        each url only once.
+        """
+        result = self._git(
+            ["submodule", "foreach", "--quiet", _SUBMODULE_FOREACH_SCRIPT]
         )
 
-        submodules: list[Submodule] = []
-        urls: dict[str, str] = {}
-        for line in result.stdout.decode().split("\n"):
-            if line:
-                name, sm_path, sha, toplevel = line.split("\0")
-                urls = urls or GitLocalRepo._get_submodule_urls(toplevel)
-                url = urls[name]
-                branch, tag = GitRemote(url).find_branch_tip_or_tag_from_sha(sha)
-
-                if not (branch or tag):
-                    branch = GitLocalRepo(
-                        os.path.join(os.getcwd(), sm_path)
-                    ).find_branch_containing_sha(sha)
-
-                submodules += [
-                    Submodule(
-                        name=name,
-                        toplevel=toplevel,
-                        path=sm_path,
-                        sha=sha,
-                        url=url,
-                        branch=branch,
-                        tag=tag,
-                    )
-                ]
+        lines = [line for line in result.stdout.decode().split("\n") if line]
+        entries = [line.split("\0") for line in lines]
+        urls = self._get_submodule_urls(entries[0][3]) if entries else {}
+
+        # Only imported when needed, as asyncio is slow to import
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        asyncio.run(GitRemote.prefetch_refs(urls[name] for name, *_ in entries))
 
-        if not submodules and os.path.isfile(".gitmodules"):
+        submodules = [
+            GitLocalRepo._submodule(entry, urls[entry[0]]) for entry in entries
+        ]
+
+        if not submodules and os.path.isfile(self._join(self.GIT_MODULES_FILE)):
             logger.warning(
                 "This repository probably has submodules, "
                 "but they might not have been initialized yet. "
@@ -890,27 +772,43 @@ class GitLocalRepo:
         return submodules
 
     @staticmethod
-    def _get_submodule_urls(toplevel: str) -> dict[str, str]:
-        result = run_on_cmdline(
-            logger,
+    def _submodule(entry: Sequence[str], url: str) -> Submodule:
+        """Create the submodule of an *entry* printed by the foreach script, cloned from *url*.
+
+        Its branch or tag is the one whose tip is the sha of the submodule, else the
+        first local branch containing it.
+        """
+        name, sm_path, sha, toplevel, containing_branch = entry
+        branch, tag = GitRemote(url).find_branch_tip_or_tag_from_sha(sha)
+        return Submodule(
+            name=name,
+            toplevel=toplevel,
+            path=sm_path,
+            sha=sha,
+            url=url,
+            branch=branch if (branch or tag) else containing_branch,
+            tag=tag,
+        )
+
+    def _get_submodule_urls(self, toplevel: str) -> dict[str, str]:
+        result = self._git(
             [
-                "git",
                 "config",
                 "--file",
                 toplevel + "/.gitmodules",
                 "--get-regexp",
                 "url",
-            ],
+            ]
         )
 
-        origin_url = GitLocalRepo.get_remote_url()
+        urls = dict(re.findall(r"submodule\.(.*)\.url\s+(.*)", result.stdout.decode()))
+        if not any(url.startswith("../") for url in urls.values()):
+            return urls
+
+        origin_url = self.get_remote_url()
         return {
-            str(match.group(1)): GitLocalRepo._ensure_abs_url(
-                origin_url, str(match.group(2))
-            )
-            for match in re.finditer(
-                r"submodule\.(.*)\.url\s+(.*)", result.stdout.decode()
-            )
+            name: GitLocalRepo._ensure_abs_url(origin_url, url)
+            for name, url in urls.items()
         }
 
     @staticmethod
@@ -930,25 +828,6 @@ class GitLocalRepo:
 
         return "/".join(new_root_url + new_rel_url)
 
-    def find_branch_containing_sha(self, sha: str) -> str:
-        """Try to find the branch that contains the given sha."""
-        if not os.path.isdir(os.path.join(self._path, GitLocalRepo.METADATA_DIR)):
-            return ""
-
-        with in_directory(self._path):
-            result = run_on_cmdline(
-                logger,
-                ["git", "branch", "--contains", sha],
-            )
-
-        branches: list[str] = [
-            branch.strip()
-            for branch in result.stdout.decode().split("*")
-            if branch.strip() and "HEAD detached at" not in branch.strip()
-        ]
-
-        return "" if not branches else branches[0]
-
     def _get_git_config_value(self, key: str) -> str:
         """Read a single git config value from the local repo.
 
@@ -959,8 +838,7 @@ class GitLocalRepo:
             The stripped config value, or an empty string if the key is absent.
         """
         try:
-            with in_directory(self._path):
-                result = run_on_cmdline(logger, ["git", "config", key])
+            result = self._git(["config", key])
             return str(result.stdout.decode().strip())
         except SubprocessCommandError:
             return ""
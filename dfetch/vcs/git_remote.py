@@ -0,0 +1,543 @@
+"""Remote git repositories and the references they advertise."""
+
+import contextlib
+import functools
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections.abc import Callable, Generator, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse, urlunparse
+
+from dfetch.log import get_logger
+from dfetch.util.cache import RemoteCache, is_network_url, register_run_cache
+from dfetch.util.cmdline import (
+    SubprocessCommandError,
+    run_on_cmdline,
+    run_on_cmdline_async,
+)
+from dfetch.util.ssh import InvalidSshCommandError, sanitize_ssh_cmd
+from dfetch.util.util import safe_rm
+
+logger = get_logger(__name__)
+
+
+def _try_sanitize(source: str, raw: str | None) -> str | None:
+    if not raw:
+        return None
+    try:
+        return sanitize_ssh_cmd(raw)
+    except InvalidSshCommandError as exc:
+        logger.warning("Ignoring %s: %s, falling back to 'ssh'", source, exc)
+        return None
+
+
+def _build_git_ssh_command() -> str:
+    """Returns a safe SSH command string for Git that enforces non-interactive mode.
+
+    Respects existing GIT_SSH_COMMAND and git core.sshCommand.
+    """
+    ssh_cmd = _try_sanitize("GIT_SSH_COMMAND", os.environ.get("GIT_SSH_COMMAND"))
+
+    if not ssh_cmd:
+        try:
+            result = run_on_cmdline(
+                logger, ["git", "config", "--get", "core.sshCommand"]
+            )
+            ssh_cmd = _try_sanitize(
+                "core.sshCommand", result.stdout.decode().strip() or None
+            )
+        except SubprocessCommandError:
+            ssh_cmd = None
+
+    if not ssh_cmd:
+        ssh_cmd = "ssh"
+
+    if "BatchMode=" not in ssh_cmd:
+        ssh_cmd += " -o BatchMode=yes"
+    else:
+        logger.debug(f'BatchMode already configured in "{ssh_cmd}"')
+
+    return ssh_cmd
+
+
+# As a cli tool, we can safely assume this remains stable during the runtime, caching for speed is better
+@functools.lru_cache
+def non_interactive_env() -> dict[str, str]:
+    """Extend the environment vars for git running in non-interactive mode.
+
+    See https://serverfault.com/a/1054253 for background info
+    """
+    env = os.environ.copy()
+    env["GIT_TERMINAL_PROMPT"] = "0"
+    env["GIT_SSH_COMMAND"] = _build_git_ssh_command()
+
+    # https://stackoverflow.com/questions/37182847/how-do-i-disable-git-credential-manager-for-windows#answer-45513654
+    env["GCM_INTERACTIVE"] = "never"
+    return env
+
+
+@dataclass(frozen=True)
+class _AdvertisedRefs:
+    """References advertised by a remote.
+
+    Attributes:
+        refs: Branch tips and tags (``refs/heads/...``, ``refs/tags/...``) with
+              their sha, annotated tags point to the tagged commit.
+        head: Branch the remote ``HEAD`` points to, empty if unknown.
+    """
+
+    refs: dict[str, str]
+    head: str
+
+
+def normalize_remote_url(remote: str) -> str:
+    """Normalize a remote url so different spellings of a remote match.
+
+    Scheme and host are case-insensitive and a trailing ``/`` or ``.git`` in the
+    path of a network url doesn't change which repository is meant. Local paths
+    are left alone, since ``repo`` and ``repo.git`` can be different folders.
+    """
+    remote = remote.strip()
+    parsed = urlparse(remote)
+    if parsed.scheme.lower() not in ("http", "https", "ssh", "git", "git+ssh"):
+        return remote.rstrip("/") or remote
+    path = parsed.path.rstrip("/").removesuffix(".git")
+    return urlunparse(
+        (
+            parsed.scheme.lower(),
+            parsed.netloc.lower(),
+            path,
+            parsed.params,
+            parsed.query,
+            "",
+        )
+    )
+
+
+class _RefCache:
+    """Process-wide cache of the references advertised by git remotes.
+
+    Each remote is listed at most once, also when multiple threads ask for it
+    at the same time. Failed listings aren't cached, except when the remote was
+    listed ahead of time by :meth:`GitRemote.prefetch_refs`: the error is then
+    raised once, instead of listing the remote again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._locks: dict[str, threading.Lock] = {}
+        self._refs: dict[str, _AdvertisedRefs] = {}
+        self._errors: dict[str, Exception] = {}
+
+    def get(
+        self, remote: str, list_refs: Callable[[str], _AdvertisedRefs]
+    ) -> _AdvertisedRefs:
+        """Get the refs of *remote*, calling *list_refs* if they aren't known yet."""
+        key = normalize_remote_url(remote)
+        with self._lock:
+            remote_lock = self._locks.setdefault(key, threading.Lock())
+        with remote_lock:
+            if key not in self._refs:
+                error = self._errors.pop(key, None)
+                if error:
+                    raise error
+                self._refs[key] = list_refs(remote)
+            return self._refs[key]
+
+    def knows(self, remote: str) -> bool:
+        """Check if the refs of *remote* are known."""
+        return normalize_remote_url(remote) in self._refs
+
+    def add(self, remote: str, result: _AdvertisedRefs | Exception) -> None:
+        """Remember the refs of *remote*, or the error listing them."""
+        key = normalize_remote_url(remote)
+        with self._lock:
+            if isinstance(result, Exception):
+                self._errors[key] = result
+            else:
+                self._refs[key] = result
+
+    def clear(self) -> None:
+        """Forget all remotes."""
+        with self._lock:
+            self._locks.clear()
+            self._refs.clear()
+            self._errors.clear()
+
+
+_REF_CACHE = _RefCache()
+register_run_cache(_REF_CACHE.clear)
+_USER_REF_CACHE = RemoteCache("git-refs")
+
+
+class GitRemote:
+    """A remote git repo."""
+
+    def __init__(self, remote: str) -> None:
+        """Create a git remote repo."""
+        self._remote = remote
+
+    @staticmethod
+    def clear_ref_cache() -> None:
+        """Forget the references of all remotes listed so far."""
+        _REF_CACHE.clear()
+
+    def is_git(self) -> bool:
+        """Check if the set url is git."""
+        if self._remote.endswith(".git"):
+            return True
+
+        try:
+            self._ls_remote(self._remote)
+            return True
+        except SubprocessCommandError as exc:
+            return self._handle_ls_remote_error(exc)
+        except RuntimeError:
+            return False
+
+    def _handle_ls_remote_error(self, exc: SubprocessCommandError) -> bool:
+        """Determine whether a failed git ls-remote still implies a git remote.
+
+        Raises RuntimeError for unrecoverable errors (host unreachable).
+        Returns True when the server responded but auth is needed.
+        Returns False when the failure is unrelated to git.
+        """
+        if exc.returncode == 128 and "Could not resolve host" in exc.stderr:
+            raise RuntimeError(
+                f">>>{exc.cmd}<<< failed!\n"
+                + f"'{self._remote}' is not a valid URL or unreachable:\n{exc.stderr or exc.stdout}"
+            ) from exc
+        # git/git:http.c — emitted when the server redirects to a login page
+        if "unable to update url base from redirection" in exc.stderr:
+            redirect_match = re.search(r"redirect:\s+(\S+)", exc.stderr)
+            raw_url = redirect_match.group(1) if redirect_match else ""
+            parsed = urlparse(raw_url)
+            safe_url = urlunparse(
+                (parsed.scheme, parsed.netloc, parsed.path, "", "", "")
+            )
+            logger.debug(
+                "'%s' appears to be a git remote but was redirected to '%s' — "
+                "authentication may be required",
+                self._remote,
+                safe_url or "unknown",
+            )
+            return True
+        # git/git:credential.c — emitted when GIT_TERMINAL_PROMPT=0 and server returns 401
+        if (
+            "terminal prompts disabled" in exc.stderr
+            or "could not read Username" in exc.stderr
+        ):
+            logger.debug(
+                "'%s' appears to be a git remote but requires credentials",
+                self._remote,
+            )
+            return True
+        return False
+
+    def last_sha_on_branch(self, branch: str) -> str:
+        """Get the last sha of a branch."""
+        return self._find_sha_of_branch_or_tag(self._ls_remote(self._remote), branch)
+
+    def find_branch_tip_or_tag_from_sha(self, sha: str) -> tuple[str, str]:
+        """Find branch or tag from sha."""
+        return self._find_branch_tip_or_tag_from_sha(self._ls_remote(self._remote), sha)
+
+    def list_of_tags(self) -> list[str]:
+        """Get list of all available tags."""
+        info = self._ls_remote(self._remote)
+
+        return [
+            reference.replace("refs/tags/", "")
+            for reference, _ in info.items()
+            if reference.startswith("refs/tags/")
+        ]
+
+    def list_of_branches(self) -> list[str]:
+        """Get list of all available branches."""
+        info = self._ls_remote(self._remote)
+
+        return [
+            reference.replace("refs/heads/", "")
+            for reference, _ in info.items()
+            if reference.startswith("refs/heads/")
+        ]
+
+    def get_default_branch(self) -> str:
+        """Try to get the default branch or fallback to master."""
+        try:
+            head = self._advertised_refs(self._remote).head
+        except SubprocessCommandError:
+            logger.debug(
+                f"Failed determining default branch of {self._remote}, falling back to 'master'"
+            )
+            return "master"
+
+        if head:
+            return head
+
+        logger.debug(
+            f"Didn't find a HEAD branch in {self._remote}, falling back to 'master'"
+        )
+        return "master"
+
+    @staticmethod
+    def _ls_remote(remote: str) -> dict[str, str]:
+        """Get all branch tips and tags of *remote* with their sha."""
+        return GitRemote._advertised_refs(remote).refs
+
+    @staticmethod
+    def _advertised_refs(remote: str) -> _AdvertisedRefs:
+        """Get the references of *remote*, it is only listed once per run."""
+        return _REF_CACHE.get(remote, GitRemote._load_advertised_refs)
+
+    @staticmethod
+    def _load_advertised_refs(remote: str) -> _AdvertisedRefs:
+        """Get the references of *remote* from the user cache or the remote itself."""
+        if not is_network_url(remote):
+            return GitRemote._list_advertised_refs(remote)
+
+        key = normalize_remote_url(remote)
+        cached = _USER_REF_CACHE.get(key)
+        if isinstance(cached, dict):
+            logger.debug(f"Using cached references of {remote}")
+            return _AdvertisedRefs(
+                refs=dict(cached.get("refs", {})), head=str(cached.get("head", ""))
+            )
+
+        advertised = GitRemote._list_advertised_refs(remote)
+        _USER_REF_CACHE.put(key, {"refs": advertised.refs, "head": advertised.head})
+        return advertised
+
+    @staticmethod
+    async def prefetch_refs(remotes: Iterable[str], timeout: float = 60) -> None:
+        """List the references of all *remotes* at once, before they are needed.
+
+        The remotes are listed concurrently in the running event loop, limited by
+        :func:`dfetch.util.cmdline.concurrency_limit`. Remotes listed earlier in
+        this run or found in the user cache are skipped. A listing that fails is
+        reported later, by whoever needs the references. A listing that times
+        out is tried again then.
+        """
+        pending: dict[str, str] = {}
+        for remote in remotes:
+            key = normalize_remote_url(remote)
+            if key in pending or _REF_CACHE.knows(remote):
+                continue
+            if is_network_url(remote) and isinstance(_USER_REF_CACHE.get(key), dict):
+                continue
+            pending[key] = remote
+
+        async def _list(remote: str) -> None:
+            try:
+                result = await run_on_cmdline_async(
+                    logger,
+                    cmd=GitRemote._ls_remote_cmd(remote),
+                    env=non_interactive_env(),
+                    timeout=timeout,
+                )
+            except SubprocessCommandError as exc:
+                _REF_CACHE.add(remote, exc)
+                return
+            except RuntimeError as exc:
+                logger.debug(str(exc))
+                return
+            advertised = GitRemote._parse_advertised_refs(result.stdout.decode())
+            _REF_CACHE.add(remote, advertised)
+            if is_network_url(remote):
+                _USER_REF_CACHE.put(
+                    normalize_remote_url(remote),
+                    {"refs": advertised.refs, "head": advertised.head},
+                )
+
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        await asyncio.gather(*(_list(remote) for remote in pending.values()))
+
+    @staticmethod
+    def _ls_remote_cmd(remote: str) -> list[str]:
+        """Get the command listing branch tips, tags and the ``HEAD`` symref."""
+        return [
+            "git",
+            "ls-remote",
+            "--symref",
+            remote,
+            "HEAD",
+            "refs/heads/*",
+            "refs/tags/*",
+        ]
+
+    @staticmethod
+    def _list_advertised_refs(remote: str) -> _AdvertisedRefs:
+        """List branch tips, tags and the ``HEAD`` symref in one round-trip."""
+        result = run_on_cmdline(
+            logger,
+            cmd=GitRemote._ls_remote_cmd(remote),
+            env=non_interactive_env(),
+        ).stdout.decode()
+        return GitRemote._parse_advertised_refs(result)
+
+    @staticmethod
+    def _parse_advertised_refs(result: str) -> _AdvertisedRefs:
+        """Parse the output of ``git ls-remote --symref``."""
+        info: dict[str, str] = {}
+        head = ""
+        for line in filter(lambda x: x, result.split("\n")):
+            sha, _, ref = (part.strip() for part in line.partition("\t"))
+
+            if sha.startswith("ref:"):
+                if ref == "HEAD" and not head:
+                    head = sha.removeprefix("ref:").strip().removeprefix("refs/heads/")
+            elif not ref.startswith(("refs/heads/", "refs/tags/")):
+                continue
+            # Annotated tag commit (more important)
+            elif ref.endswith("^{}"):
+                info[ref.strip("^{}")] = sha
+            elif ref not in info:
+                info[ref] = sha
+        return _AdvertisedRefs(refs=info, head=head)
+
+    def fetch_for_tree_browse(self, target: str, version: str) -> None:
+        """Fetch just enough objects to support ``ls_tree`` on *version*.
+
+        Uses ``--no-checkout`` and ``--filter=blob:none`` so only tree objects
+        are transferred — no file contents are downloaded.
+        """
+        run_on_cmdline(logger, ["git", "-C", target, "init"])
+        run_on_cmdline(
+            logger,
+            [
+                "git",
+                "-C",
+                target,
+                "fetch",
+                "--depth=1",
+                "--filter=blob:none",
+                self._remote,
+                version,
+            ],
+            env=non_interactive_env(),
+        )
+
+    @contextlib.contextmanager
+    def browse_tree(
+        self, version: str = ""
+    ) -> Generator[Callable[[str], list[tuple[str, bool]]], None, None]:
+        """Shallow-clone the remote and yield a tree-listing callable.
+
+        The yielded callable accepts a path and returns ``(name, is_dir)`` pairs.
+        The clone is removed on context exit.
+        """
+        tmpdir = tempfile.mkdtemp(prefix="dfetch_browse_")
+        cloned = False
+        try:
+            self.fetch_for_tree_browse(tmpdir, version or self.get_default_branch())
+            cloned = True
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("Failed to fetch remote tree for '%s': %s", self._remote, e)
+
+        def ls(path: str = "") -> list[tuple[str, bool]]:
+            return GitRemote.ls_tree(tmpdir, path=path) if cloned else []
+
+        try:
+            yield ls
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    @staticmethod
+    def _parse_ls_tree_entry(line: str, prefix: str) -> tuple[str, bool]:
+        """Parse one ``git ls-tree`` output line into a ``(name, is_dir)`` pair."""
+        meta, name = line.split("\t", 1)
+        base = name[len(prefix) :] if prefix and name.startswith(prefix) else name
+        return base, meta.split()[1] == "tree"
+
+    @staticmethod
+    def ls_tree(local_path: str, path: str = "") -> list[tuple[str, bool]]:
+        """List the contents of the HEAD tree at *path* in a local clone.
+
+        Returns entries sorted with directories first (alphabetically),
+        then files (alphabetically).
+        """
+        cmd = ["git", "-C", local_path, "ls-tree", "FETCH_HEAD"]
+        if path:
+            cmd.append(path.rstrip("/") + "/")
+        try:
+            result = run_on_cmdline(logger, cmd=cmd)
+            prefix = (path.rstrip("/") + "/") if path else ""
+            entries = [
+                GitRemote._parse_ls_tree_entry(line, prefix)
+                for line in result.stdout.decode().splitlines()
+                if line.strip()
+            ]
+            entries.sort(key=lambda e: (not e[1], e[0]))  # dirs first, then files
+            return entries
+        except SubprocessCommandError:
+            return []
+
+    @staticmethod
+    def _find_sha_of_branch_or_tag(info: dict[str, str], branch_or_tag: str) -> str:
+        """Find SHA of a branch tip or tag."""
+        for reference, sha in info.items():
+            if reference in [
+                f"refs/heads/{branch_or_tag}",
+                f"refs/tags/{branch_or_tag}",
+            ]:
+                return sha
+        return ""
+
+    @staticmethod
+    def _find_branch_tip_or_tag_from_sha(
+        info: dict[str, str], rev: str
+    ) -> tuple[str, str]:
+        """Check all branch tips and tags and see if the sha is one of them."""
+        branch, tag = "", ""
+        if not rev:
+            return (branch, tag)
+        for reference, sha in info.items():
+            if sha.startswith(rev):  # Also allow for shorter SHA's
+                if reference.startswith("refs/tags/"):
+                    tag = reference.replace("refs/tags/", "")
+                elif reference.startswith("refs/heads/"):
+                    branch = reference.replace("refs/heads/", "")
+                break
+        return (branch, tag)
+
+    def check_version_exists(
+        self,
+        version: str,
+    ) -> bool:
+        """Check if a specific version exists on the remote by simulating a local checkout.
+
+        Args:
+            version (str): A target to checkout, can be branch, tag or sha
+
+        Returns:
+            exists: A bool indicating if the version is available on the remote.
+        """
+        temp_dir = tempfile.mkdtemp()
+        exists = False
+        run_on_cmdline(logger, ["git", "init"], cwd=temp_dir)
+        run_on_cmdline(
+            logger, ["git", "remote", "add", "origin", self._remote], cwd=temp_dir
+        )
+        run_on_cmdline(
+            logger, ["git", "checkout", "-b", "dfetch-local-branch"], cwd=temp_dir
+        )
+        try:
+            run_on_cmdline(
+                logger,
+                ["git", "fetch", "--dry-run", "--depth", "1", "origin", version],
+                env=non_interactive_env(),
+                cwd=temp_dir,
+            )
+            exists = True
+        except SubprocessCommandError as exc:
+            if exc.returncode != 128:
+                raise
+        finally:
+            safe_rm(temp_dir, within=Path(temp_dir).parent)
+
+        return exists
@@ -27,3 +27,4 @@ class CheckoutOptions:
     must_keeps: Sequence[str] | None = None
     ignore: Sequence[str] | None = None
     eol: str | None = None
+    shallow_submodules: bool = False
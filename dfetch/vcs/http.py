@@ -0,0 +1,293 @@
+"""Downloads over HTTP(S), keeping connections alive and resuming transfers.
+
+All requests of a run share the :data:`CONNECTION_POOL`, so requests to a host
+that was used before (another archive on the same server, or a redirect to a
+CDN) skip the TCP and TLS handshakes. A download that is interrupted is resumed
+with a ``Range`` request for the missing bytes.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import http.client
+import re
+import threading
+import urllib.parse
+from collections.abc import Generator
+from typing import BinaryIO
+
+from dfetch.log import get_logger
+
+logger = get_logger(__name__)
+
+MAX_REDIRECTS = 10
+MAX_RESUMES = 5
+
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections, shared by all archive projects in a run.
+
+    Idle connections are kept per host, so later requests to that host can
+    reuse them.
+    """
+
+    _MAX_IDLE_PER_HOST = 4
+
+    def __init__(self) -> None:
+        """Create a pool without connections."""
+        self._lock = threading.Lock()
+        self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+
+    @contextlib.contextmanager
+    def request(
+        self,
+        method: str,
+        parsed: urllib.parse.ParseResult,
+        headers: dict[str, str],
+        timeout: int,
+    ) -> Generator[http.client.HTTPResponse, None, None]:
+        """Send a request and yield its response.
+
+        When the response was read completely, the connection is kept for the
+        next request to the same host. A kept connection that the server closed
+        in the meantime is replaced by a new one.
+        """
+        key = (parsed.scheme, parsed.netloc)
+        conn, reused = self._acquire(key, timeout)
+        try:
+            resp = _send(conn, method, parsed, headers)
+        except (http.client.RemoteDisconnected, ConnectionError):
+            if not reused:
+                raise
+            conn = _http_conn(parsed.scheme, parsed.netloc, timeout=timeout)
+            resp = _send(conn, method, parsed, headers)
+        done = False
+        try:
+            yield resp
+            done = True
+        finally:
+            if not (done and self._release(key, conn, resp)):
+                conn.close()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    def _acquire(
+        self, key: tuple[str, str], timeout: int
+    ) -> tuple[http.client.HTTPConnection, bool]:
+        """Get an idle connection to the host of *key*, or a new one."""
+        with self._lock:
+            idle = self._idle.get(key, [])
+            conn = idle.pop() if idle else None
+        if conn is None:
+            return _http_conn(key[0], key[1], timeout=timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(
+        self,
+        key: tuple[str, str],
+        conn: http.client.HTTPConnection,
+        resp: http.client.HTTPResponse,
+    ) -> bool:
+        """Keep *conn* for later if the server allows it and *resp* is done."""
+        try:
+            if not resp.isclosed() and resp.length is not None and resp.length <= 65536:
+                resp.read()  # A small unread body (e.g. a redirect page)
+        except (OSError, http.client.HTTPException):
+            return False
+        if not resp.isclosed() or resp.will_close:
+            return False
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._MAX_IDLE_PER_HOST:
+                idle.append(conn)
+                return True
+        return False
+
+
+CONNECTION_POOL = ConnectionPool()
+
+
+@contextlib.contextmanager
+def http_get(
+    parsed: urllib.parse.ParseResult, headers: dict[str, str], timeout: int = 60
+) -> Generator[tuple[urllib.parse.ParseResult, http.client.HTTPResponse], None, None]:
+    """GET *parsed*, following redirects, and yield the final url and response.
+
+    Up to :data:`MAX_REDIRECTS` 3xx redirects are followed transparently
+    (e.g. GitHub archive URLs redirect to a CDN).
+
+    Raises:
+        RuntimeError: On a redirect without location or too many redirects.
+    """
+    url = parsed.geturl()
+    for _ in range(MAX_REDIRECTS + 1):
+        with CONNECTION_POOL.request("GET", parsed, headers, timeout) as resp:
+            if resp.status not in _REDIRECT_STATUSES:
+                yield parsed, resp
+                return
+            location = resp.getheader("Location", "")
+        if not location:
+            raise RuntimeError(
+                f"Redirect with no Location header from '{parsed.geturl()}'"
+            )
+        parsed = urllib.parse.urlparse(urllib.parse.urljoin(parsed.geturl(), location))
+    raise RuntimeError(f"Too many redirects when downloading '{url}'")
+
+
+def http_download(url: str, dest_path: str, algorithm: str | None = None) -> str | None:
+    """Download *url* to *dest_path*, optionally hashing it.
+
+    Each chunk is fed into the hasher during streaming, so the caller gets
+    the hash without an extra file read. An interrupted transfer is resumed
+    up to :data:`MAX_RESUMES` times with a ``Range`` request for the
+    missing bytes. If the server can't resume, or the resource changed in
+    the meantime (``If-Range``), the download starts over.
+
+    Raises:
+        RuntimeError: When the download failed.
+
+    Returns:
+        Hex digest when *algorithm* is given, else *None*.
+    """
+    parsed = urllib.parse.urlparse(url)
+    with open(dest_path, "wb") as dest:
+        transfer = Transfer(url, dest, algorithm)
+        for attempt in range(MAX_RESUMES + 1):
+            try:
+                with http_get(parsed, transfer.headers()) as (_, resp):
+                    if transfer.accept(resp):
+                        transfer.receive(resp)
+                        return transfer.hex_digest()
+            except (OSError, http.client.HTTPException) as exc:
+                if not transfer.received or attempt == MAX_RESUMES:
+                    raise RuntimeError(
+                        f"'{url}' is not a valid URL or unreachable: {exc}"
+                    ) from exc
+                logger.debug(
+                    f"Download of {url} interrupted after "
+                    f"{transfer.received} bytes ({exc}), resuming"
+                )
+    raise RuntimeError(f"Could not resume downloading '{url}'")
+
+
+class Transfer:
+    """State of a (possibly resumed) download to a file."""
+
+    def __init__(self, url: str, dest: BinaryIO, algorithm: str | None) -> None:
+        """Create a transfer of *url* writing to the opened file *dest*."""
+        self._url = url
+        self._file = dest
+        self._algorithm = algorithm
+        self._hasher = hashlib.new(algorithm) if algorithm else None
+        self._validator = ""
+        self.received = 0
+
+    def headers(self) -> dict[str, str]:
+        """Request headers to continue after the bytes received so far."""
+        if not self.received:
+            return {}
+        headers = {"Range": f"bytes={self.received}-"}
+        if self._validator:
+            headers["If-Range"] = self._validator
+        return headers
+
+    def accept(self, resp: http.client.HTTPResponse) -> bool:
+        """Check if *resp* can be used, starting over if it is the full resource.
+
+        Raises:
+            RuntimeError: When the server responds with an error.
+
+        Returns:
+            False when the request must be sent again.
+        """
+        if self.received and resp.status in (206, 416):
+            return self._accept_partial(resp)
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status} when downloading '{self._url}'")
+        if self.received:
+            logger.debug("Server can't resume the download, starting over")
+            self._restart()
+        self._validator = _validator(resp)
+        return True
+
+    def receive(self, resp: http.client.HTTPResponse) -> None:
+        """Write the body of *resp* to the file, updating the hash for each chunk."""
+        while chunk := resp.read(65536):
+            self._file.write(chunk)
+            if self._hasher:
+                self._hasher.update(chunk)
+            self.received += len(chunk)
+        if resp.length:  # http.client stops silently when the connection drops
+            raise http.client.IncompleteRead(b"", resp.length)
+
+    def hex_digest(self) -> str | None:
+        """Hex digest of the received bytes, if a hash was requested."""
+        return self._hasher.hexdigest() if self._hasher else None
+
+    def _accept_partial(self, resp: http.client.HTTPResponse) -> bool:
+        """Accept a partial response continuing the transfer, else start over."""
+        if resp.status == 206 and _content_range_start(resp) == self.received:
+            return True
+        self._restart()
+        return False
+
+    def _restart(self) -> None:
+        self._file.seek(0)
+        self._file.truncate()
+        self._hasher = hashlib.new(self._algorithm) if self._algorithm else None
+        self._validator = ""
+        self.received = 0
+
+
+def _send(
+    conn: http.client.HTTPConnection,
+    method: str,
+    parsed: urllib.parse.ParseResult,
+    headers: dict[str, str],
+) -> http.client.HTTPResponse:
+    """Send a request on *conn* and get the response, closing *conn* on failure."""
+    try:
+        conn.request(method, _resource_path(parsed), headers=headers)
+        return conn.getresponse()
+    except BaseException:
+        conn.close()
+        raise
+
+
+def _http_conn(scheme: str, netloc: str, timeout: int) -> http.client.HTTPConnection:
+    """Return an :class:`http.client.HTTPConnection` or HTTPS variant for *netloc*."""
+    if scheme == "https":
+        return http.client.HTTPSConnection(netloc, timeout=timeout)
+    return http.client.HTTPConnection(netloc, timeout=timeout)
+
+
+def _resource_path(parsed: urllib.parse.ParseResult) -> str:
+    """Return the path + query portion of *parsed* suitable for HTTP requests."""
+    path = parsed.path or "/"
+    return f"{path}?{parsed.query}" if parsed.query else path
+
+
+def _validator(resp: http.client.HTTPResponse) -> str:
+    """Get the strong ``ETag`` or ``Last-Modified`` of *resp*, for ``If-Range``."""
+    etag = resp.getheader("ETag", "")
+    return (etag if etag and not etag.startswith("W/") else "") or resp.getheader(
+        "Last-Modified", ""
+    )
+
+
+def _content_range_start(resp: http.client.HTTPResponse) -> int | None:
+    """Get the first byte of a partial response (``Content-Range: bytes 10-99/100``)."""
+    match = re.match(r"bytes\s+(\d+)-", resp.getheader("Content-Range", ""))
+    return int(match.group(1)) if match else None
@@ -6,6 +6,8 @@ import copy
 import datetime
 import difflib
 import hashlib
+import io
+import posixpath
 import re
 import stat
 from collections.abc import Sequence
@@ -87,22 +89,27 @@ class Patch:
         return Patch.from_bytes(data.encode("UTF-8"))
 
     @staticmethod
-    def _unified_diff_new_file(path: Path) -> list[str]:
+    def _unified_diff_new_file(path: Path, name: str | Path) -> list[str]:
         """Create a unified diff for a new file."""
         with path.open("r", encoding="utf-8", errors="replace") as new_file:
             lines = new_file.readlines()
 
         return list(
             difflib.unified_diff(
-                [], lines, fromfile="/dev/null", tofile=str(path), lineterm="\n"
+                [], lines, fromfile="/dev/null", tofile=str(name), lineterm="\n"
             )
         )
 
     @staticmethod
-    def _for_new_file(file_path: str | Path, patch_type: PatchType) -> Patch:
-        """Create a patch for a new untracked file, preserving file mode."""
-        path = Path(file_path)
-        diff = Patch._unified_diff_new_file(path)
+    def _for_new_file(
+        file_path: str | Path, patch_type: PatchType, root: str | Path = "."
+    ) -> Patch:
+        """Create a patch for a new untracked file, preserving file mode.
+
+        The *file_path* is relative to *root* and is used as-is in the patch.
+        """
+        path = Path(root) / file_path
+        diff = Patch._unified_diff_new_file(path, file_path)
 
         if not diff:
             return Patch.empty().convert_type(patch_type)
@@ -127,12 +134,14 @@ class Patch:
 
     @staticmethod
     def for_new_files(
-        file_paths: list[str] | list[Path], patch_type: PatchType
+        file_paths: list[str] | list[Path],
+        patch_type: PatchType,
+        root: str | Path = ".",
     ) -> Patch:
-        """Create a patch for multiple new files."""
+        """Create a patch for multiple new files, relative to *root*."""
         patch: Patch | None = None
         for file in file_paths:
-            new_patch = Patch._for_new_file(file, patch_type)
+            new_patch = Patch._for_new_file(file, patch_type, root)
             if not new_patch.is_empty():
                 if patch is None:
                     patch = new_patch
@@ -157,12 +166,11 @@ class Patch:
 
     def apply(self, root: str = ".", fuzz: bool = True) -> PatchResult:
         """Apply this patch to a filesystem root."""
-        if not self._patchset.apply(strip=0, root=root, fuzz=fuzz):
-            raise RuntimeError(
-                f'Applying patch "{self.path or "<inline patch>"}" failed'
-            )
-
-        return self._result
+        stack = PatchStack(root)
+        try:
+            return stack.apply(self, fuzz=fuzz)
+        finally:
+            stack.write()
 
     def dump(self) -> str:
         """Serialize patch back to unified diff text."""
@@ -311,6 +319,287 @@ class Patch:
         return self
 
 
+class PatchStack:
+    """Apply several patches to files kept in memory, writing each file once.
+
+    The patches are applied in order, each one sees the changes of the patches
+    before it. A file is read when a patch first needs it and is only written
+    (or removed) by :meth:`write`, so a file touched by many patches is written
+    once. Files are matched and reported like patch_ng does: a file that cannot
+    be patched fails its patch, the changes to the other files are kept.
+    """
+
+    def __init__(self, root: str | Path = ".") -> None:
+        """Create a stack applying patches relative to *root*."""
+        self._root = Path(root)
+        self._read: dict[str, bytes] = {}
+        self._changed: dict[str, bytes | None] = {}
+        self._modes: dict[str, int] = {}
+
+    def apply(self, patch: Patch, fuzz: bool = True) -> PatchResult:
+        """Apply *patch* on top of the patches applied before.
+
+        Raises:
+            RuntimeError: When a file of the patch could not be patched.
+        """
+        patchset = patch._patchset  # pylint: disable=protected-access
+        errors = 0
+        changes = []
+        for item in patchset.items:
+            operation_errors = self._apply_file_operation(patchset, item)
+            if operation_errors is None:
+                changes.append(item)
+            else:
+                errors += operation_errors
+
+        for i, item in enumerate(changes):
+            errors += self._patch_file(patchset, item, f"{i + 1}/{len(changes)}", fuzz)
+
+        if errors:
+            raise RuntimeError(
+                f'Applying patch "{patch.path or "<inline patch>"}" failed'
+            )
+        return patch._result  # pylint: disable=protected-access
+
+    def write(self) -> None:
+        """Write all files changed by the applied patches."""
+        for key, content in self._changed.items():
+            path = self._root / key
+            if content is None:
+                if path.exists():
+                    patch_ng.safe_unlink(path)
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            if key in self._modes:
+                try:
+                    path.chmod(self._modes[key])
+                except OSError as exc:
+                    patch_ng.warning(f"Could not set filemode for {path}: {exc}")
+        self._read.clear()
+        self._changed.clear()
+        self._modes.clear()
+
+    def _apply_file_operation(
+        self, patchset: patch_ng.PatchSet, item: patch_ng.Patch
+    ) -> int | None:
+        """Create, delete or rename the file of *item* and get the number of errors.
+
+        Returns:
+            None when *item* changes the content of a file instead.
+        """
+        source = patchset.decode_clean(item.source, "a/")
+        target = patchset.decode_clean(item.target, "b/")
+        if "dev/null" in source:
+            self._changed[_key(target)] = b"".join(
+                line[1:] for hunk in item.hunks[:1] for line in hunk.text
+            )
+            self._set_mode(target, item.filemode)
+        elif "dev/null" in target:
+            if not self._exists(source):
+                patch_ng.error(f"file to delete does not exist - {item.source!s}")
+                return 1
+            self._changed[_key(source)] = None
+        elif item.mode == "rename":
+            if self._exists(source):
+                self._move(source, target)
+                self._set_mode(target, item.filemode)
+        else:
+            return None
+        return 0
+
+    def _patch_file(
+        self,
+        patchset: patch_ng.PatchSet,
+        item: patch_ng.Patch,
+        position: str,
+        fuzz: bool,
+    ) -> int:
+        """Apply the hunks of *item* in memory and get the number of errors."""
+        name = self._find(item.source, item.target)
+        if name is None:
+            patch_ng.error(
+                "source/target file does not exist:\n"
+                f"  --- {item.source!s}\n  +++ {item.target!s}"
+            )
+            return 1
+        content = self._content(name.decode("utf-8"))
+        if content is None:
+            patch_ng.error(f"not a file - {name!s}")
+            return 1
+
+        canpatch, validhunks, errors = _check_hunks(
+            content, item.hunks, position, name, fuzz
+        )
+        if validhunks < len(item.hunks):
+            if _match_file_hunks(content, item.hunks):
+                patch_ng.warning(f"already patched  {name!s}")
+            elif fuzz:
+                patch_ng.warning(f"source file is different - {name!s}")
+            else:
+                patch_ng.error(f"source file is different - {name!s}")
+                errors += 1
+        if canpatch:
+            key = _key(name.decode("utf-8"))
+            self._changed[key] = b"".join(
+                patchset.patch_stream(io.BytesIO(content), item.hunks)
+            )
+            self._set_mode(key, item.filemode)
+            patch_ng.info(f"successfully patched {position}:\t {name!s}")
+        return errors
+
+    def _find(self, old: bytes, new: bytes) -> bytes | None:
+        """Find the file to patch, like patch_ng looks for it."""
+        candidates = [old, new]
+        if old.startswith(b"a/") and new.startswith(b"b/"):
+            candidates += [old[2:], new[2:]]
+        return next(
+            (name for name in candidates if self._exists(name.decode("utf-8"))), None
+        )
+
+    def _exists(self, path: str) -> bool:
+        """Check if *path* exists with the patches applied so far."""
+        key = _key(path)
+        if key in self._changed:
+            return self._changed[key] is not None
+        return (self._root / key).exists()
+
+    def _content(self, path: str) -> bytes | None:
+        """Get the content of *path* with the patches applied so far."""
+        key = _key(path)
+        if key in self._changed:
+            return self._changed[key]
+        if key not in self._read:
+            if not (self._root / key).is_file():
+                return None
+            self._read[key] = (self._root / key).read_bytes()
+        return self._read[key]
+
+    def _move(self, source: str, target: str) -> None:
+        """Move *source* to *target*, keeping its file mode."""
+        source_key, target_key = _key(source), _key(target)
+        content = self._content(source)
+        if content is None:
+            return
+        mode = self._modes.pop(source_key, None)
+        if mode is None:
+            mode = stat.S_IMODE((self._root / source_key).stat().st_mode)
+        self._changed[source_key] = None
+        self._changed[target_key] = content
+        self._modes[target_key] = mode
+
+    def _set_mode(self, path: str, filemode: int | None) -> None:
+        """Remember the mode *filemode* of a regular file for writing *path*."""
+        if filemode is not None and stat.S_ISREG(filemode):
+            self._modes[_key(path)] = filemode & 0o777
+
+
+def _key(path: str) -> str:
+    """Normalize a path in a patch for looking it up."""
+    return posixpath.normpath(path.replace("\\", "/"))
+
+
+def _check_hunks(
+    content: bytes,
+    hunks: list[patch_ng.Hunk],
+    position: str,
+    name: bytes,
+    fuzz: bool,
+) -> tuple[bool, int, int]:
+    """Check the *hunks* against *content*, reporting mismatches like patch_ng.
+
+    Returns:
+        If the hunks can be applied, the number of valid hunks and of errors.
+    """
+    hunkno = validhunks = hunklineno = 0
+    hunkfind: list[bytes] = []
+    for lineno, line in enumerate(io.BytesIO(content), start=1):
+        # Once past the last hunk, the lines are still compared with it
+        hunk = hunks[min(hunkno, len(hunks) - 1)]
+        if lineno < hunk.startsrc:
+            continue
+        if lineno == hunk.startsrc:
+            hunkfind = _source_lines(hunk)
+            hunklineno = 0
+
+        if lineno < hunk.startsrc + len(hunkfind):
+            actual = line.rstrip(b"\r\n")
+            if actual != hunkfind[hunklineno]:
+                _report_mismatch(
+                    f"{position}:\t {name!s}",
+                    hunkno,
+                    lineno,
+                    hunkfind[hunklineno],
+                    actual,
+                )
+                if not fuzz:
+                    # The file may already be patched, check the other hunks
+                    hunkno += 1
+                    if hunkno == len(hunks):
+                        break
+                    continue
+            hunklineno += 1
+
+        # patch_ng considers a hunk ready one line before its last line
+        if _is_hunk_ready(hunk, hunkfind, lineno):
+            hunkno += 1
+            validhunks += 1
+            if validhunks == len(hunks):
+                return True, validhunks, 0
+    return False, validhunks, _premature_end(name, hunkno, len(hunks))
+
+
+def _source_lines(hunk: patch_ng.Hunk) -> list[bytes]:
+    """Get the lines *hunk* expects in the source file, without line endings."""
+    return [x[1:].rstrip(b"\r\n") for x in hunk.text if x[0] in b" -"]
+
+
+def _report_mismatch(
+    file: str, hunkno: int, lineno: int, expected: bytes, actual: bytes
+) -> None:
+    """Warn that line *lineno* of *file* doesn't match hunk *hunkno*, like patch_ng."""
+    patch_ng.warning(f"file {file}")
+    patch_ng.warning(
+        f" hunk no.{hunkno + 1} doesn't match source file at line {lineno}"
+    )
+    patch_ng.warning(f"  expected: {expected!s}")
+    patch_ng.warning(f"  actual  : {actual!s}")
+
+
+def _is_hunk_ready(hunk: patch_ng.Hunk, hunkfind: list[bytes], lineno: int) -> bool:
+    """Check if *hunk*, matching the source lines *hunkfind*, is checked at *lineno*."""
+    return not hunkfind or lineno == hunk.startsrc + len(hunkfind) - 1
+
+
+def _premature_end(name: bytes, hunkno: int, count: int) -> int:
+    """Report the end of file *name* before hunk *hunkno* of *count*, get the errors."""
+    if hunkno < count:
+        patch_ng.error(f"premature end of source file {name!s} at hunk {hunkno + 1}")
+        return 1
+    return 0
+
+
+def _match_file_hunks(content: bytes, hunks: list[patch_ng.Hunk]) -> bool:
+    """Check if *content* already has the *hunks* applied."""
+    lines = io.BytesIO(content)
+    lineno = 1
+    line = lines.readline()
+    for hunk in hunks:
+        while lineno < hunk.starttgt:
+            if not line:
+                return False
+            line = lines.readline()
+            lineno += 1
+        for hline in hunk.text:
+            if hline.startswith(b"-"):
+                continue
+            if not line or line.rstrip(b"\r\n") != hline[1:].rstrip(b"\r\n"):
+                return False
+            line = lines.readline()
+            lineno += 1
+    return True
+
+
 def _git_mode(path: Path) -> str:
     if path.is_symlink():
         return "120000"
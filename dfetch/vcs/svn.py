@@ -1,27 +1,91 @@
 """Svn repository."""
 
 import contextlib
+import datetime
 import fnmatch
 import functools
 import os
 import pathlib
 import posixpath
 import re
-from collections.abc import Callable, Generator, Mapping, Sequence
+import xml.etree.ElementTree as ET  # nosec B405
+from collections.abc import Callable, Generator, Iterable, Mapping, Sequence
 from pathlib import Path
 from types import MappingProxyType
 from typing import NamedTuple
-from urllib.parse import urlparse
+from urllib.parse import unquote, urlparse
 
 from dfetch.log import get_logger
+from dfetch.util.cache import (
+    ImmutableCache,
+    RemoteCache,
+    is_network_url,
+    register_run_cache,
+)
 from dfetch.util.cmdline import SubprocessCommandError, run_on_cmdline
-from dfetch.util.util import in_directory
 from dfetch.vcs.patch import Patch, PatchType
 
 logger = get_logger(__name__)
 
 _SSH_HOST_KEY_MSGS = ("host key verification failed", "authenticity of host")
 
+_SVN_INFO_CACHE = RemoteCache("svn-info")
+
+# Info of remote targets asked during this run, by target without trailing slash
+_INFO_IN_RUN: dict[str, dict[str, str]] = {}
+register_run_cache(_INFO_IN_RUN.clear)
+
+# Listings and externals of remotes at a fixed revision, these never change
+_REVISION_CACHE = ImmutableCache("svn-revisions")
+
+# Number of targets asked for in a single ``svn info``, to keep the command short
+_INFO_BATCH_SIZE = 50
+
+# Keys of the plain ``svn info`` output, with the path of the element of an
+# ``svn info --xml`` entry holding the value and its attribute (None for its text)
+_XML_INFO_FIELDS: tuple[tuple[str, str, str | None], ...] = (
+    ("Path", ".", "path"),
+    ("URL", "url", None),
+    ("Relative URL", "relative-url", None),
+    ("Repository Root", "repository/root", None),
+    ("Repository UUID", "repository/uuid", None),
+    ("Revision", ".", "revision"),
+    ("Node Kind", ".", "kind"),
+    ("Last Changed Author", "commit/author", None),
+    ("Last Changed Rev", "commit", "revision"),
+    ("Last Changed Date", "commit/date", None),
+)
+
+
+def _xml_entry_info(entry: ET.Element) -> dict[str, str]:
+    """Get the info of an ``svn info --xml`` *entry*, as plain ``svn info`` shows it."""
+    info: dict[str, str] = {}
+    for key, path, attribute in _XML_INFO_FIELDS:
+        element = entry.find(path)
+        if element is None:
+            continue
+        value = element.get(attribute, "") if attribute else element.text
+        if attribute or value:
+            info[key] = value or ""
+    if info.get("Node Kind") == "dir":
+        info["Node Kind"] = "directory"
+    if "Last Changed Date" in info:
+        info["Last Changed Date"] = _plain_svn_date(info["Last Changed Date"])
+    return info
+
+
+def _plain_svn_date(xml_date: str) -> str:
+    """Convert an ISO 8601 date of ``svn info --xml`` to the local time plain ``svn info`` shows.
+
+    For example ``2021-02-06T12:57:00.000000Z`` becomes
+    ``2021-02-06 13:57:00 +0100 (Sat, 06 Feb 2021)`` in central Europe.
+    """
+    try:
+        date = datetime.datetime.fromisoformat(xml_date.replace("Z", "+00:00"))
+    except ValueError:
+        return xml_date
+    return date.astimezone().strftime("%Y-%m-%d %H:%M:%S %z (%a, %d %b %Y)")
+
 
 class SshHostKeyError(RuntimeError):
     """Raised when SVN cannot connect due to an untrusted SSH host key."""
@@ -64,7 +128,9 @@ def _raise_if_ssh_host_key_error(url: str, exc: SubprocessCommandError) -> None:
     ) from exc
 
 
-def _run_svn_raw(args: list[str], *, url: str = "") -> bytes:
+def _run_svn_raw(
+    args: list[str], *, url: str = "", cwd: str | pathlib.Path | None = None
+) -> bytes:
     """Run an svn subcommand and return raw stdout bytes.
 
     Uses --non-interactive and the non-interactive SSH env on every call.
@@ -76,6 +142,7 @@ def _run_svn_raw(args: list[str], *, url: str = "") -> bytes:
             logger,
             ["svn", "--non-interactive"] + args,
             env=_extend_env_for_non_interactive_mode(),
+            cwd=cwd,
         )
         return bytes(result.stdout)
     except SubprocessCommandError as exc:
@@ -83,9 +150,72 @@ def _run_svn_raw(args: list[str], *, url: str = "") -> bytes:
         raise
 
 
-def _run_svn(args: list[str], *, url: str = "") -> str:
+def _run_svn(
+    args: list[str], *, url: str = "", cwd: str | pathlib.Path | None = None
+) -> str:
     """Run an svn subcommand and return decoded stdout (see _run_svn_raw)."""
-    return _run_svn_raw(args, url=url).decode()
+    return _run_svn_raw(args, url=url, cwd=cwd).decode()
+
+
+def _ls(url: str, revision: str = "", location: str = "") -> str:
+    """List *url* with ``svn ls``, at *revision* if given.
+
+    The listing of a remote at a revision never changes, it is kept in the user
+    cache under the *location* of *url* (see :func:`_repository_location`).
+    """
+    target = f"{url}@{revision}" if revision else url
+    key = f"ls {location}@{revision}" if revision and location else ""
+    if key:
+        cached = _REVISION_CACHE.get(key)
+        if isinstance(cached, str):
+            logger.debug(f"Using cached listing of {target}")
+            return cached
+
+    output = _run_svn(["ls", target], url=url)
+    if key:
+        _REVISION_CACHE.put(key, output)
+    return output
+
+
+def _last_change(url: str) -> tuple[str, str]:
+    """Get the revision a remote *url* last changed in and its location, "" if unknown.
+
+    Both come from :meth:`SvnRepo.get_info_from_target`, which remembers the info
+    for this run and in the user cache. For the ``tags`` of projects pinned to a
+    tag it was already asked by :meth:`SvnRepo.prefetch_info`, otherwise this is
+    one ``svn info`` before listing a fixed revision that may come from the cache.
+    """
+    if not is_network_url(url):
+        return "", ""
+    try:
+        info = SvnRepo.get_info_from_target(url)
+    except SshHostKeyError:
+        raise
+    except (SubprocessCommandError, RuntimeError):
+        return "", ""
+    return info.get("Last Changed Rev", ""), _repository_location(info)
+
+
+def _repository_location(info: Mapping[str, str]) -> str:
+    """Get the uuid of the repository and the path in it of a target from its *info*.
+
+    These identify the target however the repository is reached (``svn://``,
+    ``https://`` or a mirror), so its data at a revision is cached only once.
+    Returns "" when the info doesn't tell.
+    """
+    uuid = info.get("Repository UUID", "")
+    root = info.get("Repository Root", "")
+    url = info.get("URL", "")
+    if not (uuid and root and url.startswith(root)):
+        return ""
+    return f"{uuid}{unquote(url[len(root):])}"
+
+
+def _workdir(path: str) -> str:
+    """Directory to run svn commands for *path* in, without changing directory."""
+    if os.path.isdir(path):
+        return path
+    return os.path.dirname(path) or "."
 
 
 def get_svn_version() -> tuple[str, str]:
@@ -177,7 +307,8 @@ class SvnRemote:
     def list_of_branches(self) -> list[str]:
         """List branch names from the ``branches/`` directory."""
         try:
-            output = _run_svn(["ls", f"{self._remote}/branches"], url=self._remote)
+            branches_url = f"{self._remote}/branches"
+            output = _ls(branches_url, *_last_change(branches_url))
             return [
                 line.strip("/\r") for line in output.splitlines() if line.strip("/\r")
             ]
@@ -189,7 +320,8 @@ class SvnRemote:
     def list_of_tags(self) -> list[str]:
         """Get list of all available tags."""
         try:
-            output = _run_svn(["ls", f"{self._remote}/tags"], url=self._remote)
+            tags_url = f"{self._remote}/tags"
+            output = _ls(tags_url, *_last_change(tags_url))
             return [str(tag).strip("/\r") for tag in output.split("\n") if tag]
         except SshHostKeyError:
             raise
@@ -205,6 +337,8 @@ class SvnRemote:
         Resolves *version* to the correct remote path (trunk,
         ``branches/<version>``, or ``tags/<version>``), then delegates
         directory listing to ``svn ls``.  The callable returns ``(name, is_dir)`` pairs.
+        The path is listed at the revision it last changed in, so listings seen
+        before come from the user cache.
         """
         version = version or SvnRepo.DEFAULT_BRANCH
         if version == SvnRepo.DEFAULT_BRANCH:
@@ -218,17 +352,25 @@ class SvnRemote:
                 raise
             except RuntimeError:
                 base_url = f"{self._remote}/tags/{version}"
+        revision, location = _last_change(base_url)
 
         def ls(path: str = "") -> list[tuple[str, bool]]:
             url = f"{base_url}/{path}" if path else base_url
-            return self.ls_tree(url)
+            return self.ls_tree(
+                url, revision, f"{location}/{path}" if location and path else location
+            )
 
         yield ls
 
-    def ls_tree(self, url_path: str) -> list[tuple[str, bool]]:
-        """List immediate children of *url_path* as ``(name, is_dir)`` pairs."""
+    def ls_tree(
+        self, url_path: str, revision: str = "", location: str = ""
+    ) -> list[tuple[str, bool]]:
+        """List immediate children of *url_path* (at *revision*) as ``(name, is_dir)`` pairs.
+
+        With the *location* of *url_path* in its repository, the listing is cached.
+        """
         try:
-            output = _run_svn(["ls", url_path], url=url_path)
+            output = _ls(url_path, revision, location)
             entries: list[tuple[str, bool]] = []
             for line in output.splitlines():
                 line = line.strip("\r")
@@ -258,8 +400,7 @@ class SvnRepo:
     def is_svn(self) -> bool:
         """Check if is SVN."""
         try:
-            with in_directory(self._path):
-                _run_svn(["info"])
+            _run_svn(["info"], cwd=_workdir(self._path))
             return True
         except SshHostKeyError:
             raise
@@ -286,36 +427,69 @@ class SvnRepo:
 
     def _inherited_auto_props(self, directory: str) -> str:
         """Get auto-props of the deepest existing versioned ancestor of *directory*."""
-        with in_directory(self._path):
-            for candidate in _self_and_ancestors(directory):
-                if not os.path.isdir(candidate):
-                    continue
-                try:
-                    result = _run_svn_raw(
-                        [
-                            "propget",
-                            "svn:auto-props",
-                            "--show-inherited-props",
-                            candidate,
-                        ]
-                    )
-                except SshHostKeyError:
-                    raise
-                except (SubprocessCommandError, RuntimeError):
-                    continue
-                return result.decode()
+        root = _workdir(self._path)
+        for candidate in _self_and_ancestors(directory):
+            if not os.path.isdir(os.path.join(root, candidate)):
+                continue
+            try:
+                result = _run_svn_raw(
+                    [
+                        "propget",
+                        "svn:auto-props",
+                        "--show-inherited-props",
+                        candidate,
+                    ],
+                    cwd=root,
+                )
+            except SshHostKeyError:
+                raise
+            except (SubprocessCommandError, RuntimeError):
+                continue
+            return result.decode()
         return ""
 
     def externals(self) -> list[External]:
         """Get list of externals."""
-        with in_directory(self._path):
-            output = _run_svn(["propget", "svn:externals", "-R"])
-            repo_root = SvnRepo.get_info_from_target()["Repository Root"]
-            return SvnRepo._parse_externals(output, repo_root, toplevel=self._path)
+        root = _workdir(self._path)
+        output = _run_svn(["propget", "svn:externals", "-R"], cwd=root)
+        repo_root = SvnRepo.get_info_from_target(root)["Repository Root"]
+        return SvnRepo._parse_externals(output, repo_root, toplevel=self._path)
 
     @staticmethod
     def externals_from_url(url: str, revision: str = "") -> list[External]:
-        """Get list of externals from a remote SVN URL."""
+        """Get list of externals from a remote SVN URL.
+
+        The externals of a remote at a revision never change, they are kept in the
+        user cache under the uuid of the repository and the path of *url* in it.
+        """
+        key = SvnRepo._externals_key(url, revision)
+        if key:
+            cached = _REVISION_CACHE.get(key)
+            if isinstance(cached, list):
+                with contextlib.suppress(TypeError):
+                    return [External(*external) for external in cached]
+
+        externals = SvnRepo._query_externals_from_url(url, revision)
+        if key:
+            _REVISION_CACHE.put(key, [list(external) for external in externals])
+        return externals
+
+    @staticmethod
+    def _externals_key(url: str, revision: str) -> str:
+        """Get the cache key of the externals of a remote *url* at *revision*, "" if none."""
+        if not revision or not is_network_url(url):
+            return ""
+        try:
+            location = _repository_location(SvnRepo.get_info_from_target(url))
+        except SshHostKeyError:
+            raise
+        except (SubprocessCommandError, RuntimeError):
+            return ""
+        return f"externals {location}@{revision}" if location else ""
+
+    @staticmethod
+    def _query_externals_from_url(url: str, revision: str) -> list[External]:
+        """Scan a remote SVN URL for externals with ``svn propget -R``."""
         extra = ["--revision", revision] if revision else []
         rev_suffix = f"@{revision}" if revision else ""
         logger.debug(
@@ -323,6 +497,8 @@ class SvnRepo:
             f"(may be slow for large repositories)"
         )
         output = _run_svn(["propget", "svn:externals", "-R"] + extra + [url], url=url)
+        if not output.strip():
+            return []
         repo_root = SvnRepo.get_info_from_target(url)["Repository Root"]
         normalized = SvnRepo._normalize_url_prefix(output, url)
         return SvnRepo._parse_externals(normalized, repo_root)
@@ -435,7 +611,105 @@ class SvnRepo:
 
     @staticmethod
     def get_info_from_target(target: str = "") -> dict[str, str]:
-        """Get the info of the given target."""
+        """Get the info of the given target.
+
+        The info of a remote reached over the network is kept for this run and
+        in the user cache, see also :meth:`prefetch_info`.
+        """
+        cacheable = is_network_url(target.strip())
+        if cacheable:
+            cached = SvnRepo._cached_info(target)
+            if cached is not None:
+                return cached
+
+        info = SvnRepo._query_info_from_target(target)
+        if cacheable:
+            SvnRepo._remember_info(target, info)
+        return info
+
+    @staticmethod
+    def _cached_info(target: str) -> dict[str, str] | None:
+        """Get the info of *target* asked for earlier, if any."""
+        key = target.strip().rstrip("/")
+        if key in _INFO_IN_RUN:
+            return _INFO_IN_RUN[key]
+        cached = _SVN_INFO_CACHE.get(key)
+        if not isinstance(cached, dict):
+            return None
+        logger.debug(f"Using cached info of {key}")
+        info = {str(name): str(value) for name, value in cached.items()}
+        _INFO_IN_RUN[key] = info
+        return info
+
+    @staticmethod
+    def _remember_info(target: str, info: dict[str, str]) -> None:
+        """Keep the *info* of *target* for this run and in the user cache."""
+        key = target.strip().rstrip("/")
+        _INFO_IN_RUN[key] = info
+        _SVN_INFO_CACHE.put(key, info)
+
+    @staticmethod
+    def prefetch_info(targets: Iterable[str]) -> None:
+        """Ask the info of many remote *targets* with as few ``svn info`` calls as possible.
+
+        The info is kept for this run and in the user cache, so
+        :meth:`get_info_from_target` finds it. Targets that fail are left out,
+        they fail again with a proper error when their info is asked for.
+        """
+        missing = list(
+            dict.fromkeys(
+                target.strip().rstrip("/")
+                for target in targets
+                if is_network_url(target.strip())
+                and SvnRepo._cached_info(target) is None
+            )
+        )
+        for start in range(0, len(missing), _INFO_BATCH_SIZE):
+            batch = missing[start : start + _INFO_BATCH_SIZE]
+            logger.debug(f"Asking info of {len(batch)} svn targets at once")
+            try:
+                output = _run_svn(["info", "--xml", *batch], url=batch[0])
+            except SshHostKeyError:
+                continue
+            except SubprocessCommandError as exc:
+                # Info of the targets that exist is still shown
+                output = exc.stdout
+            except RuntimeError as exc:
+                # E.g. svn is not installed, each project reports it
+                logger.debug(str(exc))
+                return
+            for target, info in SvnRepo._parse_xml_info(output, batch).items():
+                SvnRepo._remember_info(target, info)
+
+    @staticmethod
+    def _parse_xml_info(
+        output: str, targets: Sequence[str]
+    ) -> dict[str, dict[str, str]]:
+        """Parse ``svn info --xml`` output of *targets* into the keys of plain ``svn info``.
+
+        The entries are in the order of the targets, when some targets failed the
+        entries are matched to the targets by url.
+        """
+        try:
+            # The xml is produced by the local svn client from escaped values
+            root = ET.fromstring(output)  # nosec B314
+        except ET.ParseError:
+            return {}
+
+        infos = [_xml_entry_info(entry) for entry in root.iter("entry")]
+        if len(infos) == len(targets):
+            return dict(zip(targets, infos))
+
+        by_url = {unquote(info.get("URL", "")): info for info in infos}
+        return {
+            target: by_url[unquote(target)]
+            for target in targets
+            if unquote(target) in by_url
+        }
+
+    @staticmethod
+    def _query_info_from_target(target: str) -> dict[str, str]:
+        """Run ``svn info`` on the given target."""
         try:
             output = _run_svn(["info", target.strip()], url=target)
         except SubprocessCommandError as exc:
@@ -475,9 +749,9 @@ class SvnRepo:
 
     @staticmethod
     def untracked_files(path: str, ignore: Sequence[str]) -> list[str]:
-        """Get list of untracked files in the working copy."""
+        """Get list of untracked files in the working copy, relative to *path*."""
         files = []
-        for line in _run_svn(["status", path]).splitlines():
+        for line in _run_svn(["status", "."], cwd=_workdir(path)).splitlines():
             if line.startswith("?"):
                 file_path = line[1:].strip()
                 if not any(
@@ -525,8 +799,9 @@ class SvnRepo:
         if not pathlib.Path(path).exists():
             return []
 
-        with in_directory(path):
-            lines = _run_svn(["status", "--no-ignore", "."]).splitlines()
+        lines = _run_svn(
+            ["status", "--no-ignore", "."], cwd=_workdir(path)
+        ).splitlines()
 
         return [line[1:].strip() for line in lines if line.startswith("I")]
 
@@ -536,8 +811,7 @@ class SvnRepo:
         if not pathlib.Path(path).exists():
             raise RuntimeError("Path does not exist.")
 
-        with in_directory(path):
-            return bool(_run_svn(["status", "."]).splitlines())
+        return bool(_run_svn(["status", "."], cwd=_workdir(path)).splitlines())
 
     def create_diff(
         self,
@@ -556,8 +830,7 @@ class SvnRepo:
                 ]
             )
 
-        with in_directory(self._path):
-            patch_text = _run_svn_raw(cmd)
+        patch_text = _run_svn_raw(cmd, cwd=_workdir(self._path))
 
         if not patch_text.strip():
             return Patch.empty().convert_type(PatchType.SVN)
@@ -182,7 +182,7 @@ Feature: Checking dependencies from a git repository
             """
             Dfetch (0.14.3)
               non-existent-url:
-              > >>>git ls-remote --heads https://giiiiiidhub.com/i-do-not-exist/broken<<< failed!
+              > >>>git ls-remote --symref https://giiiiiidhub.com/i-do-not-exist/broken HEAD refs/heads/* refs/tags/*<<< failed!
                 'https://giiiiiidhub.com/i-do-not-exist/broken' is not a valid URL or unreachable:
                 fatal: unable to access 'https://giiiiiidhub.com/i-do-not-exist/broken/': Could not resolve host: giiiiiidhub.com
             """
@@ -233,7 +233,7 @@ Feature: Checking dependencies from a git repository
         Then the output starts with:
             """
             Dfetch (0.14.3)
-            >>>git ls-remote --heads --tags https://github.com/dfetch-org/test-repo-private.git<<< returned 128:
+            >>>git ls-remote --symref https://github.com/dfetch-org/test-repo-private.git HEAD refs/heads/* refs/tags/*<<< returned 128:
             """
 
     Scenario: SSH issues
@@ -250,7 +250,7 @@ Feature: Checking dependencies from a git repository
         Then the output starts with:
             """
             Dfetch (0.14.3)
-            >>>git ls-remote --heads --tags git@github.com:dfetch-org/test-repo-private.git<<< returned 128:
+            >>>git ls-remote --symref git@github.com:dfetch-org/test-repo-private.git HEAD refs/heads/* refs/tags/*<<< returned 128:
             """
 
     Scenario: Check with empty manifest does nothing
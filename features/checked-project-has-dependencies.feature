@@ -68,7 +68,6 @@ Feature: Check for dependencies in projects
         Then the output shows
             """
             Dfetch (0.14.3)
-            Multiple manifests found, using dfetch.yaml
               SomeProject:
               > up-to-date (v1)
 
@@ -112,7 +111,6 @@ Feature: Check for dependencies in projects
         Then the output shows
             """
             Dfetch (0.14.3)
-            Multiple manifests found, using dfetch.yaml
               SomeProject:
               > up-to-date (v1)
               SomeOtherProject:
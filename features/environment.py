@@ -1,6 +1,7 @@
 """General hooks for behave tests."""
 
 import os
+import shutil
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
@@ -57,3 +58,12 @@ def before_all(context):
     context.remotes_dir = "some-remote-server"
 
     os.environ["GIT_ALLOW_PROTOCOL"] = "file:http:https:ssh"
+
+    # Keep the cache of remote information away from the user's own cache
+    context.cache_dir = tempfile.mkdtemp(prefix="dfetch-cache-")
+    os.environ["DFETCH_CACHE_DIR"] = context.cache_dir
+
+
+def after_all(context):
+    """Hook called after all tests are run."""
+    shutil.rmtree(context.cache_dir, ignore_errors=True)
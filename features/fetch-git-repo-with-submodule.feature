@@ -249,3 +249,35 @@ Feature: Fetch projects with nested VCS dependencies
                     .dfetch_data.yaml
                     README.md
             """
+
+    Scenario: An ignored submodule is not fetched and the others are fetched shallow
+        Given the manifest 'dfetch.yaml' in MyProject
+            """
+            manifest:
+                version: 0.0
+                projects:
+                    - name: my-project-with-submodules
+                      url: some-remote-server/SomeInterestingProject.git
+                      shallow-submodules: true
+                      ignore:
+                        - ext/test-repo2
+            """
+        When I run "dfetch update"
+        Then the output shows
+            """
+            Dfetch (0.14.3)
+              my-project-with-submodules:
+              > Found & fetched submodule "./ext/test-repo1"  (some-remote-server/TestRepo.git @ master - 79698c99152e4a4b7b759c9def50a130bc91a2ff)
+              > Fetched master - e1fda19a57b873eb8e6ae37780594cbb77b70f1a
+            """
+        Then 'MyProject' looks like:
+            """
+            MyProject/
+                dfetch.yaml
+                my-project-with-submodules/
+                    .dfetch_data.yaml
+                    README.md
+                    ext/
+                        test-repo1/
+                            README.md
+            """
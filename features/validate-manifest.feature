@@ -141,3 +141,24 @@ Feature: Validate a manifest
             Schema validation failed:
             Duplicate manifest.projects.name value(s): ext/test-repo-rev-only
             """
+
+    Scenario: A manifest given on the command line is validated
+        Given the manifest 'dfetch.yaml'
+            """
+            manifest:
+              version: '0.0'
+            """
+        And the manifest 'deps.yaml' in config
+            """
+            manifest:
+              version: '0.0'
+              projects:
+                - name: ext/test-repo-rev-only
+                  url: https://github.com/dfetch-org/test-repo
+            """
+        When I run "dfetch --manifest config/deps.yaml validate"
+        Then the output shows
+            """
+            Dfetch (0.14.3)
+              config/deps.yaml    : valid
+            """
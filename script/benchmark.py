@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""Benchmark dfetch end-to-end, without network access.
+
+A farm of local remotes is created first: git repositories (with tags and
+optionally submodules), SVN repositories (when ``svnadmin`` is available) and
+tar/zip archives served by a local HTTP server. For every number of projects
+a manifest using these remotes is created and the time of ``dfetch update``,
+``check``, ``report -t sbom``, ``freeze`` and ``diff`` is measured.
+
+The results are written as json. When a baseline from an earlier run is given,
+the script fails if a command became slower than the allowed threshold:
+
+.. code-block:: bash
+
+    python script/benchmark.py --projects 10 100 --output new.json \\
+        --baseline old.json --threshold 0.25
+"""
+
+import argparse
+import contextlib
+import functools
+import http.server
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess  # nosec
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from collections.abc import Generator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger("benchmark")
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+
+KINDS = ("git", "svn", "archive")
+
+# Differences below this number of seconds are considered noise
+MIN_REGRESSION_SECONDS = 0.05
+
+_GIT_ENV = {
+    "GIT_AUTHOR_NAME": "dfetch benchmark",
+    "GIT_AUTHOR_EMAIL": "benchmark@dfetch.invalid",
+    "GIT_COMMITTER_NAME": "dfetch benchmark",
+    "GIT_COMMITTER_EMAIL": "benchmark@dfetch.invalid",
+    "GIT_ALLOW_PROTOCOL": "file:http:https:ssh",
+}
+
+
+@dataclass
+class FarmOptions:
+    """Shape of the remotes in the fixture farm."""
+
+    files: int
+    file_size: int
+    tags: int
+    submodules: int
+
+
+@dataclass
+class Remote:
+    """A remote in the fixture farm, usable as a project in a manifest."""
+
+    name: str
+    kind: str
+    url: str
+    tag: str = ""
+
+
+def _run(cmd: Sequence[str], cwd: Path | str | None = None) -> None:
+    """Run a command of the fixture farm, only showing its output on errors."""
+    subprocess.run(  # nosec
+        list(cmd),
+        cwd=cwd,
+        env={**os.environ, **_GIT_ENV},
+        check=True,
+        capture_output=True,
+    )
+
+
+def _write_tree(root: Path, options: FarmOptions, seed: str) -> None:
+    """Write *options.files* files spread over a few directories."""
+    for index in range(options.files):
+        path = root / f"dir{index % 4}" / f"file{index}.c"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        line = f"/* {seed} {index} */\n"
+        path.write_text(line * max(1, options.file_size // len(line)))
+    (root / "README.md").write_text(f"# {seed}\n")
+
+
+class FixtureFarm:
+    """Creates local remotes of every kind."""
+
+    def __init__(self, root: Path, options: FarmOptions, base_url: str) -> None:
+        """Create the farm in *root*, archives are served from *base_url*."""
+        self.root = root
+        self.options = options
+        self.base_url = base_url
+        self.archive_dir = root / "archives"
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self._submodules: list[str] = []
+
+    def kinds(self, requested: Sequence[str]) -> list[str]:
+        """Get the requested kinds of remotes that can be created here."""
+        kinds = list(requested)
+        if "svn" in kinds and not shutil.which("svnadmin"):
+            logger.warning("svnadmin not found, no SVN projects are benchmarked")
+            kinds.remove("svn")
+        return kinds
+
+    def create(self, name: str, kind: str) -> Remote:
+        """Create a remote of the given kind."""
+        if kind == "git":
+            return self._git(name)
+        if kind == "svn":
+            return self._svn(name)
+        suffix = ".zip" if len(list(self.archive_dir.iterdir())) % 2 else ".tar.gz"
+        return self._archive(name, suffix)
+
+    def _git(self, name: str) -> Remote:
+        path = self.root / "git" / f"{name}.git"
+        path.mkdir(parents=True)
+        _run(["git", "init", "--quiet", "--initial-branch=main"], cwd=path)
+        _write_tree(path, self.options, name)
+        for submodule in self._submodule_urls():
+            _run(
+                ["git", "submodule", "add", "--quiet", submodule, Path(submodule).stem],
+                cwd=path,
+            )
+        _run(["git", "add", "-A"], cwd=path)
+        _run(["git", "commit", "--quiet", "-m", "Initial"], cwd=path)
+        for tag in range(1, self.options.tags + 1):
+            (path / "README.md").write_text(f"# {name} {tag}\n")
+            _run(["git", "commit", "--quiet", "-am", f"Release {tag}"], cwd=path)
+            _run(["git", "tag", f"v{tag}.0.0"], cwd=path)
+        return Remote(name, "git", path.as_uri(), self._last_tag())
+
+    def _submodule_urls(self) -> list[str]:
+        """Get the urls of the submodules, created once."""
+        if len(self._submodules) < self.options.submodules:
+            for index in range(self.options.submodules):
+                path = self.root / "submodules" / f"lib{index}.git"
+                path.mkdir(parents=True)
+                _run(["git", "init", "--quiet", "--initial-branch=main"], cwd=path)
+                _write_tree(path, FarmOptions(4, 256, 0, 0), f"lib{index}")
+                _run(["git", "add", "-A"], cwd=path)
+                _run(["git", "commit", "--quiet", "-m", "Initial"], cwd=path)
+                self._submodules.append(path.as_uri())
+        return self._submodules
+
+    def _svn(self, name: str) -> Remote:
+        repo = self.root / "svn" / name
+        repo.parent.mkdir(parents=True, exist_ok=True)
+        _run(["svnadmin", "create", str(repo)])
+        url = repo.as_uri()
+        with tempfile.TemporaryDirectory() as tmp:
+            layout = Path(tmp)
+            _write_tree(layout / "trunk", self.options, name)
+            (layout / "branches").mkdir()
+            (layout / "tags").mkdir()
+            _run(["svn", "import", "--quiet", "-m", "Initial", str(layout), url])
+        for tag in range(1, self.options.tags + 1):
+            _run(
+                [
+                    "svn",
+                    "copy",
+                    "--quiet",
+                    "-m",
+                    f"Release {tag}",
+                    f"{url}/trunk",
+                    f"{url}/tags/v{tag}.0.0",
+                ]
+            )
+        return Remote(name, "svn", url, self._last_tag())
+
+    def _archive(self, name: str, suffix: str) -> Remote:
+        archive = self.archive_dir / f"{name}{suffix}"
+        with tempfile.TemporaryDirectory() as tmp:
+            tree = Path(tmp) / name
+            _write_tree(tree, self.options, name)
+            if suffix == ".zip":
+                with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+                    for path in sorted(tree.rglob("*")):
+                        zip_file.write(path, path.relative_to(tree.parent).as_posix())
+            else:
+                with tarfile.open(archive, "w:gz") as tar_file:
+                    tar_file.add(tree, arcname=name)
+        return Remote(name, "archive", f"{self.base_url}/{archive.name}")
+
+    def _last_tag(self) -> str:
+        return f"v{self.options.tags}.0.0" if self.options.tags else ""
+
+
+@contextlib.contextmanager
+def serve_directory(directory: Path) -> Generator[str, None, None]:
+    """Serve *directory* over HTTP on localhost and yield its base url."""
+
+    class QuietHandler(http.server.SimpleHTTPRequestHandler):
+        """Serves files without logging every request."""
+
+        def log_message(self, *_: object) -> None:
+            """Don't log requests."""
+
+    handler = functools.partial(QuietHandler, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def write_manifest(workspace: Path, remotes: Sequence[Remote]) -> None:
+    """Write a manifest with a project for every remote."""
+    lines = ["manifest:", "  version: '0.0'", "", "  projects:"]
+    for remote in remotes:
+        lines += [
+            f"  - name: {remote.name}",
+            f"    url: {remote.url}",
+            f"    vcs: {remote.kind}",
+            f"    dst: ext/{remote.name}",
+        ]
+        if remote.tag:
+            lines.append(f"    tag: {remote.tag}")
+    (workspace / "dfetch.yaml").write_text("\n".join(lines) + "\n")
+
+
+class Workspace:
+    """A superproject using all projects, in which dfetch is timed."""
+
+    def __init__(self, path: Path, remotes: Sequence[Remote], jobs: int | None):
+        """Create a git superproject in *path* with a manifest of *remotes*."""
+        self.path = path
+        self.remotes = remotes
+        self.jobs = jobs
+        self.env = {
+            **os.environ,
+            **_GIT_ENV,
+            "DFETCH_CACHE_DIR": str(path / ".cache"),
+            "NO_PROXY": "127.0.0.1,localhost",
+        }
+        path.mkdir(parents=True)
+        _run(["git", "init", "--quiet", "--initial-branch=main"], cwd=path)
+        (path / ".gitignore").write_text(".cache/\n")
+        write_manifest(path, remotes)
+
+    def time(self, *args: str) -> float:
+        """Run dfetch with *args* and get the number of seconds it took."""
+        start = time.perf_counter()
+        result = subprocess.run(  # nosec
+            [sys.executable, "-m", "dfetch", "--no-color", *args],
+            cwd=self.path,
+            env=self.env,
+            check=False,
+            capture_output=True,
+        )
+        elapsed = time.perf_counter() - start
+        if result.returncode:
+            raise RuntimeError(
+                f"dfetch {' '.join(args)} failed:\n"
+                + result.stdout.decode(errors="replace")
+                + result.stderr.decode(errors="replace")
+            )
+        return elapsed
+
+    def run_all(self) -> dict[str, float]:
+        """Time every command once, in an order where each one has work to do."""
+        jobs = ["--jobs", str(self.jobs)] if self.jobs else []
+        timings = {
+            "update": self.time("update", *jobs),
+            "check": self.time("check", *jobs),
+            "report": self.time("report", "-t", "sbom", "-o", "sbom.json"),
+            "freeze": self.time("freeze"),
+        }
+
+        _run(["git", "add", "-A"], cwd=self.path)
+        _run(["git", "commit", "--quiet", "-m", "Fetched projects"], cwd=self.path)
+        project = self.remotes[0].name
+        readme = self.path / "ext" / project / "README.md"
+        readme.write_text(readme.read_text() + "Local change\n")
+        timings["diff"] = self.time("diff", project)
+        return timings
+
+
+@dataclass
+class RunOptions:
+    """How often and how dfetch is run in each workspace."""
+
+    repeat: int
+    jobs: int | None
+
+
+def benchmark(
+    farm_dir: Path,
+    counts: Sequence[int],
+    kinds: Sequence[str],
+    options: FarmOptions,
+    run_options: RunOptions,
+) -> dict[str, dict[str, float]]:
+    """Time all commands for every number of projects, the best of the runs."""
+    with serve_directory(farm_dir / "archives") as base_url:
+        farm = FixtureFarm(farm_dir, options, base_url)
+        kinds = farm.kinds(kinds)
+
+        logger.info(f"Creating {max(counts)} remotes ({', '.join(kinds)})")
+        remotes = [
+            farm.create(f"project{index:04}", kinds[index % len(kinds)])
+            for index in range(max(counts))
+        ]
+
+        results: dict[str, dict[str, float]] = {}
+        for count in counts:
+            best = _best_timings(farm_dir, remotes[:count], run_options)
+            results[str(count)] = best
+            summary = ", ".join(f"{cmd} {sec:.2f}s" for cmd, sec in best.items())
+            logger.info(f"{count:>5} projects: {summary}")
+    return results
+
+
+def _best_timings(
+    farm_dir: Path, remotes: Sequence[Remote], run_options: RunOptions
+) -> dict[str, float]:
+    """Time all commands with *remotes*, keeping the best time of each command."""
+    best: dict[str, float] = {}
+    for attempt in range(run_options.repeat):
+        workspace = Workspace(
+            farm_dir / "workspaces" / f"{len(remotes)}-{attempt}",
+            remotes,
+            run_options.jobs,
+        )
+        for command, seconds in workspace.run_all().items():
+            best[command] = min(seconds, best.get(command, seconds))
+    return best
+
+
+def find_regressions(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    """Get a description of every command that became slower than allowed."""
+    regressions = []
+    for count, timings in results.items():
+        for command, seconds in timings.items():
+            before = baseline.get(count, {}).get(command)
+            if before is None:
+                continue
+            if (
+                seconds > before * (1 + threshold)
+                and seconds - before > MIN_REGRESSION_SECONDS
+            ):
+                regressions.append(
+                    f"{command} with {count} projects: {before:.2f}s -> {seconds:.2f}s"
+                    f" (+{(seconds / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse and return command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark dfetch with local remotes only."
+    )
+    parser.add_argument(
+        "--projects",
+        type=int,
+        nargs="+",
+        default=[10, 100],
+        metavar="N",
+        help="Numbers of projects to benchmark (default: 10 100, try 1000).",
+    )
+    parser.add_argument(
+        "--kinds",
+        nargs="+",
+        choices=KINDS,
+        default=list(KINDS),
+        help="Kinds of remotes to use, spread evenly over the projects.",
+    )
+    parser.add_argument("--files", type=int, default=20, help="Files in each remote.")
+    parser.add_argument(
+        "--file-size", type=int, default=4096, help="Bytes in each file."
+    )
+    parser.add_argument(
+        "--tags", type=int, default=5, help="Tags in each git and SVN remote."
+    )
+    parser.add_argument(
+        "--submodules", type=int, default=0, help="Submodules in each git remote."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Keep the best of this many runs."
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=None, help="Pass --jobs to update and check."
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=PROJECT_DIR / "build" / "benchmark.json",
+        metavar="FILE",
+        help="Json file to write the results to (default: build/benchmark.json).",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Results of an earlier run to compare with.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown compared to the baseline (default: 0.25 = 25%%).",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep the remotes and workspaces, to inspect them afterwards.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Main CLI entry."""
+    args = parse_args()
+    options = FarmOptions(args.files, args.file_size, args.tags, args.submodules)
+
+    farm_dir = Path(tempfile.mkdtemp(prefix="dfetch_benchmark_"))
+    try:
+        results = benchmark(
+            farm_dir,
+            sorted(set(args.projects)),
+            args.kinds,
+            options,
+            RunOptions(args.repeat, args.jobs),
+        )
+    finally:
+        if args.keep:
+            logger.info(f"Remotes and workspaces kept in {farm_dir}")
+        else:
+            shutil.rmtree(farm_dir, ignore_errors=True)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(
+        json.dumps(
+            {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "options": vars(options),
+                "jobs": args.jobs,
+                "results": results,
+            },
+            indent=2,
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    logger.info(f"Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        logger.info(f"No regressions compared to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
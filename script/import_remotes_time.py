@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Measure how long ``dfetch import`` takes to choose the remotes of many submodules.
+
+Urls of submodules spread over a few servers, organisations and url styles are
+generated for every number of submodules. The remotes are chosen the way
+``dfetch import`` does and the best time counts. The script fails when choosing
+them exceeds the budget:
+
+.. code-block:: bash
+
+    python script/import_remotes_time.py --urls 100 1000 5000 --budget 1
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+
+SERVERS = (
+    "https://github.com/",
+    "git@github.com:",
+    "https://gitlab.example.com/",
+    "ssh://git@bitbucket.example.org/scm/",
+    "https://git.internal.example.net/projects/",
+)
+
+
+def generate_urls(count: int, seed: int) -> set[str]:
+    """Generate *count* urls of submodules, the same ones for the same *seed*."""
+    rng = random.Random(seed)  # nosec
+    organisations = [f"org{index}" for index in range(max(1, count // 20))]
+    urls: set[str] = set()
+    while len(urls) < count:
+        server = rng.choice(SERVERS)
+        organisation = rng.choice(organisations)
+        urls.add(f"{server}{organisation}/lib{len(urls)}.git")
+    return urls
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse and return command-line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument(
+        "--urls",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 5000],
+        metavar="N",
+        help="Numbers of submodules (default: 10 100 1000 5000).",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=1,
+        help="Maximum number of seconds for a single number of urls (default: 1).",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=3, help="Keep the best of this many runs."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the urls.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Main CLI entry."""
+    args = parse_args()
+    sys.path.insert(0, str(PROJECT_DIR))
+    from dfetch.commands.import_ import (  # pylint: disable=import-outside-toplevel
+        _calculate_solution_score,
+        _determine_best_remotes,
+    )
+
+    over_budget = []
+    for count in sorted(set(args.urls)):
+        urls = generate_urls(count, args.seed)
+        best = None
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            remotes = _determine_best_remotes(urls)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        seconds = best or 0
+        uncovered = sum(not any(url.startswith(r) for r in remotes) for url in urls)
+        status = "ok" if seconds <= args.budget else f"over budget of {args.budget} s"
+        print(
+            f"{count:>6} urls {seconds:7.3f} s  {len(remotes)} remotes, "
+            f"score {_calculate_solution_score(remotes, urls)}, "
+            f"{uncovered} uncovered  {status}"
+        )
+        if seconds > args.budget:
+            over_budget.append(f"{count} urls")
+
+    if over_budget:
+        sys.exit(f"Over budget: {', '.join(over_budget)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Measure how long importing dfetch takes for each command.
+
+Every command is started with ``python -X importtime -m dfetch <command> --help``
+a few times. The time spent importing modules (without what the interpreter
+imports for any script) is summed, the best run counts. The script fails when
+a command exceeds the budget:
+
+.. code-block:: bash
+
+    python script/startup_time.py --budget 400
+
+Use ``--details`` to see which imports of the slowest command take the most time.
+"""
+
+import argparse
+import re
+import subprocess  # nosec
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.resolve()
+
+# Matches the lines of -X importtime: self time, cumulative time and the
+# module, indented by two spaces per level of nesting
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def top_level_imports(args: list[str]) -> dict[str, int]:
+    """Run python with *args* and get the cumulative import time (µs) of each top level import."""
+    result = subprocess.run(  # nosec
+        [sys.executable, "-X", "importtime", *args],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and not match.group(3):
+            imports[match.group(4)] = int(match.group(2))
+    return imports
+
+
+def commands() -> list[str]:
+    """Get the names of all commands of dfetch."""
+    sys.path.insert(0, str(PROJECT_DIR))
+    from dfetch.__main__ import (  # pylint: disable=import-outside-toplevel
+        COMMANDS,
+    )
+
+    return list(COMMANDS)
+
+
+def startup_time(command: str, interpreter: set[str], runs: int) -> int:
+    """Get the best import time in µs of *command* over *runs* runs."""
+    args = ["-m", "dfetch", *([command] if command else []), "--help"]
+    best = None
+    for _ in range(runs):
+        imports = top_level_imports(args)
+        total = sum(t for module, t in imports.items() if module not in interpreter)
+        best = total if best is None else min(best, total)
+    return best or 0
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse and return command-line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=400,
+        help="Maximum import time in ms of a single command (default: 400).",
+    )
+    parser.add_argument(
+        "--help-budget",
+        type=float,
+        default=600,
+        help="Maximum import time in ms of 'dfetch --help', which imports all commands.",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Keep the best of this many runs."
+    )
+    parser.add_argument(
+        "--details",
+        action="store_true",
+        help="Show the slowest imports of the slowest command.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Main CLI entry."""
+    args = parse_args()
+    interpreter = set(top_level_imports(["-c", "pass"]))
+
+    over_budget = []
+    times = {}
+    for command in ["", *commands()]:
+        budget = args.help_budget if not command else args.budget
+        milliseconds = startup_time(command, interpreter, args.runs) / 1000
+        times[command] = milliseconds
+        label = f"dfetch {command or ''} --help".replace("  ", " ")
+        status = "ok" if milliseconds <= budget else f"over budget of {budget:.0f} ms"
+        print(f"{label:<30} {milliseconds:7.1f} ms  {status}")
+        if milliseconds > budget:
+            over_budget.append(label)
+
+    if args.details:
+        slowest = max((c for c in times if c), key=times.__getitem__)
+        imports = top_level_imports(["-m", "dfetch", slowest, "--help"])
+        print(f"\nSlowest imports of 'dfetch {slowest}':")
+        for module, microseconds in sorted(imports.items(), key=lambda i: -i[1])[:10]:
+            if module not in interpreter:
+                print(f"  {module:<40} {microseconds / 1000:7.1f} ms")
+
+    if over_budget:
+        sys.exit(f"Over budget: {', '.join(over_budget)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -374,7 +374,7 @@ SO_IMPLEMENTATIONS: list[SOImplementation] = [
             ),
             evidence_hrefs=[
                 (
-                    "dfetch/vcs/git.py",
+                    "dfetch/vcs/git_remote.py",
                     "C-006 Non-interactive git (prevents SSH injection)",
                 ),
                 ("dfetch/vcs/svn.py", "C-006 Non-interactive svn"),
@@ -402,7 +402,7 @@ USAGE_CONTROLS: list[Control] = [
         name="Non-interactive VCS",
         assets=["A-16", "A-09"],
         threats=["DFT-06"],
-        reference="dfetch/vcs/git.py, dfetch/vcs/svn.py",
+        reference="dfetch/vcs/git_remote.py, dfetch/vcs/svn.py",
         description=(
             "``GIT_TERMINAL_PROMPT=0``, ``BatchMode=yes`` for Git; "
             "``--non-interactive`` for SVN.  Credential prompts are suppressed to "
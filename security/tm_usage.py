@@ -1033,7 +1033,8 @@ RESPONSES: list[ThreatResponse] = [
         stride=["Tampering"],
         note=(
             "Git submodules are followed: ``git submodule update --init --recursive`` "
-            "is called unconditionally during every Git fetch (``dfetch/vcs/git.py``), and "
+            "is called during every Git fetch for all submodules inside ``src:`` and not "
+            "matched by ``ignore:`` (``dfetch/vcs/git.py``), and "
             "each submodule is recorded as a ``Dependency`` with ``source_type='git-submodule'`` "
             "(``gitsubproject.py``).  "
             "SVN ``export`` is invoked without ``--ignore-externals``; each "
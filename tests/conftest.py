@@ -0,0 +1,15 @@
+"""Shared fixtures for the tests."""
+
+# mypy: ignore-errors
+# flake8: noqa
+
+import pytest
+
+from dfetch.util.cache import CACHE_DIR_ENV, clear_run_caches
+
+
+@pytest.fixture(autouse=True)
+def _isolated_user_cache(tmp_path_factory, monkeypatch):
+    """Never read or write the user cache of whoever runs the tests."""
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path_factory.mktemp("dfetch-cache")))
+    clear_run_caches()
@@ -1,13 +1,19 @@
 """Unit tests for dfetch.vcs.archive and dfetch.project.archivesubproject."""
 
+import asyncio
+import contextlib
 import hashlib
+import http.server
 import io
 import os
 import pathlib
 import stat as _stat
 import tarfile
 import tempfile
+import threading
+import time
 import zipfile
+from typing import ClassVar
 from unittest.mock import patch
 
 import pytest
@@ -15,6 +21,7 @@ import pytest
 from dfetch.manifest.project import ProjectEntry
 from dfetch.manifest.version import Version
 from dfetch.project.archivesubproject import ArchiveSubProject, _suffix_for_url
+from dfetch.util.cache import cache_dir
 from dfetch.vcs.archive import (
     ARCHIVE_EXTENSIONS,
     ArchiveLocalRepo,
@@ -494,6 +501,152 @@ def test_is_accessible_missing_file():
     assert remote.is_accessible() is False
 
 
+def test_is_accessible_async_is_remembered_for_the_run():
+    remote = ArchiveRemote("https://example.com/async/lib.tar.gz")
+    try:
+        with patch.object(
+            ArchiveRemote, "_is_http_reachable", return_value=True
+        ) as reachable:
+            assert asyncio.run(remote.is_accessible_async()) is True
+            with patch("dfetch.vcs.archive._REACHABLE_CACHE.get", return_value=None):
+                assert remote.is_accessible() is True
+        reachable.assert_called_once()
+    finally:
+        ArchiveRemote.clear_reachable_cache()
+
+
+def test_is_accessible_async_times_out():
+    remote = ArchiveRemote("https://example.com/slow/lib.tar.gz")
+    with patch.object(
+        ArchiveRemote, "_is_http_reachable", side_effect=lambda _: time.sleep(0.5)
+    ):
+        assert asyncio.run(remote.is_accessible_async(timeout=0.05)) is False
+
+
+# ---------------------------------------------------------------------------
+# ArchiveRemote.download - download cache
+# ---------------------------------------------------------------------------
+
+_ARCHIVE_CONTENT = b"some archive content"
+_ARCHIVE_SHA256 = hashlib.sha256(_ARCHIVE_CONTENT).hexdigest()
+
+
+def _fake_http_download(url, dest_path, algorithm=None):
+    pathlib.Path(dest_path).write_bytes(_ARCHIVE_CONTENT)
+    return hashlib.new(algorithm, _ARCHIVE_CONTENT).hexdigest() if algorithm else None
+
+
+def test_download_with_known_hash_uses_cache(tmp_path):
+    remote = ArchiveRemote("https://example.com/lib.tar.gz")
+
+    with patch(
+        "dfetch.vcs.archive.http_download", side_effect=_fake_http_download
+    ) as mocked_download:
+        first = remote.download(str(tmp_path / "first"), "sha256")
+        second = remote.download(
+            str(tmp_path / "second"), "sha256", expected=_ARCHIVE_SHA256
+        )
+
+    assert first == second == _ARCHIVE_SHA256
+    assert (tmp_path / "second").read_bytes() == _ARCHIVE_CONTENT
+    mocked_download.assert_called_once()
+
+
+def test_download_ignores_corrupted_cache_entry(tmp_path):
+    remote = ArchiveRemote("https://example.com/lib.tar.gz")
+
+    with patch(
+        "dfetch.vcs.archive.http_download", side_effect=_fake_http_download
+    ) as mocked_download:
+        remote.download(str(tmp_path / "first"), "sha256")
+        (cache_dir() / "archives" / "sha256" / _ARCHIVE_SHA256).write_bytes(b"tampered")
+
+        result = remote.download(
+            str(tmp_path / "second"), "sha256", expected=_ARCHIVE_SHA256
+        )
+
+    assert result == _ARCHIVE_SHA256
+    assert (tmp_path / "second").read_bytes() == _ARCHIVE_CONTENT
+    assert mocked_download.call_count == 2
+
+
+# ---------------------------------------------------------------------------
+# ArchiveRemote.download - keep-alive and resumed downloads
+# ---------------------------------------------------------------------------
+
+_LARGE_CONTENT = bytes(range(256)) * 1024
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves _LARGE_CONTENT, breaking off the first response halfway."""
+
+    protocol_version = "HTTP/1.1"
+    requests: ClassVar[list[tuple[int, str]]] = []
+    interrupt = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Send (a part of) the content."""
+        range_header = self.headers.get("Range", "")
+        self.requests.append((self.client_address[1], range_header))
+        start = int(range_header[6:-1]) if range_header else 0
+        body = _LARGE_CONTENT[start:]
+        self.send_response(206 if start else 200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        if start:
+            self.send_header(
+                "Content-Range",
+                f"bytes {start}-{len(_LARGE_CONTENT) - 1}/{len(_LARGE_CONTENT)}",
+            )
+        self.end_headers()
+        if self.interrupt:
+            type(self).interrupt = False
+            self.wfile.write(body[: len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep the test output clean."""
+
+
+@pytest.fixture(name="range_server")
+def fixture_range_server():
+    _RangeHandler.requests = []
+    _RangeHandler.interrupt = True
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_resumes_interrupted_transfer(tmp_path, range_server):
+    remote = ArchiveRemote(f"{range_server}/lib.tar.gz")
+
+    result = remote.download(str(tmp_path / "lib.tar.gz"), "sha256")
+
+    assert (tmp_path / "lib.tar.gz").read_bytes() == _LARGE_CONTENT
+    assert result == hashlib.sha256(_LARGE_CONTENT).hexdigest()
+    assert [header for _, header in _RangeHandler.requests] == [
+        "",
+        f"bytes={len(_LARGE_CONTENT) // 2}-",
+    ]
+
+
+def test_download_reuses_connection(tmp_path, range_server):
+    _RangeHandler.interrupt = False
+    remote = ArchiveRemote(f"{range_server}/lib.tar.gz")
+
+    remote.download(str(tmp_path / "first"))
+    remote.download(str(tmp_path / "second"))
+
+    ports = {port for port, _ in _RangeHandler.requests}
+    assert len(_RangeHandler.requests) == 2
+    assert len(ports) == 1
+
+
 # ---------------------------------------------------------------------------
 # ArchiveLocalRepo.extract - basic smoke test
 # ---------------------------------------------------------------------------
@@ -594,6 +747,133 @@ def test_all_archive_extensions_covered():
         assert ext.startswith(".")
 
 
+# ---------------------------------------------------------------------------
+# ArchiveLocalRepo.extract - selected members are extracted in place
+# ---------------------------------------------------------------------------
+
+_LAYOUTS = {
+    "top-level-dir": {
+        "lib-1.0/": None,
+        "lib-1.0/LICENSE": b"license",
+        "lib-1.0/README.md": b"readme",
+        "lib-1.0/src/": None,
+        "lib-1.0/src/main.c": b"main",
+        "lib-1.0/src/LICENSE": b"nested license",
+        "lib-1.0/src/docs/index.md": b"docs",
+        "lib-1.0/empty/": None,
+    },
+    "implicit-top-level-dir": {
+        "lib-1.0/COPYING": b"license",
+        "lib-1.0/src/main.c": b"main",
+        "lib-1.0/src/util.h": b"util",
+    },
+    "flat": {
+        "LICENSE.txt": b"license",
+        "src/main.c": b"main",
+        "src/docs/guide.md": b"guide",
+        "README.md": b"readme",
+    },
+    "single-file": {"README.md": b"readme"},
+}
+
+
+def _write_archive(path: str, members: dict) -> None:
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path, "w") as zf:
+            for name, content in members.items():
+                zf.writestr(name, content or b"")
+        return
+    with tarfile.open(path, "w:gz") as tf:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name.rstrip("/"))
+            if content is None:
+                info.type, info.mode = tarfile.DIRTYPE, 0o755
+            else:
+                info.size, info.mode = len(content), 0o644
+            info.mtime = 1_700_000_000
+            tf.addfile(info, io.BytesIO(content) if content is not None else None)
+
+
+def _tree(root: str) -> dict:
+    tree = {}
+    for current, dirs, files in os.walk(root):
+        for name in dirs + files:
+            path = os.path.join(current, name)
+            relative = pathlib.Path(path).relative_to(root).as_posix()
+            if os.path.isdir(path):
+                tree[relative] = None
+            else:
+                tree[relative] = pathlib.Path(path).read_bytes()
+    return tree
+
+
+@pytest.mark.parametrize("suffix", [".tar.gz", ".zip"])
+@pytest.mark.parametrize("layout", sorted(_LAYOUTS))
+@pytest.mark.parametrize(
+    "src, ignore",
+    [
+        ("", ()),
+        ("src", ()),
+        ("src/", ("docs",)),
+        ("src/main.c", ()),
+        ("", ("*.md", "LICENSE*", "/src/docs")),
+        ("", ("src",)),
+    ],
+)
+def test_extract_selects_like_full_extraction(tmp_path, suffix, layout, src, ignore):
+    archive = str(tmp_path / f"lib{suffix}")
+    _write_archive(archive, _LAYOUTS[layout])
+
+    def extract(dest, selected):
+        with (
+            patch.object(ArchiveLocalRepo, "_extract_selected", return_value=False)
+            if not selected
+            else contextlib.nullcontext()
+        ):
+            ArchiveLocalRepo.extract(archive, dest, src=src, ignore=ignore)
+        return _tree(dest)
+
+    try:
+        expected = extract(str(tmp_path / "expected"), selected=False)
+    except RuntimeError as exc:
+        with pytest.raises(RuntimeError, match=str(exc).split(" was ")[0]):
+            extract(str(tmp_path / "actual"), selected=True)
+        return
+
+    with patch.object(
+        ArchiveLocalRepo, "_extract_raw", side_effect=AssertionError("extracted all")
+    ):
+        assert extract(str(tmp_path / "actual"), selected=True) == expected
+
+
+def test_extract_keeps_archive_times_and_modes(tmp_path):
+    archive = str(tmp_path / "lib.tar.gz")
+    _write_archive(archive, _LAYOUTS["top-level-dir"])
+
+    ArchiveLocalRepo.extract(archive, str(tmp_path / "dest"))
+
+    main_c = os.stat(tmp_path / "dest" / "src" / "main.c")
+    assert main_c.st_mtime == 1_700_000_000
+    assert _stat.S_IMODE(main_c.st_mode) == 0o644
+    assert os.stat(tmp_path / "dest" / "src").st_mtime == 1_700_000_000
+
+
+def test_extract_archive_with_hardlink_extracts_everything(tmp_path):
+    archive = str(tmp_path / "lib.tar.gz")
+    with tarfile.open(archive, "w:gz") as tf:
+        content = b"shared"
+        info = tarfile.TarInfo("lib-1.0/src/a.c")
+        info.size = len(content)
+        tf.addfile(info, io.BytesIO(content))
+        link = tarfile.TarInfo("lib-1.0/src/b.c")
+        link.type, link.linkname = tarfile.LNKTYPE, "lib-1.0/src/a.c"
+        tf.addfile(link)
+
+    ArchiveLocalRepo.extract(archive, str(tmp_path / "dest"), src="src")
+
+    assert _tree(str(tmp_path / "dest")) == {"a.c": b"shared", "b.c": b"shared"}
+
+
 # ---------------------------------------------------------------------------
 # Helpers shared by ArchiveSubProject tests
 # ---------------------------------------------------------------------------
@@ -0,0 +1,175 @@
+"""Test the user-level cache of remote information."""
+
+# mypy: ignore-errors
+# flake8: noqa
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from dfetch.util.cache import (
+    CACHE_DIR_ENV,
+    CACHE_TTL_ENV,
+    ContentCache,
+    DigestCache,
+    ImmutableCache,
+    RemoteCache,
+    cache_dir,
+    is_network_url,
+    set_refresh,
+)
+
+
+@pytest.fixture(autouse=True)
+def _no_refresh():
+    set_refresh(False)
+    yield
+    set_refresh(False)
+
+
+def test_value_is_stored_across_instances():
+    RemoteCache("test").put("https://example.com/repo", {"head": "main"})
+
+    assert RemoteCache("test").get("https://example.com/repo") == {"head": "main"}
+    assert RemoteCache("test").get("https://example.com/other") is None
+
+
+def test_value_expires(monkeypatch):
+    monkeypatch.setenv(CACHE_TTL_ENV, "10")
+    cache = RemoteCache("test")
+
+    with patch("dfetch.util.cache.time.time", return_value=1000.0):
+        cache.put("key", "value")
+    with patch("dfetch.util.cache.time.time", return_value=1005.0):
+        assert cache.get("key") == "value"
+    with patch("dfetch.util.cache.time.time", return_value=1011.0):
+        assert cache.get("key") is None
+
+
+def test_zero_ttl_disables_cache(monkeypatch):
+    monkeypatch.setenv(CACHE_TTL_ENV, "0")
+    cache = RemoteCache("test")
+
+    cache.put("key", "value")
+
+    assert cache.get("key") is None
+    assert not cache.path.exists()
+
+
+def test_refresh_ignores_but_updates_cache():
+    cache = RemoteCache("test")
+    cache.put("key", "old")
+
+    set_refresh()
+    assert cache.get("key") is None
+    cache.put("key", "new")
+
+    set_refresh(False)
+    assert cache.get("key") == "new"
+
+
+def test_broken_cache_file_is_ignored():
+    cache = RemoteCache("test")
+    cache.path.parent.mkdir(parents=True, exist_ok=True)
+    cache.path.write_text("{not json", encoding="utf-8")
+
+    assert cache.get("key") is None
+    cache.put("key", "value")
+    assert RemoteCache("test").get("key") == "value"
+
+
+def test_cache_dir_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+
+    assert cache_dir() == tmp_path
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://github.com/dfetch-org/dfetch", True),
+        ("svn://svn.example.com/repo", True),
+        ("git@github.com:dfetch-org/dfetch.git", True),
+        ("file:///tmp/repo", False),
+        ("/tmp/repo", False),
+        ("some-remote-server/repo.git", False),
+        ("C:/repos/repo", False),
+    ],
+)
+def test_is_network_url(url, expected):
+    assert is_network_url(url) == expected
+
+
+def _file(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return str(path)
+
+
+def test_content_is_stored_by_hash(tmp_path):
+    store = ContentCache("test-content")
+
+    assert store.get("sha256", "abc123") is None
+    store.put("sha256", "abc123", _file(tmp_path, "archive", 10))
+
+    assert store.get("sha256", "abc123").read_bytes() == b"x" * 10
+
+
+def test_least_recently_used_content_is_evicted(tmp_path, monkeypatch):
+    monkeypatch.setenv(ContentCache.SIZE_ENV, str(25 / 1024 / 1024))
+    store = ContentCache("test-content")
+
+    store.put("sha256", "aa", _file(tmp_path, "a", 10))
+    store.put("sha256", "bb", _file(tmp_path, "b", 10))
+    os.utime(store.get("sha256", "aa"), (1, 1))
+    os.utime(store.get("sha256", "bb"), (2, 2))
+    store.get("sha256", "aa")  # aa is now the most recently used
+    store.put("sha256", "cc", _file(tmp_path, "c", 10))
+
+    assert store.get("sha256", "aa")
+    assert store.get("sha256", "bb") is None
+    assert store.get("sha256", "cc")
+
+
+def test_zero_size_disables_content_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv(ContentCache.SIZE_ENV, "0")
+    store = ContentCache("test-content")
+
+    store.put("sha256", "abc123", _file(tmp_path, "archive", 10))
+
+    assert store.get("sha256", "abc123") is None
+
+
+def test_content_cache_rejects_invalid_hash():
+    with pytest.raises(ValueError):
+        ContentCache("test-content").get("sha256", "../../etc/passwd")
+
+
+def test_derived_value_is_only_valid_for_same_content():
+    DigestCache("test", "1").put("file.yaml", "content", {"derived": [1, 2]})
+
+    assert DigestCache("test", "1").get("file.yaml", "content") == {"derived": [1, 2]}
+    assert DigestCache("test", "1").get("file.yaml", "changed") is None
+    assert DigestCache("test", "2").get("file.yaml", "content") is None
+    assert DigestCache("test", "1").get("other.yaml", "content") is None
+
+
+def test_broken_derived_value_is_ignored():
+    cache = DigestCache("test", "1")
+    cache.put("file.yaml", "content", "value")
+    (entry,) = cache.path.glob("*.json")
+    entry.write_text("{broken", encoding="utf-8")
+
+    assert cache.get("file.yaml", "content") is None
+
+
+def test_immutable_value_never_expires(monkeypatch):
+    monkeypatch.setenv(CACHE_TTL_ENV, "0")
+    ImmutableCache("test").put("svn://example.com/repo@12", ["a", "b"])
+
+    assert ImmutableCache("test").get("svn://example.com/repo@12") == ["a", "b"]
+    assert ImmutableCache("test").get("svn://example.com/repo@13") is None
+
+    set_refresh(True)
+    assert ImmutableCache("test").get("svn://example.com/repo@12") is None
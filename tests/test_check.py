@@ -4,6 +4,7 @@
 # flake8: noqa
 
 import argparse
+import time
 from pathlib import Path
 from unittest.mock import Mock, patch
 
@@ -16,6 +17,13 @@ DEFAULT_ARGS = argparse.Namespace(
     no_recommendations=False, jenkins_json=None, sarif=None, code_climate=None
 )
 DEFAULT_ARGS.projects = []
+DEFAULT_ARGS.jobs = 1
+
+
+@pytest.fixture(autouse=True)
+def fixture_no_prefetch():
+    with patch("dfetch.project.prefetch_remotes"):
+        yield
 
 
 @pytest.mark.parametrize(
@@ -47,3 +55,50 @@ def test_check(name, projects):
 
                             for _ in projects:
                                 mocked_create.return_value.check_for_update.assert_called()
+
+
+class _FakeSubProject:
+    def __init__(self, project):
+        self._project = project
+
+    def check_for_update(self, reporters, files_to_ignore):
+        del files_to_ignore
+        time.sleep(0.1 if self._project.name == "first" else 0)
+        for reporter in reporters:
+            reporter.up_to_date_project(self._project, None)
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_check_reports_in_manifest_order(jobs):
+    check = Check()
+
+    fake_superproject = Mock()
+    fake_superproject.manifest = mock_manifest(
+        [{"name": "first"}, {"name": "second"}, {"name": "third"}]
+    )
+    fake_superproject.root_directory = Path("/tmp")
+
+    args = argparse.Namespace(
+        no_recommendations=True,
+        jenkins_json="jenkins.json",
+        sarif=None,
+        code_climate=None,
+        projects=[],
+        jobs=jobs,
+    )
+
+    with patch(
+        "dfetch.commands.check.create_super_project", return_value=fake_superproject
+    ):
+        with patch("dfetch.project.create_sub_project", side_effect=_FakeSubProject):
+            with patch("dfetch.commands.check.in_directory"):
+                with patch("dfetch.commands.check.CheckStdoutReporter"):
+                    with patch("dfetch.commands.check.JenkinsReporter") as jenkins:
+                        check(args)
+
+    reported = [
+        call.args[0].name
+        for call in jenkins.return_value.up_to_date_project.call_args_list
+    ]
+    assert reported == ["first", "second", "third"]
+    jenkins.return_value.dump_to_file.assert_called_once()
@@ -3,14 +3,23 @@
 # mypy: ignore-errors
 # flake8: noqa
 
+import asyncio
+import json
 import os
 import subprocess
+import sys
 from subprocess import CalledProcessError, CompletedProcess
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 
-from dfetch.util.cmdline import SubprocessCommandError, run_on_cmdline
+from dfetch.util import trace
+from dfetch.util.cmdline import (
+    MAX_CONCURRENCY_ENV,
+    SubprocessCommandError,
+    run_on_cmdline,
+    run_on_cmdline_async,
+)
 
 LS_CMD = "ls ."
 LS_OK_RESULT = CompletedProcess(
@@ -44,3 +53,76 @@ def test_run_on_cmdline(name, cmd, cmd_result, expectation):
         else:
             with pytest.raises(expectation):
                 run_on_cmdline(logger_mock, cmd)
+
+
+def _python(code):
+    return [sys.executable, "-c", code]
+
+
+def test_run_on_cmdline_async():
+    result = asyncio.run(run_on_cmdline_async(MagicMock(), _python("print('hi')")))
+
+    assert result.returncode == 0
+    assert result.stdout.strip() == b"hi"
+
+
+@pytest.mark.parametrize(
+    "name, cmd, kwargs, expectation",
+    [
+        ("non-zero return", _python("exit(3)"), {}, SubprocessCommandError),
+        ("cmd missing", ["dfetch-no-such-command"], {}, RuntimeError),
+        (
+            "timeout",
+            _python("import time; time.sleep(10)"),
+            {"timeout": 0.2},
+            RuntimeError,
+        ),
+    ],
+)
+def test_run_on_cmdline_async_fails(name, cmd, kwargs, expectation):
+    with pytest.raises(expectation):
+        asyncio.run(run_on_cmdline_async(MagicMock(), cmd, **kwargs))
+
+
+def test_run_on_cmdline_async_limits_concurrency(monkeypatch):
+    monkeypatch.setenv(MAX_CONCURRENCY_ENV, "2")
+    running = []
+    most_running = []
+
+    async def fake_exec(*_, **__):
+        process = Mock(returncode=0)
+
+        async def communicate(_):
+            running.append(process)
+            most_running.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(process)
+            return b"", b""
+
+        process.communicate = communicate
+        return process
+
+    async def run_all():
+        await asyncio.gather(
+            *(run_on_cmdline_async(MagicMock(), ["cmd"]) for _ in range(6))
+        )
+
+    with patch("asyncio.create_subprocess_exec", fake_exec):
+        asyncio.run(run_all())
+
+    assert max(most_running) == 2
+
+
+def test_run_on_cmdline_async_is_traced(tmp_path):
+    trace.start()
+    try:
+        asyncio.run(run_on_cmdline_async(MagicMock(), _python("print('hi')")))
+    finally:
+        trace.stop(str(tmp_path / "trace.json"))
+
+    with open(tmp_path / "trace.json", encoding="utf-8") as trace_file:
+        events = json.load(trace_file)["traceEvents"]
+
+    (span,) = [event for event in events if event["ph"] == "X"]
+    assert span["cat"] == "subprocess"
+    assert span["args"]["argv"] == _python("print('hi')")
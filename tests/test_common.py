@@ -0,0 +1,179 @@
+"""Test the common command operations."""
+
+# mypy: ignore-errors
+# flake8: noqa
+
+import argparse
+import logging
+import time
+from unittest.mock import patch
+
+import pytest
+
+from dfetch.commands.common import (
+    SubManifestIndex,
+    add_jobs_argument,
+    run_for_projects,
+)
+from dfetch.log import _CaptureFilter, get_logger
+from dfetch.manifest.manifest import Manifest
+from dfetch.manifest.project import ProjectEntry
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.addFilter(_CaptureFilter())
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def log_messages():
+    handler = _ListHandler()
+    root = logging.getLogger()
+    level = root.level
+    root.setLevel(logging.INFO)
+    root.addHandler(handler)
+    yield handler.messages
+    root.removeHandler(handler)
+    root.setLevel(level)
+
+
+def _projects(*names):
+    return [ProjectEntry.from_yaml({"name": name}) for name in names]
+
+
+def _slow_action(project):
+    if project.name == "first":
+        time.sleep(0.2)
+    get_logger("test").info(f"done {project.name}")
+    if project.name == "broken":
+        raise RuntimeError("it broke")
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_run_for_projects_keeps_order(log_messages, jobs):
+    had_errors = run_for_projects(
+        _projects("first", "second", "third"), _slow_action, jobs
+    )
+
+    assert not had_errors
+    assert log_messages == ["done first", "done second", "done third"]
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_run_for_projects_reports_failures(log_messages, jobs):
+    had_errors = run_for_projects(
+        _projects("first", "broken", "last"), _slow_action, jobs
+    )
+
+    assert had_errors
+    assert log_messages[:2] == ["done first", "done broken"]
+    assert "it broke" in log_messages[-2]
+    assert log_messages[-1] == "done last"
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_run_for_projects_skips_failed_precheck(log_messages, jobs):
+    def precheck(project):
+        if project.name == "second":
+            get_logger("test").info("skip second")
+            raise RuntimeError()
+
+    had_errors = run_for_projects(
+        _projects("first", "second", "third"), _slow_action, jobs, precheck=precheck
+    )
+
+    assert had_errors
+    assert log_messages == ["done first", "skip second", "done third"]
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "many"])
+def test_jobs_argument_must_be_positive(value):
+    parser = argparse.ArgumentParser()
+    add_jobs_argument(parser)
+
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--jobs", value])
+
+
+def test_jobs_argument_default():
+    parser = argparse.ArgumentParser()
+    add_jobs_argument(parser)
+
+    assert parser.parse_args([]).jobs == 1
+    assert parser.parse_args(["-j", "3"]).jobs == 3
+
+
+SUBMANIFEST = """
+manifest:
+  version: '0.0'
+  projects:
+    - name: known
+      url: https://example.com/known.git
+    - name: missing
+      url: https://example.com/missing.git
+"""
+
+
+def _index(tmp_path, monkeypatch, *names):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dfetch.yaml").write_text(
+        "manifest:\n  version: '0.0'\n  projects:\n"
+        + "".join(
+            f"    - name: {name}\n      url: https://example.com/{name}.git\n"
+            for name in ("known", *names)
+        ),
+        encoding="utf-8",
+    )
+    return SubManifestIndex(Manifest.from_file(str(tmp_path / "dfetch.yaml")))
+
+
+def test_submanifests_are_parsed_once(tmp_path, monkeypatch, log_messages):
+    index = _index(tmp_path, monkeypatch, "first", "second", "empty")
+    for name in ("first", "second"):
+        (tmp_path / name / "sub").mkdir(parents=True)
+        (tmp_path / name / "sub" / "dfetch.yaml").write_text(SUBMANIFEST)
+    (tmp_path / "empty").mkdir()
+    projects = _projects("first", "second", "empty", "not-fetched")
+
+    with patch.object(Manifest, "from_file", wraps=Manifest.from_file) as from_file:
+        index.index(projects, jobs=2)
+        for project in projects:
+            index.recommend(project)
+
+    assert from_file.call_count == 2
+    recommendations = [m for m in log_messages if "depends on" in m]
+    assert len(recommendations) == 2
+    assert "first/sub/dfetch.yaml" in recommendations[0]
+    assert "missing.git" in recommendations[0]
+    assert "known.git" not in recommendations[0]
+
+
+def test_invalid_submanifest_fails_its_project(tmp_path, monkeypatch):
+    index = _index(tmp_path, monkeypatch, "invalid", "valid")
+    (tmp_path / "invalid").mkdir()
+    (tmp_path / "invalid" / "dfetch.yaml").write_text("manifest: {}")
+    (tmp_path / "valid").mkdir()
+    invalid, valid = _projects("invalid", "valid")
+
+    index.index([invalid, valid])
+
+    with pytest.raises(RuntimeError, match="invalid/dfetch.yaml"):
+        index.recommend(invalid)
+    index.recommend(valid)
+
+
+def test_project_fetched_later_is_indexed(tmp_path, monkeypatch, log_messages):
+    index = _index(tmp_path, monkeypatch, "later")
+    (project,) = _projects("later")
+    index.index([project])
+
+    (tmp_path / "later").mkdir()
+    (tmp_path / "later" / "dfetch.yaml").write_text(SUBMANIFEST)
+    index.recommend(project)
+
+    assert any("depends on" in message for message in log_messages)
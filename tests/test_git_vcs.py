@@ -3,7 +3,10 @@
 # mypy: ignore-errors
 # flake8: noqa
 
+import asyncio
 import os
+import shutil
+import subprocess
 from subprocess import CompletedProcess
 from unittest.mock import Mock, patch
 
@@ -11,13 +14,29 @@ import pytest
 
 from dfetch.util.cmdline import SubprocessCommandError
 from dfetch.util.util import unique_parent_dirs
+from dfetch.vcs import git as git_module
 from dfetch.vcs.git import (
+    MIRROR_ENV,
+    CheckoutOptions,
     GitLocalRepo,
+    GitMirror,
     GitRemote,
+)
+from dfetch.vcs.git_remote import (
     _build_git_ssh_command,
+    non_interactive_env,
+    normalize_remote_url,
 )
 from dfetch.vcs.git_types import Submodule
 
+
+@pytest.fixture(autouse=True)
+def _clear_ref_cache():
+    GitRemote.clear_ref_cache()
+    yield
+    GitRemote.clear_ref_cache()
+
+
 # ---------------------------------------------------------------------------
 # unique_parent_dirs  (dfetch.util.util)
 # ---------------------------------------------------------------------------
@@ -222,7 +241,7 @@ def test_filter_submodules_sibling_of_src_not_removed(tmp_path, monkeypatch):
 @pytest.mark.parametrize(
     "name, cmd_result, expectation",
     [
-        ("git repo", [CompletedProcess(args=[], returncode=0, stdout="Yep!")], True),
+        ("git repo", [CompletedProcess(args=[], returncode=0, stdout=b"Yep!")], True),
         ("not a git repo", [SubprocessCommandError()], False),
         ("no git", [RuntimeError()], False),
         ("somewhere.git", [], True),
@@ -232,7 +251,7 @@ def test_remote_check(name, cmd_result, expectation):
 
     os.environ["GIT_SSH_COMMAND"] = "ssh"  # prevents additional subprocess call
 
-    with patch("dfetch.vcs.git.run_on_cmdline") as run_on_cmdline_mock:
+    with patch("dfetch.vcs.git_remote.run_on_cmdline") as run_on_cmdline_mock:
         run_on_cmdline_mock.side_effect = cmd_result
 
         assert GitRemote(name).is_git() == expectation
@@ -257,7 +276,7 @@ def test_remote_check_returns_true_on_auth_error(name, stderr, monkeypatch):
     """Auth-related git errors still mean the URL is a git remote — return True."""
     monkeypatch.setenv("GIT_SSH_COMMAND", "ssh")  # prevents additional subprocess call
 
-    with patch("dfetch.vcs.git.run_on_cmdline") as run_on_cmdline_mock:
+    with patch("dfetch.vcs.git_remote.run_on_cmdline") as run_on_cmdline_mock:
         run_on_cmdline_mock.side_effect = [
             SubprocessCommandError(stderr=stderr, returncode=128)
         ]
@@ -291,10 +310,9 @@ def test_remote_check_returns_true_on_auth_error(name, stderr, monkeypatch):
 )
 def test_check(name, project, cmd_result, expectation):
     with patch("dfetch.vcs.git.run_on_cmdline") as run_on_cmdline_mock:
-        with patch("dfetch.vcs.git.in_directory"):
-            run_on_cmdline_mock.side_effect = cmd_result
+        run_on_cmdline_mock.side_effect = cmd_result
 
-            assert GitLocalRepo(project).is_git() == expectation
+        assert GitLocalRepo(project).is_git() == expectation
 
 
 TRIMMED_LSREMOTE_CPPUTEST = """
@@ -319,7 +337,7 @@ b9b841c56c524a10ccd40e88c3acaf9d5ec751c2	refs/tags/v4.0
 
 
 def test_ls_remote():
-    with patch("dfetch.vcs.git.run_on_cmdline") as run_on_cmdline_mock:
+    with patch("dfetch.vcs.git_remote.run_on_cmdline") as run_on_cmdline_mock:
         run_on_cmdline_mock.return_value.stdout = TRIMMED_LSREMOTE_CPPUTEST.encode(
             "UTF-8"
         )
@@ -349,7 +367,7 @@ def test_get_remote_url_strips_trailing_newline():
     """git remote get-url appends a newline that must not leak into the URL."""
     with patch("dfetch.vcs.git.run_on_cmdline") as run_on_cmdline_mock:
         run_on_cmdline_mock.return_value.stdout = b"https://github.com/org/repo.git\n"
-        assert GitLocalRepo.get_remote_url() == "https://github.com/org/repo.git"
+        assert GitLocalRepo().get_remote_url() == "https://github.com/org/repo.git"
 
 
 def test_find_branch_tip_or_tag_from_sha_empty_rev_matches_nothing():
@@ -462,8 +480,8 @@ def test_build_git_ssh_command(name, env_ssh, git_config_ssh, expected):
         else:
             mock_run_git_config.side_effect = SubprocessCommandError()
 
-        with patch("dfetch.vcs.git.run_on_cmdline", mock_run_git_config):
-            with patch("dfetch.vcs.git.logger") as mock_logger:
+        with patch("dfetch.vcs.git_remote.run_on_cmdline", mock_run_git_config):
+            with patch("dfetch.vcs.git_remote.logger") as mock_logger:
                 result = _build_git_ssh_command()
                 assert result == expected
 
@@ -538,3 +556,282 @@ def test_eol_attributes_no_paths_skips_git_call(tmp_path):
     with patch("dfetch.vcs.git.run_on_cmdline") as mock_run:
         assert GitLocalRepo(tmp_path).eol_attributes([]) == {}
     mock_run.assert_not_called()
+
+
+LSREMOTE_WITH_SYMREF = """ref: refs/heads/main	HEAD
+33d11e10699bae03ba2a58a280e92494f4fa0d82	HEAD
+33d11e10699bae03ba2a58a280e92494f4fa0d82	refs/heads/main
+0e3b216c7ab365b67765e94aeb45085c4db029e0	refs/tags/v1.0
+"""
+
+
+def test_remote_is_listed_once():
+    with patch("dfetch.vcs.git_remote.run_on_cmdline") as run_on_cmdline_mock:
+        run_on_cmdline_mock.return_value.stdout = LSREMOTE_WITH_SYMREF.encode("UTF-8")
+
+        remote = GitRemote("https://example.com/org/repo.git")
+        assert remote.get_default_branch() == "main"
+        assert remote.list_of_branches() == ["main"]
+        assert remote.list_of_tags() == ["v1.0"]
+        assert (
+            GitRemote("HTTPS://Example.com/org/repo/").last_sha_on_branch("main")
+            == "33d11e10699bae03ba2a58a280e92494f4fa0d82"
+        )
+
+        run_on_cmdline_mock.assert_called_once()
+
+
+def test_failed_listing_is_not_cached():
+    with patch("dfetch.vcs.git_remote.run_on_cmdline") as run_on_cmdline_mock:
+        run_on_cmdline_mock.side_effect = [
+            SubprocessCommandError(),
+            CompletedProcess(
+                args=[], returncode=0, stdout=LSREMOTE_WITH_SYMREF.encode("UTF-8")
+            ),
+        ]
+
+        remote = GitRemote("https://example.com/org/repo")
+        assert remote.get_default_branch() == "master"
+        assert remote.get_default_branch() == "main"
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://example.com/org/repo", "https://example.com/org/repo"),
+        ("https://Example.COM/org/repo.git", "https://example.com/org/repo"),
+        ("https://example.com/org/repo/", "https://example.com/org/repo"),
+        ("ssh://git@host/org/repo.git", "ssh://git@host/org/repo"),
+        ("/some/path/repo.git", "/some/path/repo.git"),
+        ("/some/path/repo/", "/some/path/repo"),
+    ],
+)
+def test_normalize_remote_url(url, expected):
+    assert normalize_remote_url(url) == expected
+
+
+def test_network_remote_is_cached_across_runs():
+    with patch("dfetch.vcs.git_remote.run_on_cmdline") as run_on_cmdline_mock:
+        run_on_cmdline_mock.return_value.stdout = LSREMOTE_WITH_SYMREF.encode("UTF-8")
+
+        assert GitRemote("https://example.com/org/repo").get_default_branch() == "main"
+        GitRemote.clear_ref_cache()
+        assert GitRemote("https://example.com/org/repo").list_of_tags() == ["v1.0"]
+
+        run_on_cmdline_mock.assert_called_once()
+
+
+def test_local_remote_is_not_cached_across_runs():
+    with patch("dfetch.vcs.git_remote.run_on_cmdline") as run_on_cmdline_mock:
+        run_on_cmdline_mock.return_value.stdout = LSREMOTE_WITH_SYMREF.encode("UTF-8")
+
+        GitRemote("/some/local/repo").get_default_branch()
+        GitRemote.clear_ref_cache()
+        GitRemote("/some/local/repo").get_default_branch()
+
+        assert run_on_cmdline_mock.call_count == 2
+
+
+def _git(*args, cwd):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def remote_repo(tmp_path):
+    remote = tmp_path / "remote"
+    remote.mkdir()
+    _git("init", "-q", "-b", "main", cwd=remote)
+    _git("config", "user.email", "test@example.com", cwd=remote)
+    _git("config", "user.name", "Test", cwd=remote)
+    (remote / "README.md").write_text("first")
+    _git("add", ".", cwd=remote)
+    _git("commit", "-q", "-m", "first", cwd=remote)
+    _git("tag", "v1", cwd=remote)
+    return remote
+
+
+def _checkout(remote, destination, version):
+    destination.mkdir()
+    return GitLocalRepo(str(destination)).checkout_version(
+        CheckoutOptions(remote=str(remote), version=version)
+    )
+
+
+def test_checkout_through_mirror(remote_repo, tmp_path, monkeypatch):
+    monkeypatch.setenv(MIRROR_ENV, "1")
+
+    sha, _ = _checkout(remote_repo, tmp_path / "first", "v1")
+
+    assert (tmp_path / "first" / "README.md").read_text() == "first"
+    assert os.path.isdir(GitMirror(str(remote_repo)).path)
+
+    # Objects of a known sha come from the mirror, the remote isn't needed
+    shutil.rmtree(remote_repo)
+    assert _checkout(remote_repo, tmp_path / "second", sha)[0] == sha
+    assert (tmp_path / "second" / "README.md").read_text() == "first"
+
+
+def test_checkout_without_mirror_by_default(remote_repo, tmp_path, monkeypatch):
+    monkeypatch.delenv(MIRROR_ENV, raising=False)
+
+    _checkout(remote_repo, tmp_path / "first", "main")
+
+    assert (tmp_path / "first" / "README.md").read_text() == "first"
+    assert not os.path.exists(GitMirror(str(remote_repo)).path)
+
+
+def test_checkout_of_src_only_fetches_its_files(remote_repo, tmp_path):
+    (remote_repo / "src").mkdir()
+    (remote_repo / "src" / "lib.c").write_text("lib")
+    (remote_repo / "other").mkdir()
+    (remote_repo / "other" / "large.bin").write_text("not needed")
+    (remote_repo / "LICENSE").write_text("license")
+    _git("add", ".", cwd=remote_repo)
+    _git("commit", "-q", "-m", "second", cwd=remote_repo)
+    _git("config", "uploadpack.allowFilter", "true", cwd=remote_repo)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    GitLocalRepo(str(destination)).checkout_version(
+        CheckoutOptions(
+            remote=remote_repo.as_uri(),
+            version="main",
+            src="src",
+            must_keeps=["/LICENSE*", ".gitmodules"],
+        )
+    )
+
+    assert sorted(os.listdir(destination)) == [".git", "LICENSE", "lib.c"]
+    missing = subprocess.run(
+        ["git", "rev-list", "--objects", "--missing=print", "HEAD"],
+        cwd=destination,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()
+    # README.md and other/large.bin were never fetched
+    assert len([line for line in missing if line.startswith("?")]) == 2
+
+
+def test_prefetched_remotes_are_not_listed_again(remote_repo, tmp_path):
+    other = tmp_path / "other"
+    shutil.copytree(remote_repo, other)
+    _git("tag", "v2", cwd=other)
+
+    asyncio.run(GitRemote.prefetch_refs([str(remote_repo), str(other)]))
+
+    with patch("dfetch.vcs.git_remote.run_on_cmdline") as run_on_cmdline_mock:
+        assert GitRemote(str(remote_repo)).list_of_tags() == ["v1"]
+        assert sorted(GitRemote(str(other)).list_of_tags()) == ["v1", "v2"]
+        assert GitRemote(str(other)).get_default_branch() == "main"
+
+    run_on_cmdline_mock.assert_not_called()
+
+
+def test_failed_prefetch_is_reported_once(tmp_path):
+    missing = str(tmp_path / "missing")
+
+    asyncio.run(GitRemote.prefetch_refs([missing]))
+
+    with patch("dfetch.vcs.git_remote.run_on_cmdline") as run_on_cmdline_mock:
+        run_on_cmdline_mock.return_value.stdout = LSREMOTE_WITH_SYMREF.encode("UTF-8")
+        assert GitRemote(missing).get_default_branch() == "master"
+        run_on_cmdline_mock.assert_not_called()
+
+        assert GitRemote(missing).get_default_branch() == "main"
+        run_on_cmdline_mock.assert_called_once()
+
+
+def test_submodules_are_found_with_constant_number_of_commands(
+    remote_repo, tmp_path, monkeypatch
+):
+    monkeypatch.setenv("GIT_SSH_COMMAND", "ssh")  # prevents additional subprocess call
+    (remote_repo / "README.md").write_text("second")
+    _git("commit", "-q", "-am", "second", cwd=remote_repo)
+    superproject = tmp_path / "superproject"
+    superproject.mkdir()
+    _git("init", "-q", "-b", "main", cwd=superproject)
+    for name, version in [("lib1", "v1"), ("lib2", "main"), ("lib3", "v1")]:
+        _git(
+            *("-c", "protocol.file.allow=always", "submodule", "add", "-q"),
+            *(str(remote_repo), name),
+            cwd=superproject,
+        )
+        _git("checkout", "-q", version, cwd=superproject / name)
+        _git("add", name, cwd=superproject)
+
+    with (
+        patch(
+            "dfetch.vcs.git.run_on_cmdline", wraps=git_module.run_on_cmdline
+        ) as run_on_cmdline_mock,
+        patch("dfetch.vcs.git_remote.run_on_cmdline") as remote_run_on_cmdline_mock,
+    ):
+        submodules = GitLocalRepo(superproject).submodules()
+
+    assert run_on_cmdline_mock.call_count == 2
+    remote_run_on_cmdline_mock.assert_not_called()
+    assert [(s.name, s.path, s.url, s.branch, s.tag) for s in submodules] == [
+        ("lib1", "lib1", str(remote_repo), "", "v1"),
+        ("lib2", "lib2", str(remote_repo), "main", ""),
+        ("lib3", "lib3", str(remote_repo), "", "v1"),
+    ]
+    assert all(s.toplevel == str(superproject) for s in submodules)
+
+
+@pytest.mark.parametrize(
+    "path, src, ignore, expected",
+    [
+        ("ext/lib", None, None, True),
+        ("ext/lib", "ext", None, True),
+        ("ext/lib", "ext/lib", None, True),
+        ("ext", "ext/lib/include", None, True),
+        ("other/lib", "ext", None, False),
+        ("ext_other/lib", "ext", None, False),
+        ("ext_a/lib", "ext_*", None, True),
+        ("ext/lib", "ext", ["lib"], False),
+        ("ext/lib", "ext", ["l*"], False),
+        ("ext/lib/nested", None, ["ext/lib"], False),
+        ("ext/lib", None, ["ext/lib/docs"], True),
+        ("ext/.hidden", None, ["ext/*"], True),
+        ("ext/.hidden", None, ["ext/.*"], False),
+    ],
+)
+def test_is_submodule_kept(path, src, ignore, expected):
+    assert git_module._is_submodule_kept(path, src, ignore) == expected
+
+
+def test_checkout_only_fetches_kept_submodules(
+    remote_repo, tmp_path, monkeypatch, request
+):
+    monkeypatch.setenv("GIT_ALLOW_PROTOCOL", "file")
+    # The environment of git is only determined once
+    non_interactive_env.cache_clear()
+    request.addfinalizer(non_interactive_env.cache_clear)
+    (remote_repo / "README.md").write_text("second")
+    _git("commit", "-q", "-am", "second", cwd=remote_repo)
+    superproject = tmp_path / "superproject"
+    superproject.mkdir()
+    _git("init", "-q", "-b", "main", cwd=superproject)
+    _git("config", "user.email", "test@example.com", cwd=superproject)
+    _git("config", "user.name", "Test", cwd=superproject)
+    for path in ["src/used", "other/unused"]:
+        _git("submodule", "add", "-q", remote_repo.as_uri(), path, cwd=superproject)
+    _git("checkout", "-q", "v1", cwd=superproject / "src" / "used")
+    _git("commit", "-q", "-am", "submodules", cwd=superproject)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    _, submodules = GitLocalRepo(str(destination)).checkout_version(
+        CheckoutOptions(
+            remote=superproject.as_uri(),
+            version="main",
+            src="src",
+            must_keeps=[".gitmodules"],
+            shallow_submodules=True,
+        )
+    )
+
+    assert [(s.path, s.tag) for s in submodules] == [("used", "v1")]
+    assert os.listdir(destination / ".git" / "modules") == ["src"]
+    assert os.listdir(destination / ".git" / "modules" / "src") == ["used"]
+    assert (destination / ".git" / "modules" / "src" / "used" / "shallow").exists()
@@ -0,0 +1,99 @@
+"""Test the hashing of fetched directories."""
+
+# mypy: ignore-errors
+# flake8: noqa
+
+import hashlib
+import os
+from unittest.mock import patch
+
+import pytest
+
+from dfetch.util.hashing import (
+    ALGORITHM_ENV,
+    algorithm_of,
+    hash_algorithm,
+    hash_directory_with,
+    hash_file_content,
+)
+from dfetch.util.util import hash_directory
+
+
+@pytest.fixture(name="directory")
+def fixture_directory(tmp_path):
+    for name in ["b.txt", "a.txt", "sub/c.txt", "sub/deeper/d.txt"]:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+    return str(tmp_path)
+
+
+def test_default_algorithm(monkeypatch):
+    monkeypatch.delenv(ALGORITHM_ENV, raising=False)
+    assert hash_algorithm() == "blake2b"
+
+    monkeypatch.setenv(ALGORITHM_ENV, "md5")
+    assert hash_algorithm() == "md5"
+
+    monkeypatch.setenv(ALGORITHM_ENV, "SHA256")
+    assert hash_algorithm() == "sha256"
+
+    monkeypatch.setenv(ALGORITHM_ENV, "crc32")
+    with pytest.raises(RuntimeError, match="crc32"):
+        hash_algorithm()
+
+
+@pytest.mark.parametrize(
+    "directory_hash, expected",
+    [
+        ("d41d8cd98f00b204e9800998ecf8427e", "md5"),
+        ("blake2b:0123", "blake2b"),
+        ("sha256:0123", "sha256"),
+    ],
+)
+def test_algorithm_of(directory_hash, expected):
+    assert algorithm_of(directory_hash) == expected
+
+
+def test_legacy_hash_is_unchanged(directory):
+    assert hash_directory_with(directory, None, "md5") == hash_directory(
+        directory, None
+    )
+
+
+@pytest.mark.parametrize("algorithm", ["blake2b", "sha256"])
+def test_hash_records_algorithm(directory, algorithm):
+    assert hash_directory_with(directory, None, algorithm).startswith(f"{algorithm}:")
+
+
+def test_hash_does_not_depend_on_listing_order(directory):
+    original = hash_directory_with(directory, None, "blake2b")
+
+    real_walk = os.walk
+
+    def reversed_walk(path):
+        for root, dirs, files in real_walk(path):
+            yield root, dirs, list(reversed(files))
+
+    with patch("dfetch.util.util.os.walk", side_effect=reversed_walk):
+        assert hash_directory_with(directory, None, "blake2b") == original
+
+
+def test_hash_covers_paths_and_skiplist(directory):
+    original = hash_directory_with(directory, None, "blake2b")
+
+    assert hash_directory_with(directory, ["a.txt"], "blake2b") != original
+
+    os.rename(os.path.join(directory, "a.txt"), os.path.join(directory, "e.txt"))
+    assert hash_directory_with(directory, None, "blake2b") != original
+
+
+def test_large_file_is_hashed_completely(tmp_path):
+    content = os.urandom(3 * 1024 * 1024 + 17)
+    large_file = tmp_path / "large.bin"
+    large_file.write_bytes(content)
+
+    assert (
+        hash_file_content(str(large_file), "sha256")
+        == hashlib.sha256(content).hexdigest()
+    )
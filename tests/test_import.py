@@ -9,7 +9,12 @@ from unittest.mock import patch
 import pytest
 import yaml
 
-from dfetch.commands.import_ import Import, _determine_best_remotes
+from dfetch.commands.import_ import (
+    Import,
+    _determine_best_remotes,
+    _improve_remotes,
+    _potential_remotes,
+)
 from dfetch.vcs.git import Submodule
 from dfetch.vcs.svn import External
 
@@ -105,6 +110,41 @@ def test_determine_best_remotes_covers_all_urls_at_max_remotes():
     assert not uncovered, f"URLs left without a matching remote: {uncovered}"
 
 
+def test_determine_best_remotes_scales_to_many_urls():
+    servers = [
+        "https://github.com/",
+        "git@github.com:",
+        "https://gitlab.example.com/",
+        "ssh://git@bitbucket.example.org/scm/",
+    ]
+    urls = {
+        f"{servers[index % len(servers)]}org{index % 37}/lib{index}.git"
+        for index in range(2000)
+    }
+
+    remotes = _determine_best_remotes(urls)
+
+    assert len(remotes) <= 5
+    assert all(any(url.startswith(remote) for remote in remotes) for url in urls)
+
+
+def test_improve_remotes_prefers_specific_remotes():
+    urls = {
+        "https://github.com/some-organisation/a.git",
+        "https://github.com/some-organisation/b.git",
+        "https://github.com/other-organisation/c.git",
+        "https://github.com/other-organisation/d.git",
+    }
+
+    remotes = _improve_remotes(urls, _potential_remotes(urls, 50), 5)
+
+    assert sorted(remotes) == [
+        "https://github.com/other-organisation",
+        "https://github.com/some-organisation",
+    ]
+    assert sorted(remotes) == sorted(_determine_best_remotes(urls))
+
+
 FIRST_EXTERNAL = External(
     name="external1",
     revision="1234",
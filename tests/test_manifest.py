@@ -17,7 +17,12 @@ from dfetch.manifest.manifest import (
     ManifestEntryLocation,
     RequestedProjectNotFoundError,
 )
-from dfetch.manifest.parse import find_manifest, get_submanifests
+from dfetch.manifest.parse import (
+    find_manifest,
+    find_submanifests,
+    get_submanifests,
+    set_manifest_path,
+)
 from dfetch.manifest.project import ProjectEntry, ProjectEntryDict, plaintext_warning
 from dfetch.manifest.remote import Remote
 
@@ -93,26 +98,62 @@ def test_construct_from_yaml() -> None:
     assert manifest.remotes[0].name == "my-remote"
 
 
-def test_no_manifests_found() -> None:
-    with patch("dfetch.manifest.parse.find_file"):
-        with pytest.raises(RuntimeError):
-            find_manifest()
+def _make_files(root, *paths):
+    for path in paths:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(BASIC_MANIFEST, encoding="utf-8")
+
+
+def test_no_manifests_found(tmp_path, monkeypatch) -> None:
+    _make_files(tmp_path, ".git/dfetch.yaml", "node_modules/lib/dfetch.yaml")
+    monkeypatch.chdir(tmp_path)
 
+    with pytest.raises(RuntimeError):
+        find_manifest()
 
-def test_multiple_manifests_found() -> None:
-    with patch("dfetch.manifest.parse.find_file") as find_file_mock:
-        find_file_mock.return_value = [DEFAULT_MANIFEST_NAME, "manifest2.yaml"]
 
-        assert os.path.realpath(DEFAULT_MANIFEST_NAME) == find_manifest()
+def test_manifest_in_parent_is_found(tmp_path, monkeypatch) -> None:
+    _make_files(tmp_path, DEFAULT_MANIFEST_NAME, "sub/dir/other/dfetch.yaml")
+    (tmp_path / "sub" / "dir").mkdir(exist_ok=True)
+    monkeypatch.chdir(tmp_path / "sub" / "dir")
 
+    assert find_manifest() == os.path.realpath(tmp_path / DEFAULT_MANIFEST_NAME)
 
-def test_single_manifest_found() -> None:
-    with patch("dfetch.manifest.parse.find_file") as find_file_mock:
-        find_file_mock.return_value = [DEFAULT_MANIFEST_NAME]
 
-        joined = os.path.realpath(os.path.join(os.getcwd(), DEFAULT_MANIFEST_NAME))
+def test_closest_manifest_in_subdirectory_is_found(tmp_path, monkeypatch) -> None:
+    _make_files(tmp_path / "repo", "a/b/dfetch.yaml", "b/dfetch.yaml", "c/dfetch.yaml")
+    monkeypatch.chdir(tmp_path / "repo")
+
+    with patch("dfetch.manifest.parse.logger") as logger_mock:
         found = find_manifest()
-        assert joined == found
+
+    assert found == os.path.realpath(tmp_path / "repo" / "b" / DEFAULT_MANIFEST_NAME)
+    logger_mock.warning.assert_called_once_with(
+        "Multiple manifests found, using b/dfetch.yaml"
+    )
+
+
+def test_manifest_search_depth_is_limited(tmp_path, monkeypatch) -> None:
+    _make_files(tmp_path / "repo", "a/b/dfetch.yaml")
+    monkeypatch.chdir(tmp_path / "repo")
+    monkeypatch.setenv("DFETCH_MANIFEST_SEARCH_DEPTH", "1")
+
+    with pytest.raises(RuntimeError):
+        find_manifest()
+
+
+def test_given_manifest_is_used(tmp_path, monkeypatch) -> None:
+    _make_files(tmp_path, DEFAULT_MANIFEST_NAME, "other.yaml")
+    monkeypatch.chdir(tmp_path)
+
+    set_manifest_path("other.yaml")
+    try:
+        assert find_manifest() == os.path.realpath(tmp_path / "other.yaml")
+        set_manifest_path("missing.yaml")
+        with pytest.raises(RuntimeError, match="missing.yaml does not exist"):
+            find_manifest()
+    finally:
+        set_manifest_path(None)
 
 
 @pytest.mark.parametrize(
@@ -124,30 +165,56 @@ def test_single_manifest_found() -> None:
         ),
         (
             "single-submanifest",
-            ["some-manifest.yaml"],
+            ["dfetch.yaml"],
         ),
         (
             "multi-submanifests",
-            ["some-manifest.yaml", "some-other-manifest.yaml"],
+            ["a/dfetch.yaml", "b/c/dfetch.yaml"],
         ),
     ],
 )
-def test_get_submanifests(name, manifest_paths) -> None:
-    parent = ProjectEntry({"name": "name"})
-
-    with patch("dfetch.manifest.parse.find_file") as find_file_mock:
-        with patch("dfetch.manifest.parse.Manifest.from_file") as from_file_mock:
-            find_file_mock.return_value = manifest_paths
-
-            found_submanifests = get_submanifests([parent.name])
-
-            assert len(found_submanifests) == len(manifest_paths)
+def test_get_submanifests(name, manifest_paths, tmp_path) -> None:
+    _make_files(tmp_path, *manifest_paths, ".git/dfetch.yaml", "skip/dfetch.yaml")
+    skip = [os.path.realpath(tmp_path / "skip" / DEFAULT_MANIFEST_NAME)]
+
+    with patch("dfetch.manifest.parse.Manifest.from_file") as from_file_mock:
+        found_submanifests = get_submanifests(skip, root=tmp_path)
+
+    assert len(found_submanifests) == len(manifest_paths)
+    assert [call[0][0] for call in from_file_mock.call_args_list] == [
+        os.path.realpath(tmp_path / path) for path in manifest_paths
+    ]
+
+
+def test_submanifests_of_nested_roots_are_found_once(tmp_path) -> None:
+    _make_files(tmp_path, "a/dfetch.yaml", "a/b/dfetch.yaml", "a/b/c/dfetch.yaml")
+    root_a = os.path.realpath(tmp_path / "a")
+    root_b = os.path.realpath(tmp_path / "a" / "b")
+
+    assert find_submanifests([tmp_path / "a", tmp_path / "a" / "b"]) == {
+        root_a: [os.path.join(root_a, DEFAULT_MANIFEST_NAME)],
+        root_b: [
+            os.path.join(root_b, DEFAULT_MANIFEST_NAME),
+            os.path.join(root_b, "c", DEFAULT_MANIFEST_NAME),
+        ],
+    }
+
+
+def test_submanifests_of_roots_in_skipped_directories_are_found(tmp_path) -> None:
+    _make_files(
+        tmp_path,
+        "ext/.hidden/b/dfetch.yaml",
+        "ext/node_modules/c/dfetch.yaml",
+        "ext/node_modules/c/.git/dfetch.yaml",
+    )
+    root_b = os.path.realpath(tmp_path / "ext" / ".hidden" / "b")
+    root_c = os.path.realpath(tmp_path / "ext" / "node_modules" / "c")
 
-            for path, call in zip(
-                manifest_paths,
-                from_file_mock.call_args_list,
-            ):
-                assert os.path.realpath(path) == call[0][0]
+    assert find_submanifests([tmp_path / "ext", root_b, root_c]) == {
+        os.path.realpath(tmp_path / "ext"): [],
+        root_b: [os.path.join(root_b, DEFAULT_MANIFEST_NAME)],
+        root_c: [os.path.join(root_c, DEFAULT_MANIFEST_NAME)],
+    }
 
 
 def test_suggestion_found() -> None:
@@ -718,3 +785,62 @@ def test_determine_remote_matches_exact_and_subpath():
     assert (
         Manifest.find_remote_for_url(m, "https://github.com/myorg/repo.git") is not None
     )
+
+
+def _cached_manifest(tmp_path, text: str = BASIC_MANIFEST) -> Manifest:
+    """Load the manifest with *text* twice, the second time from the cache."""
+    path = tmp_path / DEFAULT_MANIFEST_NAME
+    path.write_text(text, encoding="utf-8")
+    Manifest.from_file(str(path))
+    with patch("dfetch.manifest.manifest.load") as load_mock:
+        manifest = Manifest.from_file(str(path))
+    load_mock.assert_not_called()
+    return manifest
+
+
+def test_unchanged_manifest_is_not_parsed_again(tmp_path) -> None:
+    manifest = _cached_manifest(tmp_path)
+
+    assert manifest.version == "0"
+    assert [p.name for p in manifest.projects] == ["my-project"]
+    assert manifest.projects[0].remote_url == "http://www.myremote.com"
+    assert [r.name for r in manifest.remotes] == ["my-remote"]
+    assert manifest.find_name_in_manifest("my-project") == ManifestEntryLocation(
+        line_number=10, start=12, end=21
+    )
+
+
+def test_changed_manifest_is_parsed_again(tmp_path) -> None:
+    path = tmp_path / DEFAULT_MANIFEST_NAME
+    path.write_text(BASIC_MANIFEST, encoding="utf-8")
+    Manifest.from_file(str(path))
+
+    path.write_text(BASIC_MANIFEST.replace("my-project", "other"), encoding="utf-8")
+    manifest = Manifest.from_file(str(path))
+
+    assert [p.name for p in manifest.projects] == ["other"]
+
+
+def test_invalid_manifest_is_never_cached(tmp_path) -> None:
+    path = tmp_path / DEFAULT_MANIFEST_NAME
+    path.write_text(BASIC_MANIFEST + "   - name: my-project\n", encoding="utf-8")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="Duplicate"):
+            Manifest.from_file(str(path))
+
+
+def test_cached_manifest_can_be_updated(tmp_path) -> None:
+    manifest = _cached_manifest(tmp_path)
+    parsed = Manifest.from_yaml(BASIC_MANIFEST)
+    for updated in (manifest, parsed):
+        project = updated.projects[0]
+        project.version = project.version._replace(revision="176")
+        updated.update_project_version(project)
+
+    manifest.dump()
+
+    assert (tmp_path / DEFAULT_MANIFEST_NAME).read_text(
+        encoding="utf-8"
+    ) == parsed._doc.as_yaml()
+    assert "revision: '176'" in parsed._doc.as_yaml()
@@ -15,6 +15,7 @@ from hypothesis import strategies as st
 from dfetch.util.util import in_directory
 from dfetch.vcs.patch import (
     Patch,
+    PatchStack,
     PatchType,
     _reverse_patch,
 )
@@ -353,3 +354,102 @@ def test_patch_prefix_new_file(tmp_path):
     )
 
     assert prefixed_patch.dump() == expected_patch
+
+
+def _diff(name, old, new):
+    """Create a unified diff of *name* going from *old* to *new* text."""
+    return "".join(
+        difflib.unified_diff(
+            old.splitlines(keepends=True),
+            new.splitlines(keepends=True),
+            fromfile=name,
+            tofile=name,
+            lineterm="\n",
+        )
+    )
+
+
+def test_patch_stack_applies_patches_on_top_of_each_other(tmp_path):
+    """Later patches see the changes of earlier ones, the file is written once."""
+    target_file = tmp_path / "file.txt"
+    target_file.write_text("a\nb\nc\n")
+
+    stack = PatchStack(root=tmp_path)
+    stack.apply(Patch.from_string(_diff("file.txt", "a\nb\nc\n", "a\nB\nc\n")))
+    stack.apply(Patch.from_string(_diff("file.txt", "a\nB\nc\n", "a\nB\nc\nd\n")))
+
+    assert target_file.read_text() == "a\nb\nc\n"
+
+    stack.write()
+
+    assert target_file.read_text() == "a\nB\nc\nd\n"
+
+
+def test_patch_stack_patches_new_file_of_earlier_patch(tmp_path):
+    """A file created by one patch can be changed by the next one."""
+    new_file = "\n".join(
+        [
+            "diff --git a/new.txt b/new.txt",
+            "new file mode 100644",
+            "--- /dev/null",
+            "+++ b/new.txt",
+            "@@ -0,0 +1,2 @@",
+            "+first",
+            "+second",
+            "",
+        ]
+    )
+
+    stack = PatchStack(root=tmp_path)
+    stack.apply(Patch.from_string(new_file))
+    stack.apply(Patch.from_string(_diff("new.txt", "first\nsecond\n", "first\n")))
+
+    assert not (tmp_path / "new.txt").exists()
+
+    stack.write()
+
+    assert (tmp_path / "new.txt").read_text() == "first\n"
+
+
+def test_patch_stack_keeps_earlier_patches_when_one_fails(tmp_path):
+    """A failing patch is reported by its path, earlier patches are kept."""
+    (tmp_path / "file.txt").write_text("a\nb\nc\n")
+    failing = tmp_path / "failing.patch"
+    failing.write_text(_diff("missing.txt", "x\n", "y\n"))
+
+    stack = PatchStack(root=tmp_path)
+    stack.apply(Patch.from_string(_diff("file.txt", "a\nb\nc\n", "a\nB\nc\n")))
+    with pytest.raises(RuntimeError, match='Applying patch ".*failing.patch" failed'):
+        stack.apply(Patch.from_file(failing))
+    stack.write()
+
+    assert (tmp_path / "file.txt").read_text() == "a\nB\nc\n"
+
+
+@settings(max_examples=200)
+@given(original_lines=st_file_lines, rng=st.randoms())
+def test_patch_stack_matches_applying_patches_one_by_one(original_lines, rng):
+    """The stack gives the same result as applying every patch to disk."""
+    versions = ["\n".join(original_lines + [""])]
+    for _ in range(3):
+        lines = versions[-1].splitlines()
+        lines[rng.randrange(len(lines))] = "changed"
+        lines.insert(rng.randrange(len(lines) + 1), "inserted")
+        versions.append("\n".join(lines + [""]))
+    patches = [_diff("file.txt", old, new) for old, new in zip(versions, versions[1:])]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        one_by_one, stacked = Path(tmpdir) / "one_by_one", Path(tmpdir) / "stacked"
+        for root in (one_by_one, stacked):
+            root.mkdir()
+            (root / "file.txt").write_text(versions[0])
+
+        stack = PatchStack(root=stacked)
+        for patch in patches:
+            patchset = Patch.from_string(patch)._patchset
+            assert patchset.apply(root=str(one_by_one), fuzz=True)
+            stack.apply(Patch.from_string(patch))
+        stack.write()
+
+        assert (stacked / "file.txt").read_text() == versions[-1]
+        assert (one_by_one / "file.txt").read_text() == versions[-1]
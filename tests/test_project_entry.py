@@ -45,6 +45,14 @@ def test_projectentry_as_yaml():
     assert ProjectEntry({"name": "SomeProject"}).as_yaml() == {"name": "SomeProject"}
 
 
+def test_projectentry_shallow_submodules():
+    project = ProjectEntry({"name": "SomeProject", "shallow-submodules": True})
+
+    assert project.shallow_submodules
+    assert project.as_yaml() == {"name": "SomeProject", "shallow-submodules": True}
+    assert not ProjectEntry({"name": "SomeProject"}).shallow_submodules
+
+
 def test_projectentry_as_str():
     assert (
         str(ProjectEntry({"name": "SomeProject"}))
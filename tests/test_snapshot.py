@@ -0,0 +1,111 @@
+"""Test the snapshots used to detect local changes."""
+
+# mypy: ignore-errors
+# flake8: noqa
+
+import os
+import pathlib
+import time
+from unittest.mock import patch
+
+import pytest
+
+from dfetch.util.hashing import hash_directory_with
+from dfetch.util.snapshot import DirectorySnapshot
+
+
+@pytest.fixture(name="project")
+def fixture_project(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.c").write_text("int main() {}")
+    (tmp_path / "README.md").write_text("readme")
+    (tmp_path / ".dfetch_data.yaml").write_text("metadata")
+    return str(tmp_path)
+
+
+@pytest.fixture(name="algorithm", params=["md5", "blake2b", "sha256"])
+def fixture_algorithm(request):
+    return request.param
+
+
+def _settled(snapshot):
+    """Pretend the snapshot was taken long after the files were written."""
+    snapshot.taken_ns = time.time_ns() + 10_000_000_000
+    return snapshot
+
+
+def test_snapshot_hash_equals_directory_hash(algorithm, project):
+    snapshot = DirectorySnapshot.take(project, [".dfetch_data.yaml"], algorithm)
+
+    assert snapshot.directory_hash == hash_directory_with(
+        project, [".dfetch_data.yaml"], algorithm
+    )
+    assert sorted(state.path for state in snapshot.files) == [
+        "README.md",
+        "src/main.c",
+    ]
+
+
+def test_unchanged_files_are_not_read(algorithm, project):
+    snapshot = _settled(DirectorySnapshot.take(project, None, algorithm))
+
+    with patch("dfetch.util.hashing.hash_file_content") as mocked_hash:
+        assert snapshot.refresh(project, None) is not None
+
+    mocked_hash.assert_not_called()
+
+
+def test_touched_file_with_same_content_is_unchanged(algorithm, project):
+    snapshot = _settled(DirectorySnapshot.take(project, None, algorithm))
+    os.utime(os.path.join(project, "README.md"), ns=(0, 1_000_000_000))
+
+    refreshed = snapshot.refresh(project, None)
+
+    assert refreshed is not None
+    assert refreshed.directory_hash == snapshot.directory_hash
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda root: pathlib.Path(root, "README.md").write_text("changed"),
+        lambda root: os.remove(os.path.join(root, "README.md")),
+        lambda root: pathlib.Path(root, "new.txt").touch(),
+        lambda root: os.rename(
+            os.path.join(root, "README.md"), os.path.join(root, "OTHER.md")
+        ),
+    ],
+    ids=["modified", "removed", "added", "renamed"],
+)
+def test_changes_are_detected(algorithm, project, change):
+    snapshot = _settled(DirectorySnapshot.take(project, None, algorithm))
+
+    change(project)
+
+    assert snapshot.refresh(project, None) is None
+    assert hash_directory_with(project, None, algorithm) != snapshot.directory_hash
+
+
+def test_recently_written_files_are_read_again(algorithm, project):
+    readme = os.path.join(project, "README.md")
+    snapshot = DirectorySnapshot.take(project, None, algorithm)
+    stat = os.stat(readme)
+
+    # Same size and modification time, but a different content
+    with open(readme, "w", encoding="utf-8") as readme_file:
+        readme_file.write("README")
+    os.utime(readme, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert snapshot.refresh(project, None) is None
+
+
+def test_snapshot_is_stored(algorithm, project):
+    snapshot = DirectorySnapshot.take(project, None, algorithm)
+    snapshot.save(project)
+
+    loaded = DirectorySnapshot.load(project)
+
+    assert loaded.directory_hash == snapshot.directory_hash
+    assert loaded.taken_ns == snapshot.taken_ns
+    assert loaded.files == snapshot.files
+    assert DirectorySnapshot.load(os.path.join(project, "src")) is None
@@ -0,0 +1,51 @@
+"""Test that starting dfetch only imports what the chosen command needs."""
+
+# mypy: ignore-errors
+# flake8: noqa
+
+import subprocess
+import sys
+
+import pytest
+
+from dfetch.__main__ import COMMANDS, _selected_commands, create_parser
+
+HEAVY_MODULES = ["asyncio", "cyclonedx", "sarif_om", "tldextract"]
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        (["check"], ["check"]),
+        (["--verbose", "--trace", "trace.json", "update", "--force"], ["update"]),
+        (["update-patch", "some-project"], ["update-patch"]),
+        ([], None),
+        (["--help"], None),
+        (["no-such-command"], None),
+    ],
+)
+def test_selected_commands(argv, expected):
+    assert _selected_commands(argv) == expected
+
+
+def test_all_commands_are_in_parser():
+    parser = create_parser()
+
+    subparsers = parser._subparsers._group_actions[0]
+    assert list(subparsers.choices) == list(COMMANDS)
+
+
+@pytest.mark.parametrize("command", ["check", "update", "validate", "report"])
+def test_command_does_not_import_heavy_modules(command):
+    code = (
+        "import sys\n"
+        "from dfetch.__main__ import _selected_commands, create_parser\n"
+        f"create_parser(_selected_commands([{command!r}])).parse_args([{command!r}])\n"
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == ""
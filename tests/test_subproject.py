@@ -18,7 +18,11 @@ class ConcreteSubProject(SubProject):
     _wanted_version: Version
 
     def _fetch_impl(
-        self, version: Version, eol_hint: str | None = None
+        self,
+        version: Version,
+        eol_hint: str | None = None,
+        *,
+        shallow_submodules: bool = False,
     ) -> tuple[Version, list[Dependency]]:
         return Version(), []
 
@@ -113,6 +117,34 @@ def test_check_wanted_with_local(
             assert have == expect_have
 
 
+@pytest.mark.parametrize(
+    "name, given_on_disk, given_wanted, expectation",
+    [
+        ("same-tag", Version(tag="0.0.4"), Version(tag="0.0.4"), True),
+        ("other-tag", Version(tag="0.0.3"), Version(tag="0.0.4"), False),
+        ("nothing-on-disk", None, Version(tag="0.0.4"), False),
+        ("branch", Version(branch="a-branch"), Version(branch="a-branch"), False),
+        ("revision-not-enough", Version(revision="1"), Version(revision="1"), False),
+    ],
+)
+def test_has_wanted_pin(
+    name: str,
+    given_on_disk: Union[Version, None],
+    given_wanted: Version,
+    expectation: bool,
+):
+    with patch("dfetch.project.subproject.os.path.exists") as mocked_path_exists:
+        with patch("dfetch.project.subproject.Metadata.from_file") as mocked_metadata:
+            subproject = ConcreteSubProject(ProjectEntry({"name": "proj1"}))
+
+            mocked_path_exists.return_value = bool(given_on_disk)
+            mocked_metadata().version = given_on_disk
+
+            subproject._wanted_version = given_wanted
+
+            assert subproject.has_wanted_pin() == expectation
+
+
 @pytest.mark.parametrize(
     "name, hash_in_metadata, current_hash, expectation",
     [
@@ -124,14 +156,15 @@ def test_check_wanted_with_local(
 def test_are_there_local_changes(
     name: str, hash_in_metadata: str, current_hash: str, expectation: bool
 ):
-    with patch("dfetch.project.subproject.hash_directory") as mocked_hash_directory:
+    with patch("dfetch.project.subproject.DirectorySnapshot") as mocked_snapshot:
         with patch(
             "dfetch.project.subproject.SubProject._on_disk_hash"
         ) as mocked_on_disk_hash:
             subproject = ConcreteSubProject(ProjectEntry({"name": "proj1"}))
 
             mocked_on_disk_hash.return_value = hash_in_metadata
-            mocked_hash_directory.return_value = current_hash
+            mocked_snapshot.load.return_value = None
+            mocked_snapshot.take.return_value.directory_hash = current_hash
 
             assert expectation == subproject._are_there_local_changes(
                 files_to_ignore=[]
@@ -154,12 +187,12 @@ def test_update_uses_ignored_files_callback_for_stored_hash():
 
     with patch("dfetch.project.subproject.os.path.exists") as mock_exists:
         with patch("dfetch.project.subproject.Metadata.from_file") as mock_meta_file:
-            with patch("dfetch.project.subproject.hash_directory") as mock_hash:
+            with patch("dfetch.project.subproject.DirectorySnapshot") as mock_snapshot:
                 with patch("dfetch.project.subproject.safe_rm"):
                     with patch("dfetch.project.subproject.Metadata.dump"):
                         mock_exists.return_value = True
                         mock_meta_file.return_value.version = Version(revision="abc")
-                        mock_hash.return_value = "hash123"
+                        mock_snapshot.take.return_value.directory_hash = "hash123"
 
                         subproject = ConcreteSubProject(ProjectEntry({"name": "p1"}))
                         subproject._wanted_version = Version(revision="new")
@@ -168,7 +201,7 @@ def test_update_uses_ignored_files_callback_for_stored_hash():
 
                         assert callback.call_count == 2
                         # The hash must be computed with the post-fetch ignored list
-                        hash_call_skiplist = mock_hash.call_args[1]["skiplist"]
+                        hash_call_skiplist = mock_snapshot.take.call_args[1]["skiplist"]
                         assert "new_ignored.txt" in hash_call_skiplist
                         assert "old_file.txt" not in hash_call_skiplist
 
@@ -184,7 +217,7 @@ def test_update_eol_hint_propagated_for_file_destination():
 
     with patch("dfetch.project.subproject.os.path.exists") as mock_exists:
         with patch("dfetch.project.subproject.Metadata.from_file") as mock_meta_file:
-            with patch("dfetch.project.subproject.hash_directory"):
+            with patch("dfetch.project.subproject.DirectorySnapshot"):
                 with patch("dfetch.project.subproject.safe_rm"):
                     with patch("dfetch.project.subproject.Metadata.dump"):
                         with patch.object(
@@ -3,13 +3,16 @@
 # mypy: ignore-errors
 # flake8: noqa
 
+import datetime
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from dfetch.manifest.project import ProjectEntry
+from dfetch.project import prefetch_remotes
 from dfetch.project.svnsubproject import SvnSubProject
+from dfetch.util.cache import set_refresh
 from dfetch.util.cmdline import SubprocessCommandError
 from dfetch.vcs.svn import External, SshHostKeyError, SvnRemote, SvnRepo
 
@@ -680,3 +683,284 @@ def test_create_diff_handles_non_utf8_diff_output():
         patch_obj = SvnRepo(".").create_diff("1", "2", [])
 
         assert not patch_obj.is_empty()
+
+
+def test_get_info_of_network_remote_is_cached():
+    with patch("dfetch.vcs.svn.run_on_cmdline") as run_on_cmdline_mock:
+        run_on_cmdline_mock.return_value.stdout = os.linesep.join(
+            SVN_INFO.split("\n")
+        ).encode()
+
+        first = SvnRepo.get_info_from_target("svn://svn.example.com/repo/trunk")
+        second = SvnRepo.get_info_from_target("svn://svn.example.com/repo/trunk")
+
+        assert first == second
+        assert second["Revision"] == "3976"
+        run_on_cmdline_mock.assert_called_once()
+
+
+SVN_INFO_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<info>
+<entry kind="dir" path="trunk" revision="3976">
+<url>svn://svn.example.com/repo/trunk</url>
+<relative-url>^/trunk</relative-url>
+<repository>
+<root>svn://svn.example.com/repo</root>
+<uuid>077c9a1d-76f4-0596-57cc-ce57b7db7bff</uuid>
+</repository>
+<commit revision="3970">
+<author>bas.vodde</author>
+<date>2021-02-06T12:57:00.000000Z</date>
+</commit>
+</entry>
+<entry kind="dir" path="my%20branch" revision="3976">
+<url>svn://svn.example.com/repo/branches/my%20branch</url>
+<repository>
+<root>svn://svn.example.com/repo</root>
+</repository>
+<commit revision="3976">
+</commit>
+</entry>
+</info>
+"""
+
+
+def test_prefetch_info_asks_all_targets_at_once():
+    with patch("dfetch.vcs.svn.run_on_cmdline") as run_on_cmdline_mock:
+        run_on_cmdline_mock.return_value.stdout = SVN_INFO_XML.encode()
+
+        SvnRepo.prefetch_info(
+            [
+                "svn://svn.example.com/repo/trunk/",
+                "svn://svn.example.com/repo/branches/my%20branch",
+                "local/path",
+            ]
+        )
+        trunk = SvnRepo.get_info_from_target("svn://svn.example.com/repo/trunk")
+        branch = SvnRepo.get_info_from_target(
+            "svn://svn.example.com/repo/branches/my%20branch"
+        )
+
+    run_on_cmdline_mock.assert_called_once()
+    assert run_on_cmdline_mock.call_args[0][1][2:] == [
+        "info",
+        "--xml",
+        "svn://svn.example.com/repo/trunk",
+        "svn://svn.example.com/repo/branches/my%20branch",
+    ]
+    assert trunk == {
+        "Path": "trunk",
+        "URL": "svn://svn.example.com/repo/trunk",
+        "Relative URL": "^/trunk",
+        "Repository Root": "svn://svn.example.com/repo",
+        "Repository UUID": "077c9a1d-76f4-0596-57cc-ce57b7db7bff",
+        "Revision": "3976",
+        "Node Kind": "directory",
+        "Last Changed Author": "bas.vodde",
+        "Last Changed Rev": "3970",
+        "Last Changed Date": datetime.datetime(
+            2021, 2, 6, 12, 57, tzinfo=datetime.timezone.utc
+        )
+        .astimezone()
+        .strftime("%Y-%m-%d %H:%M:%S %z (%a, %d %b %Y)"),
+    }
+    assert branch["Revision"] == "3976"
+
+
+def test_prefetch_info_keeps_info_of_existing_targets():
+    with patch("dfetch.vcs.svn.run_on_cmdline") as run_on_cmdline_mock:
+        run_on_cmdline_mock.side_effect = SubprocessCommandError(
+            ["svn"], SVN_INFO_XML, "svn: E200009: Could not display info", 1
+        )
+
+        SvnRepo.prefetch_info(
+            [
+                "svn://svn.example.com/repo/branches/my branch",
+                "svn://svn.example.com/repo/branches/gone",
+                "svn://svn.example.com/repo/trunk",
+            ]
+        )
+        run_on_cmdline_mock.reset_mock()
+        branch = SvnRepo.get_info_from_target(
+            "svn://svn.example.com/repo/branches/my branch"
+        )
+        SvnRepo.get_info_from_target("svn://svn.example.com/repo/trunk")
+        run_on_cmdline_mock.assert_not_called()
+
+        with pytest.raises(SubprocessCommandError):
+            SvnRepo.get_info_from_target("svn://svn.example.com/repo/branches/gone")
+
+    assert branch["URL"] == "svn://svn.example.com/repo/branches/my%20branch"
+
+
+def test_prefetch_without_svn_leaves_the_error_to_the_projects():
+    projects = [
+        ProjectEntry({"name": "a", "url": "https://example.com/a.git"}),
+        ProjectEntry({"name": "b", "url": "https://example.com/b.git"}),
+        ProjectEntry({"name": "c", "url": "svn://example.com/c", "vcs": "svn"}),
+    ]
+    with (
+        patch("dfetch.vcs.svn.run_on_cmdline") as run_on_cmdline_mock,
+        patch("dfetch.project.GitRemote.prefetch_refs", new_callable=AsyncMock),
+    ):
+        run_on_cmdline_mock.side_effect = RuntimeError(
+            "svn not available on system, please install"
+        )
+
+        prefetch_remotes(projects)
+
+        with pytest.raises(RuntimeError):
+            SvnRepo.get_info_from_target("svn://example.com/c/trunk")
+
+
+def test_externals_from_url_without_externals_asks_no_info():
+    with (
+        patch("dfetch.vcs.svn.run_on_cmdline") as mock_run,
+        patch("dfetch.vcs.svn.SvnRepo.get_info_from_target") as mock_info,
+    ):
+        mock_run.return_value.stdout = b"\n"
+
+        assert SvnRepo.externals_from_url(REPO_ROOT + "/trunk") == []
+
+        mock_info.assert_not_called()
+
+
+def test_svn_subproject_prefetches_wanted_versions():
+    projects = [
+        ProjectEntry({"name": "trunk", "url": "svn://example.com/a"}),
+        ProjectEntry({"name": "branch", "url": "svn://example.com/b", "branch": "x"}),
+        ProjectEntry({"name": "tag", "url": "svn://example.com/c", "tag": "v1"}),
+        ProjectEntry({"name": "pinned", "url": "svn://example.com/d", "revision": "1"}),
+    ]
+
+    with patch("dfetch.project.svnsubproject.SvnRepo.prefetch_info") as prefetch_mock:
+        SvnSubProject.prefetch_info(projects)
+
+    assert list(prefetch_mock.call_args[0][0]) == [
+        "svn://example.com/a/trunk",
+        "svn://example.com/b/branches/x",
+        "svn://example.com/c/tags",
+        "svn://example.com/c/tags/v1/",
+    ]
+
+
+TAGS_INFO = {
+    "URL": "svn://svn.example.com/repo/tags",
+    "Repository Root": "svn://svn.example.com/repo",
+    "Repository UUID": "6ee7df9c-2f56-4d6e-9e4d-26a3bfa4b0ec",
+}
+
+
+def test_tags_at_unchanged_revision_are_listed_once():
+    remote = SvnRemote("svn://svn.example.com/repo")
+    with (
+        patch("dfetch.vcs.svn.run_on_cmdline") as run_on_cmdline_mock,
+        patch("dfetch.vcs.svn.SvnRepo.get_info_from_target") as info_mock,
+    ):
+        info_mock.return_value = {**TAGS_INFO, "Last Changed Rev": "12"}
+        run_on_cmdline_mock.return_value.stdout = b"v1/\nv2/\n"
+
+        assert remote.list_of_tags() == ["v1", "v2"]
+        assert remote.list_of_tags() == ["v1", "v2"]
+
+        info_mock.return_value = {**TAGS_INFO, "Last Changed Rev": "13"}
+        remote.list_of_tags()
+
+    assert [call[0][1][2:] for call in run_on_cmdline_mock.call_args_list] == [
+        ["ls", "svn://svn.example.com/repo/tags@12"],
+        ["ls", "svn://svn.example.com/repo/tags@13"],
+    ]
+
+
+def test_listing_is_shared_by_urls_of_the_same_repository():
+    with (
+        patch("dfetch.vcs.svn.run_on_cmdline") as run_on_cmdline_mock,
+        patch("dfetch.vcs.svn.SvnRepo.get_info_from_target") as info_mock,
+    ):
+        run_on_cmdline_mock.return_value.stdout = b"v1/\n"
+        info_mock.return_value = {**TAGS_INFO, "Last Changed Rev": "12"}
+        SvnRemote("svn://svn.example.com/repo").list_of_tags()
+
+        info_mock.return_value = {
+            **TAGS_INFO,
+            "URL": "https://mirror.example.com/svn/repo/tags",
+            "Repository Root": "https://mirror.example.com/svn/repo",
+            "Last Changed Rev": "12",
+        }
+        assert SvnRemote("https://mirror.example.com/svn/repo").list_of_tags() == ["v1"]
+
+    assert run_on_cmdline_mock.call_count == 1
+
+
+def test_listing_without_repository_uuid_is_not_cached():
+    remote = SvnRemote("svn://svn.example.com/repo")
+    with (
+        patch("dfetch.vcs.svn.run_on_cmdline") as run_on_cmdline_mock,
+        patch("dfetch.vcs.svn.SvnRepo.get_info_from_target") as info_mock,
+    ):
+        info_mock.return_value = {"Last Changed Rev": "12"}
+        run_on_cmdline_mock.return_value.stdout = b"v1/\n"
+
+        remote.list_of_tags()
+        remote.list_of_tags()
+
+    assert run_on_cmdline_mock.call_count == 2
+
+
+def test_local_remote_listing_is_not_cached():
+    remote = SvnRemote("file:///repo")
+    with patch("dfetch.vcs.svn.run_on_cmdline") as run_on_cmdline_mock:
+        run_on_cmdline_mock.return_value.stdout = b"v1/\n"
+
+        remote.list_of_tags()
+        remote.list_of_tags()
+
+    assert [call[0][1][2:] for call in run_on_cmdline_mock.call_args_list] == [
+        ["ls", "file:///repo/tags"],
+        ["ls", "file:///repo/tags"],
+    ]
+
+
+def test_externals_at_revision_are_scanned_once():
+    base = "svn://svn.example.com/repos/myproject/trunk"
+    raw = f"{base} - {os.linesep}svn://svn.example.com/repos/libs/trunk@100 mylib"
+    with (
+        patch("dfetch.vcs.svn.run_on_cmdline") as mock_run,
+        patch("dfetch.vcs.svn.SvnRepo.get_info_from_target") as mock_info,
+    ):
+        mock_run.return_value.stdout = raw.encode()
+        mock_info.return_value = {
+            "URL": base,
+            "Repository Root": "svn://svn.example.com/repos",
+            "Repository UUID": "6ee7df9c-2f56-4d6e-9e4d-26a3bfa4b0ec",
+        }
+
+        first = SvnRepo.externals_from_url(base, "42")
+        second = SvnRepo.externals_from_url(base, "42")
+        SvnRepo.externals_from_url(base)
+
+    assert first == second
+    assert first[0].url == "svn://svn.example.com/repos/libs"
+    assert mock_run.call_count == 2
+
+
+def test_refresh_ignores_cached_externals():
+    base = "svn://svn.example.com/repos/myproject/trunk"
+    with (
+        patch("dfetch.vcs.svn.run_on_cmdline") as mock_run,
+        patch("dfetch.vcs.svn.SvnRepo.get_info_from_target") as mock_info,
+    ):
+        mock_run.return_value.stdout = b""
+        mock_info.return_value = {
+            "URL": base,
+            "Repository Root": "svn://svn.example.com/repos",
+            "Repository UUID": "6ee7df9c-2f56-4d6e-9e4d-26a3bfa4b0ec",
+        }
+        SvnRepo.externals_from_url(base, "42")
+        set_refresh(True)
+        try:
+            SvnRepo.externals_from_url(base, "42")
+        finally:
+            set_refresh(False)
+
+    assert mock_run.call_count == 2
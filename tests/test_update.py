@@ -11,11 +11,20 @@ import pytest
 
 from dfetch.commands.update import Update
 from dfetch.manifest.project import ProjectEntry
+from dfetch.project import _remotes_to_prefetch
 from tests.manifest_mock import mock_manifest
 
 DEFAULT_ARGS = argparse.Namespace(no_recommendations=False)
 DEFAULT_ARGS.force = False
 DEFAULT_ARGS.projects = []
+DEFAULT_ARGS.jobs = 1
+DEFAULT_ARGS.shallow_submodules = False
+
+
+@pytest.fixture(autouse=True)
+def fixture_no_prefetch():
+    with patch("dfetch.project.prefetch_remotes"):
+        yield
 
 
 @pytest.mark.parametrize(
@@ -71,6 +80,8 @@ def test_forced_update():
                                 no_recommendations=False,
                                 force=True,
                                 projects=[],
+                                jobs=1,
+                                shallow_submodules=False,
                             )
 
                             update(args)
@@ -78,6 +89,7 @@ def test_forced_update():
                                 force=True,
                                 ignored_files_callback=ANY,
                                 eol_preferences_callback=ANY,
+                                shallow_submodules=False,
                             )
 
                             cb = mocked_create.return_value.update.call_args.kwargs[
@@ -89,6 +101,33 @@ def test_forced_update():
                             )
 
 
+def test_shallow_submodules_are_passed_to_the_update():
+    update = Update()
+
+    fake_superproject = Mock()
+    fake_superproject.manifest = mock_manifest([{"name": "some_project"}])
+    fake_superproject.root_directory = Path("/tmp")
+
+    with patch(
+        "dfetch.commands.update.create_super_project", return_value=fake_superproject
+    ):
+        with patch("dfetch.manifest.parse.get_submanifests", return_value=[]):
+            with patch("dfetch.project.create_sub_project") as mocked_create:
+                with patch("dfetch.commands.update.in_directory"):
+                    with patch("dfetch.commands.update.Update._check_destination"):
+                        args = argparse.Namespace(
+                            no_recommendations=True,
+                            force=False,
+                            projects=[],
+                            jobs=1,
+                            shallow_submodules=True,
+                        )
+
+                        update(args)
+
+    assert mocked_create.return_value.update.call_args.kwargs["shallow_submodules"]
+
+
 def test_create_menu():
     subparsers = argparse.ArgumentParser().add_subparsers()
 
@@ -100,6 +139,8 @@ def test_create_menu():
         ["-h", "--help"],
         ["-f", "--force"],
         ["-N", "--no-recommendations"],
+        ["--shallow-submodules"],
+        ["-j", "--jobs"],
     ]
 
     for action, expected_options in zip(
@@ -162,3 +203,33 @@ def test_check_non_overlapping_destinations(name, real_path, destinations):
     Update._check_overlapping_destination(
         ProjectEntry.from_yaml({"name": "a"}), destinations, real_path
     )
+
+
+def test_remotes_to_prefetch_follow_the_project_types():
+    projects = [
+        ProjectEntry({"name": "git", "url": "https://example.com/git.git"}),
+        ProjectEntry({"name": "unknown", "url": "https://example.com/repo"}),
+        ProjectEntry({"name": "svn", "url": "https://example.com/svn", "vcs": "svn"}),
+        ProjectEntry({"name": "archive", "url": "https://example.com/a.tar.gz"}),
+    ]
+
+    git, svn, archives = _remotes_to_prefetch(projects, skip_wanted_pins=False)
+
+    assert git == ["https://example.com/git.git", "https://example.com/repo"]
+    assert [project.name for project in svn] == ["svn"]
+    assert [archive.url for archive in archives] == ["https://example.com/a.tar.gz"]
+
+
+def test_remotes_to_prefetch_skips_wanted_pins():
+    projects = [
+        ProjectEntry({"name": "pinned", "url": "https://example.com/a.git"}),
+        ProjectEntry({"name": "unknown", "url": "https://example.com/b"}),
+    ]
+
+    with patch(
+        "dfetch.project.GitSubProject.has_wanted_pin", return_value=True
+    ) as has_wanted_pin:
+        git, _, _ = _remotes_to_prefetch(projects, skip_wanted_pins=True)
+
+    has_wanted_pin.assert_called_once()
+    assert git == ["https://example.com/b"]
@@ -152,3 +152,34 @@ def test_latest_tag_from_list(name, current_tag, available_tags, expected_tag):
     latest_tag = dfetch.util.versions.latest_tag_from_list(current_tag, available_tags)
 
     assert expected_tag == latest_tag
+
+
+def test_latest_tag_prefers_first_of_equal_versions():
+    tags = ["v2.0.0", "2.0.0", "v1.0.0"]
+
+    assert dfetch.util.versions.latest_tag_from_list("v1.0.0", tags) == "v2.0.0"
+
+
+def test_version_index_keeps_prefixes_apart():
+    index = dfetch.util.versions.VersionIndex(
+        ["lib/1.0.0", "lib/3.0.0", "app/5.0.0", "2.0.0"]
+    )
+
+    assert index.latest("lib/1.0.0") == "lib/3.0.0"
+    assert index.latest("1.0.0") == "2.0.0"
+    assert index.latest("other/1.0.0") == "other/1.0.0"
+
+
+def test_version_index_newest():
+    index = dfetch.util.versions.VersionIndex(["v1.0.0", "main", "v3.0.0", "v2.0.0"])
+
+    assert index.newest(2) == ["v3.0.0", "v2.0.0"]
+    assert index.newest() == ["v3.0.0", "v2.0.0", "v1.0.0", "main"]
+
+
+def test_version_index_is_created_once_per_tag_list():
+    tags = ["v1.0.0", "v2.0.0"]
+
+    assert dfetch.util.versions.version_index(tags) is (
+        dfetch.util.versions.version_index(list(tags))
+    )